@@ -1,5 +1,18 @@
-
 from .gas_calc import GasCostCalculator
 from .evaluator import ArbitrageEvaluator
+from .price_band import PriceBandCalculator
+from .quote_plan import QuotePlanner
+from .results import EvaluationBatch
+from .scheduler import EvalScheduler
+from .routes import Route, RouteIndex
 
-__all__ = ["GasCostCalculator", "ArbitrageEvaluator"]
+__all__ = [
+    "GasCostCalculator",
+    "ArbitrageEvaluator",
+    "PriceBandCalculator",
+    "QuotePlanner",
+    "EvalScheduler",
+    "EvaluationBatch",
+    "Route",
+    "RouteIndex",
+]
@@ -1,7 +1,8 @@
 import time
-from decimal import Decimal
 
 from config import (
+    POOL_BASE_ADDRESS,
+    POOL_QUOTE_ADDRESS,
     TRADE_SIZES_BASE,
     TRADE_SIZES_QUOTE,
     POOL_BASE_DECIMALS,
@@ -10,16 +11,17 @@ from config import (
     POOL_QUOTE_SYMBOL,
     NATIVE_SYMBOL,
     GAS_QUOTE_SYMBOL,
+    SPLIT_ROUTING,
+    QUOTE_PIN_BY_HASH,
 )
-from models.types import (
-    ArbitrageOpportunity,
-    DEXQuote,
-    Direction,
-    OrderbookLevel,
-)
+from models.fixed_point import FIXED_SCALE, PoolUnits, from_fixed
+from models.types import PriceBand
 from quoter.quoter_v2 import QuoterV2Client
 from orderbook.execution_sim import CEXExecutionSimulator
 from arbitrage.gas_calc import GasCostCalculator
+from arbitrage.results import DEX_BUY_CEX_SELL, DEX_SELL_CEX_BUY, EvaluationBatch
+from arbitrage.routes import RouteIndex
+from arbitrage.splitter import SplitRouter
 
 
 class ArbitrageEvaluator:
@@ -30,12 +32,129 @@ class ArbitrageEvaluator:
         gas_calc: GasCostCalculator,
         trade_sizes_base: list = TRADE_SIZES_BASE,
         trade_sizes_quote: list = TRADE_SIZES_QUOTE,
+        route_index: RouteIndex = None,
+        split_routing: bool = SPLIT_ROUTING,
     ):
         self.quoter = quoter
         self.exec_sim = execution_sim
         self.gas_calc = gas_calc
         self.trade_sizes_base = trade_sizes_base
         self.trade_sizes_quote = trade_sizes_quote
+        self.units = PoolUnits(POOL_BASE_DECIMALS, POOL_QUOTE_DECIMALS)
+        # Config sizes converted to raw units once
+        self.trade_sizes_base_raw = [self.units.base_to_raw(s) for s in trade_sizes_base]
+        self.trade_sizes_quote_raw = [self.units.quote_to_raw(s) for s in trade_sizes_quote]
+        # Candidate routes are enumerated once - per block they are only priced
+        self.route_index = route_index or RouteIndex()
+        self.buy_routes = self.route_index.candidates(POOL_QUOTE_ADDRESS, POOL_BASE_ADDRESS)
+        self.sell_routes = self.route_index.candidates(POOL_BASE_ADDRESS, POOL_QUOTE_ADDRESS)
+        self.max_hops = max(
+            (route.hops for route in self.buy_routes + self.sell_routes),
+            default=1,
+        )
+        # Parallel pools for the pair - only direct hops are split across
+        self.buy_split_routes = tuple(r for r in self.buy_routes if r.hops == 1)
+        self.sell_split_routes = tuple(r for r in self.sell_routes if r.hops == 1)
+        self.splitter = None
+        if split_routing and (len(self.buy_split_routes) > 1 or len(self.sell_split_routes) > 1):
+            self.splitter = SplitRouter(quoter)
+        # Gas is precomputed up to the most swaps one row can pay for
+        self.max_gas_hops = max(
+            self.max_hops,
+            len(self.buy_split_routes),
+            len(self.sell_split_routes),
+        )
+        # DEX legs quoted for the latest block, reused for sub-block CEX re-evaluation
+        self.cached_block = None
+        # Blocks a direction was pruned on, per direction
+        self.prune_stats = {DEX_BUY_CEX_SELL: 0, DEX_SELL_CEX_BUY: 0}
+
+    # More than the configured pool is in play - a single-pool price band no longer bounds it
+    @property
+    def has_alternative_routes(self) :
+        return len(self.buy_routes) > 1 or len(self.sell_routes) > 1 or self.max_hops > 1
+
+    # Price of 1 ETH in quote units (fixed-point)
+    def gas_price_in_quote(
+        self,
+        base_price_quote_fx: int = None,
+        native_price_quote_fx: int = None,
+    ):
+        # 1:1 ratio if quote token is ETH/WETH
+        if POOL_QUOTE_SYMBOL in {NATIVE_SYMBOL, "WETH"}:
+            return FIXED_SCALE
+        # Base price already expresses ETH in quote units
+        if POOL_BASE_SYMBOL in {NATIVE_SYMBOL, "WETH"}:
+            return base_price_quote_fx
+        # Use the gas stream price when quote matches GAS_QUOTE_SYMBOL
+        if POOL_QUOTE_SYMBOL == GAS_QUOTE_SYMBOL:
+            return native_price_quote_fx
+        return None
+
+    # (direction, size_raw) pairs a block quotes, in config order - DEX buys
+    # first - restricted to a reduced quote plan when there is one, less pruned directions
+    def candidates(self, plan: frozenset = None, skipped: dict = None) :
+        pairs = [(DEX_BUY_CEX_SELL, size) for size in self.trade_sizes_quote_raw]
+        pairs += [(DEX_SELL_CEX_BUY, size) for size in self.trade_sizes_base_raw]
+        if skipped:
+            pairs = [pair for pair in pairs if pair[0] not in skipped]
+        if plan is None:
+            return pairs
+        return [pair for pair in pairs if pair in plan]
+
+    # Directions that can't pay at any size, with the reason. The band's bounds
+    # are the pool marginal price (slot0) moved out by both fees and the
+    # largest size's gas - with no slippage assumed, a CEX bid at or below the
+    # upper bound can't pay for a DEX buy, nor an ask at or above the lower
+    # bound for a DEX sell. Those directions are neither quoted nor filled
+    def prune_directions(self, band: PriceBand, bids: list, asks: list) :
+        skipped = {}
+        if band is None:
+            return skipped
+        if bids and bids[0].price <= band.upper_fx:
+            skipped[DEX_BUY_CEX_SELL] = (
+                f"CEX bid {from_fixed(bids[0].price)} <= breakeven "
+                f"{from_fixed(band.upper_fx)} over pool price {from_fixed(band.dex_price_fx)}"
+            )
+        if asks and asks[0].price >= band.lower_fx:
+            skipped[DEX_SELL_CEX_BUY] = (
+                f"CEX ask {from_fixed(asks[0].price)} >= breakeven "
+                f"{from_fixed(band.lower_fx)} under pool price {from_fixed(band.dex_price_fx)}"
+            )
+        return skipped
+
+    # Whether a direction the cached block pruned could now pay against this book
+    def pruned_direction_opened(self, band: PriceBand, best_bid_fx: int, best_ask_fx: int) :
+        cached = self.cached_block
+        # Quotes restored from a checkpoint were never pruned
+        skipped = cached.get("skipped_directions") if cached is not None else None
+        if band is None or not skipped:
+            return False
+        return (
+            (DEX_BUY_CEX_SELL in skipped and best_bid_fx > band.upper_fx)
+            or (DEX_SELL_CEX_BUY in skipped and best_ask_fx < band.lower_fx)
+        )
+
+    # DEX mid implied by the smallest buy and sell quotes of the cached block -
+    # pool fee and impact lean the two opposite ways and mostly cancel
+    def last_dex_mid_fx(self) :
+        cached = self.cached_block
+        if cached is None:
+            return None
+        buy = sell = None
+        for direction, amount_in_raw, amount_out_raw, _, _, _ in cached["dex_legs"]:
+            if amount_out_raw <= 0:
+                continue
+            if direction == DEX_BUY_CEX_SELL:
+                if buy is None or amount_in_raw < buy[0]:
+                    buy = (amount_in_raw, amount_out_raw)
+            elif sell is None or amount_in_raw < sell[0]:
+                sell = (amount_in_raw, amount_out_raw)
+        if buy is None or sell is None:
+            return None
+        buy_price_fx = self.units.price_fx(buy[1], buy[0])
+        sell_price_fx = self.units.price_fx(sell[0], sell[1])
+        return (buy_price_fx + sell_price_fx) // 2
 
     def evaluate_block(
         self,
@@ -43,220 +162,453 @@ class ArbitrageEvaluator:
         bids: list,
         asks: list,
         gas_price_wei: int,
-        base_price_quote: Decimal = None,
-        native_price_quote: Decimal = None,
+        base_price_quote_fx: int = None,
+        native_price_quote_fx: int = None,
+        book_timestamp: float = 0.0,
+        block_hash: str = None,
+        plan: frozenset = None,
+        band: PriceBand = None,
+    ):
+        context = self.prepare_block(
+            block_number,
+            gas_price_wei,
+            base_price_quote_fx,
+            native_price_quote_fx,
+            block_hash,
+            plan,
+            band,
+            bids,
+            asks,
+        )
+        if context is None:
+            return None
+        for direction, size_raw in self.candidates(plan, context["skipped"]):
+            self.quote_leg(context, direction, size_raw)
+        return self.finish_block(context, bids, asks, book_timestamp)
+
+    # Per-block state the DEX quotes share: pinned block id, gas per route
+    # length, split curves and the directions pruned against the band (when
+    # given). None when gas can't be priced in quote units.
+    # A block is evaluated as prepare_block, quote_leg per (direction, size) in
+    # any order and finish_block - which a scheduler may call early
+    def prepare_block(
+        self,
+        block_number: int,
+        gas_price_wei: int,
+        base_price_quote_fx: int = None,
+        native_price_quote_fx: int = None,
+        block_hash: str = None,
+        plan: frozenset = None,
+        band: PriceBand = None,
+        bids: list = None,
+        asks: list = None,
     ):
-        opportunities = []
-        timestamp = time.time()
+        self.cached_block = None
+        # State the quotes are pinned to - the hash can't silently move to another fork
+        block_id = block_hash if QUOTE_PIN_BY_HASH and block_hash else block_number
 
         # Convert ETH gas cost into quote token units
-        gas_price_quote = None
-        # 1:1 ratio if quote token is ETH/WETH
-        if POOL_QUOTE_SYMBOL in {NATIVE_SYMBOL, "WETH"}:
-            gas_price_quote = Decimal("1")
-        # Base price already expresses ETH in quote units
-        elif POOL_BASE_SYMBOL in {NATIVE_SYMBOL, "WETH"}:
-            gas_price_quote = base_price_quote
-        # Use the gas stream price when quote matches GAS_QUOTE_SYMBOL
-        elif POOL_QUOTE_SYMBOL == GAS_QUOTE_SYMBOL:
-            gas_price_quote = native_price_quote
+        gas_price_quote_fx = self.gas_price_in_quote(
+            base_price_quote_fx, native_price_quote_fx
+        )
 
         # Skip block if we cannot price gas in quote units
-        if gas_price_quote is None:
-            return opportunities
-
-        # Precompute gas cost once per block
-        gas_cost_native = self.gas_calc.calculate_gas_cost_eth(gas_price_wei)
-        gas_cost_quote = self.gas_calc.calculate_gas_cost_quote(
-            gas_price_wei, gas_price_quote
-        )
+        if gas_price_quote_fx is None:
+            return None
 
-        # DEX buy with quote -> CEX sell with base -> quote
-        for trade_size_quote in self.trade_sizes_quote:
-            opp_a = self.evaluate_dex_buy_cex_sell(
-                block_number=block_number,
-                timestamp=timestamp,
-                trade_size_quote=trade_size_quote,
-                bids=bids,
-                gas_price_wei=gas_price_wei,
-                gas_cost_native=gas_cost_native,
-                gas_cost_quote=gas_cost_quote,
+        # Precompute gas cost once per block, per route length
+        gas_cost_wei_by_hops = [
+            self.gas_calc.calculate_gas_cost_wei(gas_price_wei, hops)
+            for hops in range(1, self.max_gas_hops + 1)
+        ]
+        gas_cost_quote_by_hops = [
+            self.gas_calc.calculate_gas_cost_quote(
+                gas_price_wei, gas_price_quote_fx, self.units, hops
             )
-            if opp_a:
-                opportunities.append(opp_a)
+            for hops in range(1, self.max_gas_hops + 1)
+        ]
+
+        skipped = self.prune_directions(band, bids, asks)
+        for direction, reason in skipped.items():
+            self.prune_stats[direction] += 1
+            label = "DEX buy" if direction == DEX_BUY_CEX_SELL else "DEX sell"
+            print(f"[evaluator] {label} pruned for block {block_number}: {reason}")
+
+        # Parallel-pool quote curves, sampled once per block up to the largest size
+        buy_curves = sell_curves = None
+        split_deadline = None
+        # A reduced quote plan (RPC budget short) skips the curve sampling calls
+        if self.splitter is not None and plan is None:
+            split_deadline = self.splitter.deadline()
+            buy_open = DEX_BUY_CEX_SELL not in skipped
+            sell_open = DEX_SELL_CEX_BUY not in skipped
+            if buy_open and len(self.buy_split_routes) > 1 and self.trade_sizes_quote_raw:
+                buy_curves = self.splitter.sample_curves(
+                    self.buy_split_routes,
+                    max(self.trade_sizes_quote_raw),
+                    block_id,
+                    split_deadline,
+                )
+            if sell_open and len(self.sell_split_routes) > 1 and self.trade_sizes_base_raw:
+                sell_curves = self.splitter.sample_curves(
+                    self.sell_split_routes,
+                    max(self.trade_sizes_base_raw),
+                    block_id,
+                    split_deadline,
+                )
+
+        return {
+            "block_number": block_number,
+            "block_hash": block_hash,
+            "block_id": block_id,
+            "gas_price_wei": gas_price_wei,
+            "gas_cost_wei_by_hops": gas_cost_wei_by_hops,
+            "gas_cost_quote_by_hops": gas_cost_quote_by_hops,
+            "buy_curves": buy_curves,
+            "sell_curves": sell_curves,
+            "split_deadline": split_deadline,
+            # direction -> why it isn't quoted this block
+            "skipped": skipped,
+            # (direction, size_raw) -> (direction, amount_in_raw, amount_out_raw,
+            # gas_estimate, route_id, split), or None when no route quoted
+            "legs": {},
+        }
 
+    # Quotes one (direction, size) on the DEX - returns whether a route quoted
+    def quote_leg(self, context: dict, direction: int, size_raw: int) :
+        dex_leg = self.quote_dex_leg(context, direction, size_raw)
+        context["legs"][(direction, size_raw)] = dex_leg
+        return dex_leg is not None
+
+    # The DEX leg for one (direction, size), or None when no route quoted.
+    # Leaves the context alone, so it can run off the event loop and its
+    # result be dropped if the block moves on first
+    def quote_dex_leg(self, context: dict, direction: int, size_raw: int) :
+        if direction == DEX_BUY_CEX_SELL:
+            # DEX buy with quote -> CEX sell with base -> quote
+            return self.quote_dex_buy(
+                size_raw,
+                context["block_id"],
+                context["gas_cost_quote_by_hops"],
+                context["buy_curves"],
+                context["split_deadline"],
+            )
         # DEX sell with base -> CEX buy with quote -> base
-        for trade_size_base in self.trade_sizes_base:
-            opp_b = self.evaluate_dex_sell_cex_buy(
-                block_number=block_number,
-                timestamp=timestamp,
-                trade_size_base=trade_size_base,
-                asks=asks,
-                gas_price_wei=gas_price_wei,
-                gas_cost_native=gas_cost_native,
-                gas_cost_quote=gas_cost_quote,
+        return self.quote_dex_sell(
+            size_raw,
+            context["block_id"],
+            context["gas_cost_quote_by_hops"],
+            context["sell_curves"],
+            context["split_deadline"],
+        )
+
+    # Caches whatever was quoted - in config order, however it was scheduled -
+    # and runs the CEX leg over it
+    def finish_block(
+        self,
+        context: dict,
+        bids: list,
+        asks: list,
+        book_timestamp: float = 0.0,
+    ):
+        legs = context["legs"]
+        # (direction, amount_in_raw, amount_out_raw, gas_estimate, route_id, split) per quoted size
+        dex_legs = [
+            legs[pair]
+            for pair in self.candidates()
+            if legs.get(pair) is not None
+        ]
+        gas_cost_wei_by_hops = context["gas_cost_wei_by_hops"]
+        gas_cost_quote_by_hops = context["gas_cost_quote_by_hops"]
+        self.cached_block = {
+            "block_number": context["block_number"],
+            "block_hash": context["block_hash"],
+            "gas_price_wei": context["gas_price_wei"],
+            "gas_cost_wei": gas_cost_wei_by_hops[0],
+            "gas_cost_quote_raw": gas_cost_quote_by_hops[0],
+            "gas_cost_wei_by_hops": gas_cost_wei_by_hops,
+            "gas_cost_quote_by_hops": gas_cost_quote_by_hops,
+            "dex_legs": dex_legs,
+            "skipped_directions": frozenset(context["skipped"]),
+        }
+
+        return self.evaluate_cex_leg(bids, asks, book_timestamp)
+
+    # Re-run only the CEX leg against the cached DEX quotes of the latest block
+    def evaluate_cex_leg(
+        self,
+        bids: list,
+        asks: list,
+        book_timestamp: float = 0.0,
+        log_skips: bool = True,
+    ):
+        cached = self.cached_block
+        if cached is None:
+            return None
+
+        batch = EvaluationBatch(
+            block_number=cached["block_number"],
+            timestamp=time.time(),
+            book_timestamp=book_timestamp,
+            gas_price_wei=cached["gas_price_wei"],
+            gas_cost_wei=cached["gas_cost_wei"],
+            gas_cost_quote_raw=cached["gas_cost_quote_raw"],
+            base_symbol=POOL_BASE_SYMBOL,
+            quote_symbol=POOL_QUOTE_SYMBOL,
+            units=self.units,
+            routes=self.route_index.routes,
+            gas_cost_wei_by_hops=cached["gas_cost_wei_by_hops"],
+            gas_cost_quote_by_hops=cached["gas_cost_quote_by_hops"],
+            block_hash=cached.get("block_hash"),
+        )
+        for direction, amount_in_raw, amount_out_raw, gas_estimate, route_id, split in cached["dex_legs"]:
+            if direction == DEX_BUY_CEX_SELL:
+                self.evaluate_dex_buy_cex_sell(
+                    batch, amount_in_raw, amount_out_raw, gas_estimate, bids, log_skips, route_id, split
+                )
+            else:
+                self.evaluate_dex_sell_cex_buy(
+                    batch, amount_in_raw, amount_out_raw, gas_estimate, asks, log_skips, route_id, split
+                )
+
+        return batch
+
+    # Quotes one size on every candidate route - returns the best
+    # (amount_out, gas_estimate, route) after charging each extra hop's gas,
+    # or None if no route quoted
+    def quote_best_route(
+        self,
+        routes: tuple,
+        amount_in_raw: int,
+        block_number: int,
+        gas_cost_quote_by_hops: list,
+        out_is_base: bool,
+    ):
+        best = None
+        best_score = None
+        for route in routes:
+            try:
+                quote_result = self.quoter.quote_path(
+                    route.tokens,
+                    route.tick_spacings,
+                    amount_in_raw,
+                    block_number=block_number,
+                )
+            except Exception:
+                continue
+            amount_out = quote_result.amount_out
+            if amount_out <= 0:
+                continue
+
+            # Extra gas over a single hop, in the output token at this route's own rate
+            extra_gas_quote = gas_cost_quote_by_hops[route.hops - 1] - gas_cost_quote_by_hops[0]
+            if out_is_base:
+                score = amount_out - extra_gas_quote * amount_out // amount_in_raw
+            else:
+                score = amount_out - extra_gas_quote
+            if best_score is None or score > best_score:
+                best_score = score
+                best = (amount_out, quote_result.gas_estimate, route, None, score)
+        return best
+
+    # Best single route, or a split across parallel pools when it nets more
+    # after the extra swaps' gas. Returns (amount_out, gas_estimate, route, split)
+    def quote_best_execution(
+        self,
+        routes: tuple,
+        amount_in_raw: int,
+        block_number: int,
+        gas_cost_quote_by_hops: list,
+        out_is_base: bool,
+        curves: dict = None,
+        split_deadline: float = None,
+    ):
+        best = self.quote_best_route(
+            routes, amount_in_raw, block_number, gas_cost_quote_by_hops, out_is_base
+        )
+        if curves:
+            routes_by_id = {route.route_id: route for route in routes}
+            legs = self.splitter.split(
+                routes_by_id, amount_in_raw, curves, block_number, split_deadline
             )
-            if opp_b:
-                opportunities.append(opp_b)
+            if legs is not None:
+                amount_out = sum(leg_out for _, _, leg_out in legs)
+                extra_gas_quote = gas_cost_quote_by_hops[len(legs) - 1] - gas_cost_quote_by_hops[0]
+                if out_is_base:
+                    score = amount_out - extra_gas_quote * amount_out // amount_in_raw
+                else:
+                    score = amount_out - extra_gas_quote
+                if best is None or score > best[4]:
+                    split = tuple(
+                        (route.route_id, leg_in, leg_out) for route, leg_in, leg_out in legs
+                    )
+                    # Gas estimate isn't quoted per leg here - charged via the per-swap gas limit
+                    gas_estimate = best[1] * len(legs) if best is not None else 0
+                    best = (amount_out, gas_estimate, legs[0][0], split, score)
+        if best is None:
+            return None
+        return best[:4]
 
-        return opportunities
+    def quote_dex_buy(
+        self,
+        trade_size_quote_raw: int,
+        block_number: int,
+        gas_cost_quote_by_hops: list,
+        curves: dict = None,
+        split_deadline: float = None,
+    ):
+        # DEX leg - sell quote, get base
+        best = self.quote_best_execution(
+            self.buy_routes,
+            trade_size_quote_raw,
+            block_number,
+            gas_cost_quote_by_hops,
+            True,
+            curves,
+            split_deadline,
+        )
+        if best is None:
+            return None
+        amount_out, gas_estimate, route, split = best
 
-    def evaluate_dex_buy_cex_sell(
+        # Track raw amounts for tx building
+        return (
+            DEX_BUY_CEX_SELL,
+            trade_size_quote_raw,
+            amount_out,
+            gas_estimate,
+            route.route_id,
+            split,
+        )
+
+    def quote_dex_sell(
         self,
+        trade_size_base_raw: int,
         block_number: int,
-        timestamp: float,
-        trade_size_quote: Decimal,
+        gas_cost_quote_by_hops: list,
+        curves: dict = None,
+        split_deadline: float = None,
+    ):
+        # DEX leg - sell base, get quote
+        best = self.quote_best_execution(
+            self.sell_routes,
+            trade_size_base_raw,
+            block_number,
+            gas_cost_quote_by_hops,
+            False,
+            curves,
+            split_deadline,
+        )
+        if best is None:
+            return None
+        amount_out, gas_estimate, route, split = best
+
+        # Track raw amounts for tx building
+        return (
+            DEX_SELL_CEX_BUY,
+            trade_size_base_raw,
+            amount_out,
+            gas_estimate,
+            route.route_id,
+            split,
+        )
+
+    def evaluate_dex_buy_cex_sell(
+        self,
+        batch: EvaluationBatch,
+        trade_size_quote_raw: int,
+        base_out_raw: int,
+        gas_estimate: int,
         bids: list,
-        gas_price_wei: int,
-        gas_cost_native: Decimal,
-        gas_cost_quote: Decimal,
+        log_skips: bool = True,
+        route_id: int = 0,
+        split: tuple = None,
     ):
         try:
-            # DEX leg - sell quote, get base
-            quote_result, base_out = self.quoter.quote_quote_to_base(
-                trade_size_quote,
-                block_number=block_number,
-            )
-            if base_out <= 0:
-                return None
-
             # CEX leg - sell base into bids
-            cex_quote = self.exec_sim.simulate_sell(
-                base_out,
-                bids,
-                token_in=POOL_BASE_SYMBOL,
-                token_out=POOL_QUOTE_SYMBOL,
-            )
+            fill = self.exec_sim.fill_sell(base_out_raw, bids)
 
             # Insufficient liquidity
-            if cex_quote is None:
-                bid_base_liq = sum(
-                    level.quantity
-                    for level in bids
-                    if level.price > 0 and level.quantity > 0
-                )
-                print(
-                    f"[evaluator] DEX buy skip for {trade_size_quote} {POOL_QUOTE_SYMBOL}: "
-                    f"insufficient CEX bids (base_qty={base_out:.6f} "
-                    f"bid_base_liq={bid_base_liq:.6f})"
-                )
-                return None
-
-            # Track raw amounts for tx building
-            dex_quote = DEXQuote(
-                token_in=POOL_QUOTE_SYMBOL,
-                token_out=POOL_BASE_SYMBOL,
-                amount_in=trade_size_quote,
-                amount_out=base_out,
-                amount_in_raw=int(trade_size_quote * (10 ** POOL_QUOTE_DECIMALS)),
-                amount_out_raw=quote_result.amount_out,
-                gas_estimate=quote_result.gas_estimate,
-            )
+            if fill is None:
+                if log_skips:
+                    bid_base_liq = sum(
+                        level.quantity
+                        for level in bids
+                        if level.price > 0 and level.quantity > 0
+                    )
+                    print(
+                        f"[evaluator] DEX buy skip for "
+                        f"{self.units.quote_from_raw(trade_size_quote_raw)} {POOL_QUOTE_SYMBOL}: "
+                        f"insufficient CEX bids (base_qty={self.units.base_from_raw(base_out_raw):.6f} "
+                        f"bid_base_liq={from_fixed(bid_base_liq):.6f})"
+                    )
+                return
 
-            dex_price = trade_size_quote / base_out if base_out > 0 else Decimal("0")
-            cex_price = cex_quote.average_price
+            base_sold_raw, net_quote_raw = fill
 
             # Profit in quote units
-            gross_profit_token = cex_quote.amount_out - trade_size_quote
-            net_profit_token = gross_profit_token
-
-            return ArbitrageOpportunity(
-                timestamp=timestamp,
-                block_number=block_number,
-                direction=Direction.DEX_BUY_CEX_SELL,
-                trade_size_base=base_out,
-                dex_quote=dex_quote,
-                cex_quote=cex_quote,
-                gas_price_wei=gas_price_wei,
-                gas_cost_native=gas_cost_native,
-                gas_cost_quote=gas_cost_quote,
-                profit_token=POOL_QUOTE_SYMBOL,
-                gross_profit_token=gross_profit_token,
-                net_profit_token=net_profit_token,
-                dex_price=dex_price,
-                cex_price=cex_price,
+            batch.append(
+                DEX_BUY_CEX_SELL,
+                trade_size_quote_raw,
+                base_out_raw,
+                gas_estimate,
+                base_sold_raw,
+                net_quote_raw,
+                net_quote_raw - trade_size_quote_raw,
+                route_id,
+                split,
             )
 
         except Exception:
-            return None
+            return
 
     def evaluate_dex_sell_cex_buy(
         self,
-        block_number: int,
-        timestamp: float,
-        trade_size_base: Decimal,
+        batch: EvaluationBatch,
+        trade_size_base_raw: int,
+        quote_out_raw: int,
+        gas_estimate: int,
         asks: list,
-        gas_price_wei: int,
-        gas_cost_native: Decimal,
-        gas_cost_quote: Decimal,
+        log_skips: bool = True,
+        route_id: int = 0,
+        split: tuple = None,
     ):
         try:
-            # DEX leg - sell base, get quote
-            quote_result, quote_out = self.quoter.quote_base_to_quote(
-                trade_size_base,
-                block_number=block_number,
-            )
-
-            if quote_out <= 0:
-                return None
-
             # CEX leg - sell quote into asks
-            cex_quote = self.exec_sim.simulate_buy(
-                quote_out,
-                asks,
-                token_in=POOL_QUOTE_SYMBOL,
-                token_out=POOL_BASE_SYMBOL,
-            )
-            
+            fill = self.exec_sim.fill_buy(quote_out_raw, asks)
+
             # Insufficient liqudity
-            if cex_quote is None:
-                ask_base_liq = sum(level.quantity for level in asks)
-                best_ask = asks[0].price if asks else Decimal("0")
-                base_qty = quote_out / best_ask if best_ask else Decimal("0")
-                print(
-                    f"[evaluator] DEX sell skip for {trade_size_base} {POOL_BASE_SYMBOL}: "
-                    f"insufficient CEX asks (base_qty={base_qty:.6f} "
-                    f"ask_base_liq={ask_base_liq:.6f})"
-                )
-                return None
-
-            # Net base after CEX fill
-            net_base = cex_quote.amount_out
-
-            # Track raw amounts for tx building
-            dex_quote = DEXQuote(
-                token_in=POOL_BASE_SYMBOL,
-                token_out=POOL_QUOTE_SYMBOL,
-                amount_in=trade_size_base,
-                amount_out=quote_out,
-                amount_in_raw=int(trade_size_base * (10 ** POOL_BASE_DECIMALS)),
-                amount_out_raw=quote_result.amount_out,
-                gas_estimate=quote_result.gas_estimate,
-            )
+            if fill is None:
+                if log_skips:
+                    ask_base_liq = sum(level.quantity for level in asks)
+                    best_ask_fx = asks[0].price if asks else 0
+                    base_qty_raw = (
+                        self.units.base_for_quote(quote_out_raw, best_ask_fx)
+                        if best_ask_fx
+                        else 0
+                    )
+                    print(
+                        f"[evaluator] DEX sell skip for "
+                        f"{self.units.base_from_raw(trade_size_base_raw)} {POOL_BASE_SYMBOL}: "
+                        f"insufficient CEX asks (base_qty={self.units.base_from_raw(base_qty_raw):.6f} "
+                        f"ask_base_liq={from_fixed(ask_base_liq):.6f})"
+                    )
+                return
 
-            dex_price = quote_out / trade_size_base
-            cex_price = cex_quote.average_price
+            quote_spent_raw, net_base_raw = fill
 
             # Profit in base units
-            gross_profit_token = net_base - trade_size_base
-            net_profit_token = gross_profit_token
-
-            return ArbitrageOpportunity(
-                timestamp=timestamp,
-                block_number=block_number,
-                direction=Direction.DEX_SELL_CEX_BUY,
-                trade_size_base=trade_size_base,
-                dex_quote=dex_quote,
-                cex_quote=cex_quote,
-                gas_price_wei=gas_price_wei,
-                gas_cost_native=gas_cost_native,
-                gas_cost_quote=gas_cost_quote,
-                profit_token=POOL_BASE_SYMBOL,
-                gross_profit_token=gross_profit_token,
-                net_profit_token=net_profit_token,
-                dex_price=dex_price,
-                cex_price=cex_price,
+            batch.append(
+                DEX_SELL_CEX_BUY,
+                trade_size_base_raw,
+                quote_out_raw,
+                gas_estimate,
+                quote_spent_raw,
+                net_base_raw,
+                net_base_raw - trade_size_base_raw,
+                route_id,
+                split,
             )
 
         except Exception:
-            return None
+            return
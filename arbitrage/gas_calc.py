@@ -1,20 +1,29 @@
-from decimal import Decimal
-
-from config import DEFAULT_GAS_LIMIT, NATIVE_DECIMALS
+from config import DEFAULT_GAS_LIMIT, ROUTE_EXTRA_HOP_GAS_LIMIT
+from models.fixed_point import PoolUnits
 
 
 class GasCostCalculator:
-    def __init__(self, gas_limit: int = DEFAULT_GAS_LIMIT) :
+    def __init__(
+        self,
+        gas_limit: int = DEFAULT_GAS_LIMIT,
+        extra_hop_gas_limit: int = ROUTE_EXTRA_HOP_GAS_LIMIT,
+    ) :
         self.gas_limit = gas_limit
+        self.extra_hop_gas_limit = extra_hop_gas_limit
+
+    def gas_limit_for_hops(self, hops: int = 1) :
+        return self.gas_limit + (hops - 1) * self.extra_hop_gas_limit
 
-    def calculate_gas_cost_eth(self, gas_price_wei: int) :
-        gas_cost_wei = gas_price_wei * self.gas_limit
-        return Decimal(gas_cost_wei) / (10 ** NATIVE_DECIMALS)
+    def calculate_gas_cost_wei(self, gas_price_wei: int, hops: int = 1) :
+        return gas_price_wei * self.gas_limit_for_hops(hops)
 
+    # Gas cost in quote raw units, rounded up
     def calculate_gas_cost_quote(
         self,
         gas_price_wei: int,
-        eth_price_quote: Decimal,
+        eth_price_quote_fx: int,
+        units: PoolUnits,
+        hops: int = 1,
     ) :
-        gas_cost_eth = self.calculate_gas_cost_eth(gas_price_wei)
-        return gas_cost_eth * eth_price_quote
+        gas_cost_wei = self.calculate_gas_cost_wei(gas_price_wei, hops)
+        return units.native_to_quote(gas_cost_wei, eth_price_quote_fx)
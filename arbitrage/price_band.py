@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from config import (
+    BINANCE_TAKER_FEE_BPS,
+    PRICE_BAND_MARGIN_BPS,
+    POOL_BASE_DECIMALS,
+    POOL_QUOTE_DECIMALS,
+    TRADE_SIZES_BASE,
+    TRADE_SIZES_QUOTE,
+)
+from models.types import PriceBand
+from models.fixed_point import (
+    FIXED_SCALE,
+    PIPS_SCALE,
+    PoolUnits,
+    bps_to_fixed,
+    ceil_div,
+)
+
+
+class PriceBandCalculator:
+    def __init__(
+        self,
+        taker_fee_bps: Decimal = BINANCE_TAKER_FEE_BPS,
+        margin_bps: Decimal = PRICE_BAND_MARGIN_BPS,
+        trade_sizes_base: list = TRADE_SIZES_BASE,
+        trade_sizes_quote: list = TRADE_SIZES_QUOTE,
+        units: PoolUnits = None,
+    ) :
+        self.units = units or PoolUnits(POOL_BASE_DECIMALS, POOL_QUOTE_DECIMALS)
+        self.cex_keep_fx = FIXED_SCALE - bps_to_fixed(taker_fee_bps)
+        self.margin_fx = bps_to_fixed(margin_bps)
+        # Gas is fixed per trade, so the largest size is the easiest to clear
+        self.max_size_base_raw = (
+            self.units.base_to_raw(max(trade_sizes_base)) if trade_sizes_base else None
+        )
+        self.max_size_quote_raw = (
+            self.units.quote_to_raw(max(trade_sizes_quote)) if trade_sizes_quote else None
+        )
+
+    # Bounds assume fills at the marginal price with no slippage on either
+    # venue - slippage only ever hurts, so anything inside the band is a loss
+    def compute(
+        self,
+        block_number: int,
+        dex_price_fx: int,
+        pool_fee_pips: int,
+        gas_cost_quote_raw: int,
+    ) :
+        if dex_price_fx is None or dex_price_fx <= 0:
+            return None
+
+        dex_keep = PIPS_SCALE - pool_fee_pips
+        # keep = dex_keep * cex_keep, scaled by PIPS_SCALE * FIXED_SCALE
+        keep = dex_keep * self.cex_keep_fx
+        keep_scale = PIPS_SCALE * FIXED_SCALE
+        if keep <= 0:
+            return None
+
+        # DEX buy -> CEX sell: Q quote buys Q*keep/dex_price base on the DEX,
+        # sold into the bid it must return more than Q + gas
+        upper_fx = None
+        if self.max_size_quote_raw:
+            size = self.max_size_quote_raw
+            upper_fx = dex_price_fx * (size + gas_cost_quote_raw) * keep_scale // (size * keep)
+
+        # DEX sell -> CEX buy: B base sells for B*dex_price*keep quote,
+        # bought back at the ask it must return more than B + gas in base
+        lower_fx = None
+        if self.max_size_base_raw:
+            size = self.max_size_base_raw
+            gas_cost_base_raw = self.units.base_for_quote(gas_cost_quote_raw, dex_price_fx)
+            lower_fx = ceil_div(
+                dex_price_fx * keep * size,
+                keep_scale * (size + gas_cost_base_raw),
+            )
+
+        # Widen outward to absorb rounding and USD conversion differences
+        if upper_fx is not None:
+            upper_fx = upper_fx * (FIXED_SCALE - self.margin_fx) // FIXED_SCALE
+        else:
+            upper_fx = float("inf")
+        if lower_fx is not None:
+            lower_fx = ceil_div(lower_fx * (FIXED_SCALE + self.margin_fx), FIXED_SCALE)
+        else:
+            lower_fx = 0
+
+        return PriceBand(
+            block_number=block_number,
+            dex_price_fx=dex_price_fx,
+            lower_fx=lower_fx,
+            upper_fx=upper_fx,
+        )
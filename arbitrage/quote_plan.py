@@ -0,0 +1,114 @@
+from config import (
+    QUOTE_PLAN_HIT_HALFLIFE_BLOCKS,
+    QUOTE_PLAN_MOVE_WEIGHT,
+    QUOTE_PLAN_SPREAD_WEIGHT,
+)
+from arbitrage.results import DEX_BUY_CEX_SELL, DEX_SELL_CEX_BUY
+from models.fixed_point import BPS_SCALE
+
+
+# Chooses which (direction, size) pairs a block can afford to quote. Each pair
+# costs one eth_call per candidate route; when the allowance covers everything
+# the plan is None (quote all, splits included). Otherwise pairs are ranked by a
+# decayed profitable-hit rate plus a bonus for the CEX mid having moved in that
+# direction's favour since the last block, and the best ones that fit are kept.
+# The same ranking, plus the current CEX-DEX spread, orders the pairs a block
+# quotes so a deadline cuts the least promising ones
+class QuotePlanner:
+    def __init__(
+        self,
+        evaluator,
+        hit_halflife_blocks: float = QUOTE_PLAN_HIT_HALFLIFE_BLOCKS,
+        move_weight: float = QUOTE_PLAN_MOVE_WEIGHT,
+        spread_weight: float = QUOTE_PLAN_SPREAD_WEIGHT,
+    ) :
+        self.cost = {
+            DEX_BUY_CEX_SELL: len(evaluator.buy_routes),
+            DEX_SELL_CEX_BUY: len(evaluator.sell_routes),
+        }
+        self.candidates = [
+            (DEX_BUY_CEX_SELL, size) for size in evaluator.trade_sizes_quote_raw
+        ] + [
+            (DEX_SELL_CEX_BUY, size) for size in evaluator.trade_sizes_base_raw
+        ]
+        self.full_cost = sum(self.cost[direction] for direction, _ in self.candidates)
+        self.splitting = evaluator.splitter is not None
+        self.decay = 0.5 ** (1 / max(1.0, hit_halflife_blocks))
+        self.move_weight = move_weight
+        self.spread_weight = spread_weight
+        # Neutral prior so untried pairs aren't starved
+        self.hit_rate = {candidate: 0.5 for candidate in self.candidates}
+        # This block's hits, header and sub-block re-quotes together - folded
+        # into hit_rate once, when the next block is planned
+        self.pending_hits = {}
+        self.last_mid_fx = None
+        # CEX move since the last block and CEX over DEX mid, both in bps
+        self.move_bps = 0.0
+        self.spread_bps = 0.0
+        self.stats = {"full": 0, "reduced": 0, "starved": 0, "pairs_dropped": 0}
+
+    def priority(self, candidate: tuple, spread: bool = False) :
+        direction, _ = candidate
+        # CEX up (or above the DEX) favours buying on the DEX and selling on the CEX
+        sign = 1 if direction == DEX_BUY_CEX_SELL else -1
+        score = self.hit_rate[candidate] + self.move_weight * max(0.0, sign * self.move_bps)
+        if spread:
+            score += self.spread_weight * sign * self.spread_bps
+        return score
+
+    # Pairs best-first for quoting - ties keep the given order
+    def order(self, candidates: list) :
+        return sorted(candidates, key=lambda candidate: self.priority(candidate, True), reverse=True)
+
+    # None = quote everything, otherwise the set of pairs to quote (maybe empty).
+    # Once per block: moves the per-block terms on to this block's mid.
+    # dex_mid_fx, when known, sets the spread term used by order()
+    def plan(self, mid_fx: int, allowance: int = None, dex_mid_fx: int = None) :
+        self.apply_hits()
+        self.move_bps = 0.0
+        if self.last_mid_fx:
+            self.move_bps = (mid_fx - self.last_mid_fx) * BPS_SCALE / self.last_mid_fx
+        self.last_mid_fx = mid_fx
+        self.spread_bps = (mid_fx - dex_mid_fx) * BPS_SCALE / dex_mid_fx if dex_mid_fx else 0.0
+
+        chosen = self.select(allowance)
+        if chosen is None:
+            self.stats["full"] += 1
+            return None
+        self.stats["reduced" if chosen else "starved"] += 1
+        self.stats["pairs_dropped"] += len(self.candidates) - len(chosen)
+        return chosen
+
+    # The plan for an allowance under the current block's ranking, changing
+    # nothing - what a sub-block re-quote of the same block uses
+    def select(self, allowance: int = None) :
+        if allowance is None or (allowance >= self.full_cost and not self.splitting):
+            return None
+
+        chosen = set()
+        remaining = allowance
+        for candidate in sorted(self.candidates, key=self.priority, reverse=True):
+            cost = self.cost[candidate[0]]
+            if cost <= remaining:
+                chosen.add(candidate)
+                remaining -= cost
+        # Split sampling is only worth it with the full set and calls to spare
+        if len(chosen) == len(self.candidates) and self.splitting and remaining > self.full_cost:
+            return None
+        return frozenset(chosen)
+
+    # Feeds back which quoted pairs were profitable; unquoted pairs keep their
+    # rate. A pair counts once per block however many times it was quoted
+    def record(self, batch, is_profitable) :
+        hits = self.pending_hits
+        for i in range(len(batch)):
+            candidate = (batch.direction[i], batch.dex_amount_in_raw[i])
+            hits[candidate] = hits.get(candidate, False) or bool(is_profitable[i])
+
+    # One decay step per block for the pairs it quoted
+    def apply_hits(self) :
+        decay = self.decay
+        for candidate, hit in self.pending_hits.items():
+            if candidate in self.hit_rate:
+                self.hit_rate[candidate] = self.hit_rate[candidate] * decay + (1 - decay) * hit
+        self.pending_hits = {}
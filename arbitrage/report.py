@@ -0,0 +1,222 @@
+import json
+from array import array
+from datetime import datetime
+
+try:
+    import orjson
+
+    def dumps_bytes(obj):
+        return orjson.dumps(obj)
+except ImportError:
+
+    def dumps_bytes(obj):
+        return json.dumps(obj, default=str, separators=(",", ":")).encode()
+
+from config import (
+    POOL_BASE_SYMBOL,
+    POOL_QUOTE_SYMBOL,
+    NATIVE_SYMBOL,
+    GAS_QUOTE_SYMBOL,
+)
+from arbitrage.results import DEX_BUY_CEX_SELL, DIRECTIONS, EvaluationBatch
+from models.fixed_point import BPS_SCALE, FIXED_SCALE, ceil_div
+
+
+# Cost of 1 pool quote token as 1 dollar (fixed-point)
+def compute_quote_price_usd(
+    base_price_quote_fx: int,
+    native_price_quote_fx: int,
+) :
+    # quote token already USDC - pegged
+    if POOL_QUOTE_SYMBOL == GAS_QUOTE_SYMBOL:
+        return FIXED_SCALE
+    # quote token is native gas so native_price_quote is weth/usdc - pegged
+    if POOL_QUOTE_SYMBOL in {NATIVE_SYMBOL, "WETH"}:
+        return native_price_quote_fx
+
+    # Consider WETH/WBTC - need to approx convert WBTC to USD for pnl
+    # native_price_quote (gas stream weth/usdc) represents USDC per ETH
+    # base_price_quote (pair stream weth/wbtc) - so need approx USDC per WBTC
+    # (weth/usdc) / (weth/wbtc) = wbtc/usdc - can now convert to $
+    # This is all infinitely easier if I had pricing for everything separately
+    if POOL_BASE_SYMBOL in {NATIVE_SYMBOL, "WETH"}:
+        if base_price_quote_fx <= 0:
+            return None
+        return native_price_quote_fx * FIXED_SCALE // base_price_quote_fx
+    # no conversion path from quote to USD
+    return None
+
+
+# Per-block post-processing: USD profit, notional, bps and profitability are
+# computed once per row, and each row is serialized to JSON bytes exactly once.
+# The evaluation log, the best-trade log and the stdout summary all read from here
+class BlockReport:
+    __slots__ = (
+        "batch",
+        "base_price_quote_fx",
+        "quote_price_usd_fx",
+        "gas_cost_usd_fx",
+        "net_profit_usd_fx",
+        "notional_usd_fx",
+        "profit_bps",
+        "is_profitable",
+        "best_index",
+        "rows",
+        "timestamp_iso",
+    )
+
+    def __init__(
+        self,
+        batch: EvaluationBatch,
+        base_price_quote_fx: int,
+        quote_price_usd_fx: int,
+    ) :
+        self.batch = batch
+        self.base_price_quote_fx = base_price_quote_fx
+        self.quote_price_usd_fx = quote_price_usd_fx
+        self.rows = [None] * len(batch)
+        self.timestamp_iso = None
+
+        units = batch.units
+        quote_unit = units.quote_unit
+        # base raw -> USD = raw * base_px * quote_usd / (base_unit * FIXED_SCALE)
+        base_usd_num = base_price_quote_fx * quote_price_usd_fx
+        base_usd_den = units.base_unit * FIXED_SCALE
+
+        # Gas is paid, so it rounds up - one value per route length, shared by rows
+        gas_usd_by_hops = [
+            ceil_div(gas_cost_quote_raw * quote_price_usd_fx, quote_unit)
+            for gas_cost_quote_raw in batch.gas_cost_quote_by_hops
+        ]
+
+        gas_cost_usd_fx = []
+        net_profit_usd_fx = []
+        notional_usd_fx = []
+        profit_bps = []
+        is_profitable = array("b")
+        best_index = None
+        best_profit = None
+
+        for i in range(len(batch)):
+            profit_raw = batch.profit_raw[i]
+            amount_in_raw = batch.dex_amount_in_raw[i]
+            if batch.direction[i] == DEX_BUY_CEX_SELL:
+                # Profit and notional both in quote
+                profit_usd = profit_raw * quote_price_usd_fx // quote_unit
+                notional = amount_in_raw * quote_price_usd_fx // quote_unit
+            else:
+                # Profit and notional both in base
+                profit_usd = profit_raw * base_usd_num // base_usd_den
+                notional = amount_in_raw * base_usd_num // base_usd_den
+
+            gas_usd = gas_usd_by_hops[batch.hops(i) - 1]
+            net = profit_usd - gas_usd
+            capital = notional + gas_usd
+            gas_cost_usd_fx.append(gas_usd)
+            net_profit_usd_fx.append(net)
+            notional_usd_fx.append(notional)
+            profit_bps.append(net * BPS_SCALE / capital if capital > 0 else None)
+            is_profitable.append(net > 0)
+
+            if net > 0 and (best_profit is None or net > best_profit):
+                best_profit = net
+                best_index = i
+
+        self.gas_cost_usd_fx = gas_cost_usd_fx
+        self.net_profit_usd_fx = net_profit_usd_fx
+        self.notional_usd_fx = notional_usd_fx
+        self.profit_bps = profit_bps
+        self.is_profitable = is_profitable
+        self.best_index = best_index
+
+    def __len__(self) :
+        return len(self.rows)
+
+    # Serialized on first use, then reused by every sink
+    def row_bytes(self, i: int) :
+        row = self.rows[i]
+        if row is None:
+            row = dumps_bytes(self.format_row(i))
+            self.rows[i] = row
+        return row
+
+    # Best-trade line is the row's bytes with the tx spliced onto the end
+    def best_trade_bytes(self, tx_payload: dict) :
+        row = self.row_bytes(self.best_index)
+        tx = dumps_bytes({
+            "to": tx_payload.get("to"),
+            "data": tx_payload.get("data"),
+        })
+        return row[:-1] + b',"tx":' + tx + b"}"
+
+    # (dex_price_fx, cex_price_fx) as quote per base
+    def prices_fx(self, i: int) :
+        batch = self.batch
+        units = batch.units
+        dex_in = batch.dex_amount_in_raw[i]
+        dex_out = batch.dex_amount_out_raw[i]
+        cex_in = batch.cex_amount_in_raw[i]
+        cex_out = batch.cex_amount_out_raw[i]
+        if batch.direction[i] == DEX_BUY_CEX_SELL:
+            return units.price_fx(dex_out, dex_in), units.price_fx(cex_in, cex_out)
+        return units.price_fx(dex_in, dex_out), units.price_fx(cex_out, cex_in)
+
+    def format_row(self, i: int) :
+        batch = self.batch
+        units = batch.units
+        if self.timestamp_iso is None:
+            self.timestamp_iso = datetime.fromtimestamp(batch.timestamp).isoformat()
+
+        dex_in = batch.dex_amount_in_raw[i]
+        dex_out = batch.dex_amount_out_raw[i]
+        cex_in = batch.cex_amount_in_raw[i]
+        cex_out = batch.cex_amount_out_raw[i]
+        if batch.direction[i] == DEX_BUY_CEX_SELL:
+            token_in, token_out = batch.quote_symbol, batch.base_symbol
+            in_unit, out_unit = units.quote_unit, units.base_unit
+        else:
+            token_in, token_out = batch.base_symbol, batch.quote_symbol
+            in_unit, out_unit = units.base_unit, units.quote_unit
+        dex_price_fx, cex_price_fx = self.prices_fx(i)
+        route = batch.route(i)
+        split = batch.split(i)
+
+        # Display-only conversions - everything upstream is raw ints / fixed-point
+        return {
+            "timestamp": self.timestamp_iso,
+            "block": batch.block_number,
+            "block_hash": batch.block_hash,
+            "book_ts": batch.book_timestamp,
+            "net_profit_usd": self.net_profit_usd_fx[i] / FIXED_SCALE,
+            "direction": DIRECTIONS[batch.direction[i]].value,
+            "route": route.label if route is not None else f"{token_in}>{token_out}",
+            "dex": {
+                "token_in": token_in,
+                "token_out": token_out,
+                "amount_in": dex_in / in_unit,
+                "amount_out": dex_out / out_unit,
+                "price": dex_price_fx / FIXED_SCALE,
+                "gas_estimate": batch.gas_estimate[i],
+            },
+            "cex": {
+                "token_in": token_out,
+                "token_out": token_in,
+                "amount_in": cex_in / out_unit,
+                "amount_out": cex_out / in_unit,
+                "avg_price": cex_price_fx / FIXED_SCALE,
+            },
+            "gas_price_gwei": batch.gas_price_wei / 1e9,
+            "gas_cost_usd": self.gas_cost_usd_fx[i] / FIXED_SCALE,
+            "profit_token": token_in,
+            "profit_token_amount": batch.profit_raw[i] / in_unit,
+            "profit_bps": self.profit_bps[i],
+            "split": [
+                {
+                    "pool": "/".join(leg_route.pool_keys),
+                    "amount_in": leg_in / in_unit,
+                    "amount_out": leg_out / out_unit,
+                }
+                for leg_route, leg_in, leg_out in split
+            ] if split is not None else None,
+            "is_profitable": bool(self.is_profitable[i]),
+        }
@@ -0,0 +1,204 @@
+from array import array
+
+from models.types import (
+    ArbitrageOpportunity,
+    CEXQuote,
+    DEXQuote,
+    Direction,
+)
+from models.fixed_point import PoolUnits
+
+# Direction column codes
+DEX_BUY_CEX_SELL = 0
+DEX_SELL_CEX_BUY = 1
+DIRECTIONS = (Direction.DEX_BUY_CEX_SELL, Direction.DEX_SELL_CEX_BUY)
+
+
+# One block's evaluations as parallel columns - a row per (direction, size).
+# Raw amounts overflow int64 (1e5 LINEA is 1e23 wei), so amount columns are
+# plain lists of ints; full model objects are only built by materialize().
+# gas_cost_wei / gas_cost_quote_raw are the single-hop costs; rows on longer
+# routes are charged the per-hop-count cost from the *_by_hops lists
+class EvaluationBatch:
+    __slots__ = (
+        "block_number",
+        "block_hash",
+        "timestamp",
+        "book_timestamp",
+        "gas_price_wei",
+        "gas_cost_wei",
+        "gas_cost_quote_raw",
+        "base_symbol",
+        "quote_symbol",
+        "units",
+        "routes",
+        "gas_cost_wei_by_hops",
+        "gas_cost_quote_by_hops",
+        "direction",
+        "dex_amount_in_raw",
+        "dex_amount_out_raw",
+        "gas_estimate",
+        "cex_amount_in_raw",
+        "cex_amount_out_raw",
+        "profit_raw",
+        "route_id",
+        "splits",
+    )
+
+    def __init__(
+        self,
+        block_number: int,
+        timestamp: float,
+        book_timestamp: float,
+        gas_price_wei: int,
+        gas_cost_wei: int,
+        gas_cost_quote_raw: int,
+        base_symbol: str,
+        quote_symbol: str,
+        units: PoolUnits,
+        routes: list = None,
+        gas_cost_wei_by_hops: list = None,
+        gas_cost_quote_by_hops: list = None,
+        block_hash: str = None,
+    ) :
+        self.block_number = block_number
+        self.block_hash = block_hash
+        self.timestamp = timestamp
+        self.book_timestamp = book_timestamp
+        self.gas_price_wei = gas_price_wei
+        self.gas_cost_wei = gas_cost_wei
+        self.gas_cost_quote_raw = gas_cost_quote_raw
+        self.base_symbol = base_symbol
+        self.quote_symbol = quote_symbol
+        self.units = units
+        # Route id -> Route, shared with the evaluator's RouteIndex
+        self.routes = routes
+        # Index hops - 1
+        self.gas_cost_wei_by_hops = gas_cost_wei_by_hops or [gas_cost_wei]
+        self.gas_cost_quote_by_hops = gas_cost_quote_by_hops or [gas_cost_quote_raw]
+        self.direction = array("b")
+        self.dex_amount_in_raw = []
+        self.dex_amount_out_raw = []
+        self.gas_estimate = array("q")
+        self.cex_amount_in_raw = []
+        self.cex_amount_out_raw = []
+        self.profit_raw = []
+        self.route_id = array("H")
+        # None, or ((route_id, amount_in_raw, amount_out_raw), ...) per split row
+        self.splits = []
+
+    def __len__(self) :
+        return len(self.direction)
+
+    def append(
+        self,
+        direction: int,
+        dex_amount_in_raw: int,
+        dex_amount_out_raw: int,
+        gas_estimate: int,
+        cex_amount_in_raw: int,
+        cex_amount_out_raw: int,
+        profit_raw: int,
+        route_id: int = 0,
+        split: tuple = None,
+    ) :
+        self.direction.append(direction)
+        self.dex_amount_in_raw.append(dex_amount_in_raw)
+        self.dex_amount_out_raw.append(dex_amount_out_raw)
+        self.gas_estimate.append(gas_estimate)
+        self.cex_amount_in_raw.append(cex_amount_in_raw)
+        self.cex_amount_out_raw.append(cex_amount_out_raw)
+        self.profit_raw.append(profit_raw)
+        self.route_id.append(route_id)
+        self.splits.append(split)
+
+    def route(self, i: int) :
+        if self.routes is None:
+            return None
+        return self.routes[self.route_id[i]]
+
+    # Gas is charged per swap hop - a split pays for every leg
+    def hops(self, i: int) :
+        split = self.splits[i]
+        if split is not None:
+            return sum(self.routes[route_id].hops for route_id, _, _ in split)
+        route = self.route(i)
+        return route.hops if route is not None else 1
+
+    def split(self, i: int) :
+        split = self.splits[i]
+        if split is None:
+            return None
+        return tuple(
+            (self.routes[route_id], amount_in_raw, amount_out_raw)
+            for route_id, amount_in_raw, amount_out_raw in split
+        )
+
+    def row_gas_cost_wei(self, i: int) :
+        return self.gas_cost_wei_by_hops[self.hops(i) - 1]
+
+    def row_gas_cost_quote_raw(self, i: int) :
+        return self.gas_cost_quote_by_hops[self.hops(i) - 1]
+
+    # Token the row's profit is denominated in
+    def profit_token(self, i: int) :
+        if self.direction[i] == DEX_BUY_CEX_SELL:
+            return self.quote_symbol
+        return self.base_symbol
+
+    def materialize(self, i: int) :
+        units = self.units
+        dex_in = self.dex_amount_in_raw[i]
+        dex_out = self.dex_amount_out_raw[i]
+        cex_in = self.cex_amount_in_raw[i]
+        cex_out = self.cex_amount_out_raw[i]
+
+        if self.direction[i] == DEX_BUY_CEX_SELL:
+            # DEX quote -> base, CEX base -> quote
+            token_in, token_out = self.quote_symbol, self.base_symbol
+            trade_size_base_raw = dex_out
+            dex_price_fx = units.price_fx(dex_out, dex_in)
+            cex_price_fx = units.price_fx(cex_in, cex_out)
+        else:
+            # DEX base -> quote, CEX quote -> base
+            token_in, token_out = self.base_symbol, self.quote_symbol
+            trade_size_base_raw = dex_in
+            dex_price_fx = units.price_fx(dex_in, dex_out)
+            cex_price_fx = units.price_fx(cex_out, cex_in)
+
+        profit_raw = self.profit_raw[i]
+        return ArbitrageOpportunity(
+            timestamp=self.timestamp,
+            block_number=self.block_number,
+            direction=DIRECTIONS[self.direction[i]],
+            trade_size_base_raw=trade_size_base_raw,
+            dex_quote=DEXQuote(
+                token_in=token_in,
+                token_out=token_out,
+                amount_in_raw=dex_in,
+                amount_out_raw=dex_out,
+                gas_estimate=self.gas_estimate[i],
+            ),
+            cex_quote=CEXQuote(
+                token_in=token_out,
+                token_out=token_in,
+                amount_in_raw=cex_in,
+                amount_out_raw=cex_out,
+                average_price_fx=cex_price_fx,
+            ),
+            gas_price_wei=self.gas_price_wei,
+            gas_cost_wei=self.row_gas_cost_wei(i),
+            gas_cost_quote_raw=self.row_gas_cost_quote_raw(i),
+            profit_token=self.profit_token(i),
+            gross_profit_raw=profit_raw,
+            net_profit_raw=profit_raw,
+            dex_price_fx=dex_price_fx,
+            cex_price_fx=cex_price_fx,
+            book_timestamp=self.book_timestamp,
+            block_hash=self.block_hash,
+            route=self.route(i),
+            split=self.split(i),
+        )
+
+    def opportunities(self) :
+        return [self.materialize(i) for i in range(len(self))]
@@ -0,0 +1,127 @@
+from dataclasses import dataclass
+
+from config import (
+    POOLS,
+    POOL_ADDRESS,
+    ROUTE_MAX_HOPS,
+    ROUTE_MAX_CANDIDATES,
+)
+from quoter.path import encode_v3_path
+
+
+@dataclass(frozen=True)
+class PoolEdge:
+    pool_key: str
+    pool_address: str
+    token_a: str
+    token_b: str
+    tick_spacing: int
+
+
+# One swap path. Token addresses are lowercase; symbols are display-only
+@dataclass(frozen=True)
+class Route:
+    route_id: int
+    tokens: tuple
+    symbols: tuple
+    tick_spacings: tuple
+    pool_keys: tuple
+    path: bytes
+
+    @property
+    def hops(self) :
+        return len(self.tick_spacings)
+
+    @property
+    def label(self) :
+        return ">".join(self.symbols)
+
+
+# Every simple path (no repeated token) of up to max_hops between every ordered
+# token pair, enumerated once at startup. Per block the evaluator only looks up
+# the precomputed candidates and prices them
+class RouteIndex:
+    def __init__(
+        self,
+        pools: dict = POOLS,
+        max_hops: int = ROUTE_MAX_HOPS,
+        max_candidates: int = ROUTE_MAX_CANDIDATES,
+        primary_pool_address: str = POOL_ADDRESS,
+    ) :
+        self.max_hops = max(1, int(max_hops))
+        self.max_candidates = max(1, int(max_candidates))
+        self.primary_pool_address = primary_pool_address.lower()
+        self.symbols = {}
+        self.edges = []
+        self.adjacency = {}
+        seen_pools = set()
+
+        for pool_key, pool in pools.items():
+            pool_address = pool["pool_address"].lower()
+            if pool_address in seen_pools:
+                continue
+            seen_pools.add(pool_address)
+            token_a = pool["base_address"].lower()
+            token_b = pool["quote_address"].lower()
+            self.symbols[token_a] = pool["base_symbol"]
+            self.symbols[token_b] = pool["quote_symbol"]
+            edge = PoolEdge(pool_key, pool_address, token_a, token_b, int(pool["tick_spacing"]))
+            self.edges.append(edge)
+            self.adjacency.setdefault(token_a, []).append((edge, token_b))
+            self.adjacency.setdefault(token_b, []).append((edge, token_a))
+
+        # Route ids index self.routes - stable for the life of the process
+        self.routes = []
+        self.by_pair = {}
+        for token_in in self.adjacency:
+            for token_out in self.adjacency:
+                if token_in != token_out:
+                    self.by_pair[(token_in, token_out)] = self.enumerate(token_in, token_out)
+
+    def enumerate(self, token_in: str, token_out: str) :
+        found = []
+
+        def walk(token: str, tokens: list, edges: list) :
+            if token == token_out:
+                found.append((list(tokens), list(edges)))
+                return
+            if len(edges) == self.max_hops:
+                return
+            for edge, next_token in self.adjacency.get(token, ()):
+                if next_token in tokens:
+                    continue
+                tokens.append(next_token)
+                edges.append(edge)
+                walk(next_token, tokens, edges)
+                tokens.pop()
+                edges.pop()
+
+        walk(token_in, [token_in], [])
+
+        # Fewest hops first, then routes through the configured pool
+        found.sort(key=lambda item: (
+            len(item[1]),
+            not any(edge.pool_address == self.primary_pool_address for edge in item[1]),
+        ))
+
+        routes = []
+        for tokens, edges in found[:self.max_candidates]:
+            tick_spacings = tuple(edge.tick_spacing for edge in edges)
+            route = Route(
+                route_id=len(self.routes),
+                tokens=tuple(tokens),
+                symbols=tuple(self.symbols[token] for token in tokens),
+                tick_spacings=tick_spacings,
+                pool_keys=tuple(edge.pool_key for edge in edges),
+                path=encode_v3_path(tuple(tokens), tick_spacings),
+            )
+            self.routes.append(route)
+            routes.append(route)
+        return tuple(routes)
+
+    # Precomputed candidates, best-first
+    def candidates(self, token_in: str, token_out: str) :
+        return self.by_pair.get((token_in.lower(), token_out.lower()), ())
+
+    def route(self, route_id: int) :
+        return self.routes[route_id]
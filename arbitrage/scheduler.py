@@ -0,0 +1,125 @@
+import asyncio
+import time
+
+from config import EVAL_BUDGET_MS
+
+
+# Runs one block's DEX quotes against a deadline measured from the header
+# timestamp. Pairs go best-first by the planner's ranking. Each quote is a
+# blocking eth_call, so it runs on a worker thread while the loop waits on it,
+# the deadline and the next header together - books and sub-block ticks keep
+# flowing, and a slow quote is cut off mid-call. A quote still running when the
+# block is cut is abandoned: its thread finishes but the result is dropped.
+# Whatever was quoted when time ran out is still evaluated and reported - a
+# partial block is worth more than a complete one that arrives after the next header
+class EvalScheduler:
+    def __init__(self, evaluator, planner=None, budget_ms: float = EVAL_BUDGET_MS, profiler=None) :
+        self.evaluator = evaluator
+        self.planner = planner
+        # SlowBlockProfiler - worker-thread work is profiled through it
+        self.profiler = profiler
+        self.budget_s = budget_ms / 1000
+        self.stats = {"complete": 0, "deadline": 0, "newer_block": 0, "pairs_cut": 0, "abandoned": 0}
+
+    def deadline(self, block_timestamp: float) :
+        if self.budget_s <= 0:
+            return None
+        return block_timestamp + self.budget_s
+
+    # (batch, pairs quoted, pairs planned, stop reason or None). With a price
+    # band, directions it rules out are pruned before anything is quoted.
+    # newer_block is an asyncio.Event set when the next header arrives
+    async def evaluate(
+        self,
+        block_number: int,
+        block_timestamp: float,
+        bids: list,
+        asks: list,
+        gas_price_wei: int,
+        base_price_quote_fx: int = None,
+        native_price_quote_fx: int = None,
+        book_timestamp: float = 0.0,
+        block_hash: str = None,
+        plan: frozenset = None,
+        band=None,
+        newer_block=None,
+    ) :
+        evaluator = self.evaluator
+        deadline = self.deadline(block_timestamp)
+
+        reason = None
+        quote_plan = plan
+        if deadline is not None and time.time() >= deadline:
+            # Too late for any quote - an empty plan also skips split sampling,
+            # but the block is still cached so nothing re-quotes it
+            reason = "deadline"
+            quote_plan = frozenset()
+        # Split curve sampling is RPC too - bounded by its own deadline
+        context = await self.to_thread(
+            evaluator.prepare_block,
+            block_number,
+            gas_price_wei,
+            base_price_quote_fx,
+            native_price_quote_fx,
+            block_hash,
+            quote_plan,
+            band,
+            bids,
+            asks,
+        )
+        if context is None:
+            return None, 0, len(evaluator.candidates(plan)), None
+        # Pruned directions are neither planned nor counted as cut
+        pairs = evaluator.candidates(plan, context["skipped"])
+        if self.planner is not None:
+            pairs = self.planner.order(pairs)
+
+        quoted = 0
+        if reason is None:
+            for direction, size_raw in pairs:
+                reason = await self.quote(context, direction, size_raw, deadline, newer_block)
+                if reason is not None:
+                    break
+                quoted += 1
+
+        if reason is None:
+            self.stats["complete"] += 1
+        else:
+            self.stats[reason] += 1
+            self.stats["pairs_cut"] += len(pairs) - quoted
+        batch = evaluator.finish_block(context, bids, asks, book_timestamp)
+        return batch, quoted, len(pairs), reason
+
+    # fn(*args) on a worker thread, inside the block's profile when one is running
+    def to_thread(self, fn, *args) :
+        if self.profiler is None:
+            return asyncio.to_thread(fn, *args)
+        return asyncio.to_thread(self.profiler.run, fn, *args)
+
+    # Quotes one pair into the context, or returns why the block stopped first
+    async def quote(self, context: dict, direction: int, size_raw: int, deadline: float, newer_block) :
+        if deadline is not None and time.time() >= deadline:
+            return "deadline"
+        if newer_block is not None and newer_block.is_set():
+            return "newer_block"
+        leg = asyncio.ensure_future(
+            self.to_thread(self.evaluator.quote_dex_leg, context, direction, size_raw)
+        )
+        waiters = {leg}
+        header = None
+        if newer_block is not None:
+            header = asyncio.ensure_future(newer_block.wait())
+            waiters.add(header)
+        timeout = None if deadline is None else max(0.0, deadline - time.time())
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if header is not None:
+                header.cancel()
+        if not leg.done():
+            self.stats["abandoned"] += 1
+            # Nothing reads it now - keep a late failure out of the loop's error log
+            leg.add_done_callback(lambda future: future.cancelled() or future.exception())
+            return "newer_block" if newer_block is not None and newer_block.is_set() else "deadline"
+        context["legs"][(direction, size_raw)] = leg.result()
+        return None
@@ -0,0 +1,150 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from config import (
+    SPLIT_CURVE_POINTS,
+    SPLIT_MIN_LEG_BPS,
+    SPLIT_BUDGET_MS,
+    SPLIT_QUOTE_WORKERS,
+)
+from models.fixed_point import BPS_SCALE
+
+
+# Splits one trade across parallel pools for the same pair. Each pool's quote
+# curve is sampled once per block (concurrently, within a time budget); a size
+# is then allocated by water-filling the curves' linear segments - highest
+# marginal rate first, which equalizes marginal prices across pools - and the
+# chosen legs are re-quoted exactly
+class SplitRouter:
+    def __init__(
+        self,
+        quoter,
+        curve_points: int = SPLIT_CURVE_POINTS,
+        min_leg_bps: int = SPLIT_MIN_LEG_BPS,
+        budget_ms: float = SPLIT_BUDGET_MS,
+        workers: int = SPLIT_QUOTE_WORKERS,
+    ) :
+        self.quoter = quoter
+        self.curve_points = max(2, int(curve_points))
+        self.min_leg_bps = int(min_leg_bps)
+        self.budget_s = budget_ms / 1000
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="split-quote")
+
+    def deadline(self) :
+        return time.perf_counter() + self.budget_s
+
+    def quote(self, route, amount_in: int, block_number: int) :
+        try:
+            result = self.quoter.quote_path(
+                route.tokens,
+                route.tick_spacings,
+                amount_in,
+                block_number=block_number,
+            )
+        except Exception:
+            return None
+        return result.amount_out if result.amount_out > 0 else None
+
+    # Quotes (route, amount_in) pairs concurrently; None for any that failed
+    # or missed the deadline
+    def quote_many(self, requests: list, block_number: int, deadline: float) :
+        futures = [
+            self.executor.submit(self.quote, route, amount_in, block_number)
+            for route, amount_in in requests
+        ]
+        wait(futures, timeout=max(0.0, deadline - time.perf_counter()))
+        return [
+            future.result() if future.done() else None
+            for future in futures
+        ]
+
+    # route_id -> [(amount_in, amount_out), ...] from (0, 0) up to max_amount_in.
+    # None if the budget ran out before every curve was sampled
+    def sample_curves(
+        self,
+        routes: tuple,
+        max_amount_in: int,
+        block_number: int,
+        deadline: float,
+    ) :
+        points = [
+            max_amount_in * k // self.curve_points
+            for k in range(1, self.curve_points + 1)
+        ]
+        requests = [(route, amount_in) for route in routes for amount_in in points]
+        outs = self.quote_many(requests, block_number, deadline)
+        # Missing points past the deadline are timeouts, not reverts - don't trust a partial set
+        if time.perf_counter() > deadline and any(amount_out is None for amount_out in outs):
+            return None
+
+        curves = {route.route_id: [(0, 0)] for route in routes}
+        truncated = set()
+        for (route, amount_in), amount_out in zip(requests, outs):
+            # A reverted point (out of liquidity) ends the usable curve for that pool
+            if amount_out is None:
+                truncated.add(route.route_id)
+            if route.route_id in truncated:
+                continue
+            curves[route.route_id].append((amount_in, amount_out))
+        return curves
+
+    # Water-fill amount_in over the sampled segments. Rates are clamped to be
+    # non-increasing per pool so segments are always taken in order
+    def allocate(self, amount_in: int, curves: dict) :
+        segments = []
+        for route_id, curve in curves.items():
+            rate_cap = None
+            for (in_a, out_a), (in_b, out_b) in zip(curve, curve[1:]):
+                if in_b <= in_a:
+                    continue
+                rate = (out_b - out_a) / (in_b - in_a)
+                if rate_cap is not None and rate > rate_cap:
+                    rate = rate_cap
+                rate_cap = rate
+                segments.append((rate, in_b - in_a, route_id))
+        segments.sort(key=lambda segment: segment[0], reverse=True)
+
+        allocation = {}
+        remaining = amount_in
+        for rate, length, route_id in segments:
+            if remaining <= 0 or rate <= 0:
+                break
+            take = min(remaining, length)
+            allocation[route_id] = allocation.get(route_id, 0) + take
+            remaining -= take
+        if remaining > 0:
+            return None
+
+        # Fold dust legs into the largest one - each leg costs a swap's gas
+        min_leg = amount_in * self.min_leg_bps // BPS_SCALE
+        largest = max(allocation, key=allocation.get)
+        for route_id in list(allocation):
+            if route_id != largest and allocation[route_id] < min_leg:
+                allocation[largest] += allocation.pop(route_id)
+        return allocation
+
+    # ((route, amount_in, amount_out), ...) across 2+ pools, exactly quoted, or
+    # None when the best allocation is a single pool
+    def split(
+        self,
+        routes_by_id: dict,
+        amount_in: int,
+        curves: dict,
+        block_number: int,
+        deadline: float,
+    ) :
+        allocation = self.allocate(amount_in, curves)
+        if allocation is None or len(allocation) < 2:
+            return None
+
+        legs = [(routes_by_id[route_id], leg_in) for route_id, leg_in in allocation.items()]
+        outs = self.quote_many(legs, block_number, deadline)
+        if any(amount_out is None for amount_out in outs):
+            return None
+        return tuple(
+            (route, leg_in, amount_out)
+            for (route, leg_in), amount_out in zip(legs, outs)
+        )
+
+    def close(self) :
+        self.executor.shutdown(wait=False, cancel_futures=True)
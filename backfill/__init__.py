@@ -0,0 +1,5 @@
+from .books import HistoricalBooks
+from .rate_limit import RateLimitedQuoter, RateLimiter
+from .runner import BackfillRunner
+
+__all__ = ["BackfillRunner", "HistoricalBooks", "RateLimitedQuoter", "RateLimiter"]
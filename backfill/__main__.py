@@ -0,0 +1,3 @@
+from backfill.runner import main
+
+main()
@@ -0,0 +1,64 @@
+import json
+
+from config import BOOK_HISTORY_DEPTH
+from models.types import OrderbookLevel
+from models.fixed_point import parse_fixed
+from orderbook.history import BookHistory
+
+
+def parse_levels(raw_levels: list) :
+    return tuple(
+        OrderbookLevel(price=parse_fixed(str(price)), quantity=parse_fixed(str(qty)))
+        for price, qty in raw_levels
+    )
+
+
+# Recorded Binance books, one JSON object per line:
+#   {"stream": "pair" | "gas", "ts": <epoch seconds>, "bids": [[price, qty], ...], "asks": [...]}
+# Prices and quantities are Binance's decimal strings. Each stream is loaded into
+# a BookHistory sized to the whole file, so lookups are the same as-of search
+# the live hedge check uses
+class HistoricalBooks:
+    def __init__(self) :
+        self.streams = {}
+
+    @classmethod
+    def load(cls, path: str, depth: int = BOOK_HISTORY_DEPTH) :
+        rows = {}
+        with open(path, "r", encoding="utf-8") as book_file:
+            for line in book_file:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                bids = record.get("bids", record.get("b"))
+                asks = record.get("asks", record.get("a"))
+                if not bids or not asks:
+                    continue
+                rows.setdefault(record.get("stream", "pair"), []).append(
+                    (float(record["ts"]), bids, asks)
+                )
+
+        books = cls()
+        for stream, stream_rows in rows.items():
+            stream_rows.sort(key=lambda row: row[0])
+            history = BookHistory(capacity=len(stream_rows), depth=depth)
+            for ts, bids, asks in stream_rows:
+                history.append(ts, parse_levels(bids), parse_levels(asks))
+            books.streams[stream] = history
+        return books
+
+    def __len__(self) :
+        return sum(len(history) for history in self.streams.values())
+
+    def span(self, stream: str = "pair") :
+        history = self.streams.get(stream)
+        return history.span() if history is not None else None
+
+    # (bids, asks, ts) of the latest book at or before ts, or None if there is
+    # none within max_age_s
+    def as_of(self, stream: str, ts: float, max_age_s: float = None) :
+        history = self.streams.get(stream)
+        if history is None:
+            return None
+        return history.as_of(ts, max_age_s)
@@ -0,0 +1,91 @@
+import threading
+import time
+
+from config import BACKFILL_RETRIES
+
+
+# Token bucket shared by every worker thread. A caller that finds the bucket
+# empty reserves the next token and sleeps outside the lock, so waiters are
+# served in arrival order at exactly the configured rate
+class RateLimiter:
+    def __init__(self, rate_per_s: float, burst: int = None) :
+        self.rate_per_s = float(rate_per_s)
+        self.capacity = float(burst if burst is not None else max(1, int(rate_per_s)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.waited_s = 0.0
+
+    def acquire(self) :
+        if self.rate_per_s <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_s)
+            self.updated = now
+            self.tokens -= 1
+            self.requests += 1
+            wait_s = -self.tokens / self.rate_per_s if self.tokens < 0 else 0.0
+            self.waited_s += wait_s
+        if wait_s > 0:
+            time.sleep(wait_s)
+
+
+# Worth retrying: the provider throttled us or the connection failed. Reverts
+# and unsupported methods are real answers and go straight to the caller
+def is_transient(error: Exception) :
+    from requests.exceptions import ConnectionError, HTTPError, Timeout
+
+    if isinstance(error, (ConnectionError, Timeout)):
+        return True
+    if isinstance(error, HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status is None or status == 429 or status >= 500
+    message = str(error).lower()
+    return any(
+        marker in message
+        for marker in ("rate limit", "too many requests", "timed out", "timeout", "-32005")
+    )
+
+
+# Quoter proxy: every quote_* call takes a token first and transient RPC
+# failures are retried with exponential backoff
+class RateLimitedQuoter:
+    def __init__(
+        self,
+        quoter,
+        limiter: RateLimiter,
+        retries: int = BACKFILL_RETRIES,
+        backoff_s: float = 0.5,
+    ) :
+        self.quoter = quoter
+        self.limiter = limiter
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.retried = 0
+        self.failed = 0
+
+    def __getattr__(self, name: str) :
+        attr = getattr(self.quoter, name)
+        if not name.startswith("quote") or not callable(attr):
+            return attr
+
+        def limited(*args, **kwargs) :
+            return self.call(attr, *args, **kwargs)
+
+        return limited
+
+    def call(self, fn, *args, **kwargs) :
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                if attempt == self.retries:
+                    self.failed += 1
+                    raise
+                self.retried += 1
+                time.sleep(self.backoff_s * (2 ** attempt))
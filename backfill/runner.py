@@ -0,0 +1,326 @@
+import argparse
+import json
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    ACTIVE_POOL,
+    DEPTH_WEIGHTED_LEVELS,
+    SPLIT_ROUTING,
+    BACKFILL_RPC,
+    BACKFILL_REQUESTS_PER_S,
+    BACKFILL_WORKERS,
+    BACKFILL_MAX_BOOK_AGE_S,
+    BACKFILL_CHECKPOINT_EVERY,
+    CEX_HEDGE_LATENCY_MS,
+)
+from md.binance_ws import depth_weighted_mid
+from orderbook.execution_sim import CEXExecutionSimulator
+from arbitrage.gas_calc import GasCostCalculator
+from arbitrage.evaluator import ArbitrageEvaluator
+from arbitrage.report import BlockReport, compute_quote_price_usd
+from backfill.books import HistoricalBooks
+from backfill.rate_limit import RateLimitedQuoter, RateLimiter
+from sweep.capture import capture_bytes
+
+
+# Evaluates a block range against an archive node with the live evaluator.
+# Blocks run concurrently on worker threads (one evaluator each), all RPC goes
+# through one token bucket, and results are written strictly in block order so
+# progress is a single watermark: rows and watermark are flushed together every
+# checkpoint_every blocks, and a resumed run starts right after the watermark
+class BackfillRunner:
+    def __init__(
+        self,
+        books: HistoricalBooks,
+        from_block: int,
+        to_block: int,
+        output_path: str,
+        progress_path: str,
+        rpc_url: str = BACKFILL_RPC,
+        requests_per_s: float = BACKFILL_REQUESTS_PER_S,
+        workers: int = BACKFILL_WORKERS,
+        max_book_age_s: float = BACKFILL_MAX_BOOK_AGE_S,
+        checkpoint_every: int = BACKFILL_CHECKPOINT_EVERY,
+        gas_price_wei: int = None,
+        log_all: bool = True,
+        split_routing: bool = SPLIT_ROUTING,
+        hedge_latency_ms: float = CEX_HEDGE_LATENCY_MS,
+        capture_path: str = None,
+    ) :
+        from quoter.quoter_v2 import QuoterV2Client
+
+        self.books = books
+        self.from_block = from_block
+        self.to_block = to_block
+        self.output_path = output_path
+        self.progress_path = progress_path
+        self.workers = max(1, workers)
+        self.max_book_age_s = max_book_age_s
+        self.hedge_latency_s = hedge_latency_ms / 1000
+        self.capture_path = capture_path
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.log_all = log_all
+
+        self.limiter = RateLimiter(requests_per_s)
+        self.quoter = RateLimitedQuoter(QuoterV2Client(rpc_url=rpc_url), self.limiter)
+        self.web3 = self.quoter.web3
+        # Historical eth_gasPrice doesn't exist - base fee from the header plus a
+        # priority fee read once, unless a fixed price is given
+        self.gas_price_wei = gas_price_wei
+        self.priority_fee_wei = 0
+        if gas_price_wei is None:
+            try:
+                self.priority_fee_wei = self.quoter.call(lambda: self.web3.eth.max_priority_fee)
+            except Exception:
+                self.priority_fee_wei = 0
+
+        self.evaluators = queue.Queue()
+        for _ in range(self.workers):
+            self.evaluators.put(
+                ArbitrageEvaluator(
+                    self.quoter,
+                    CEXExecutionSimulator(),
+                    GasCostCalculator(),
+                    split_routing=split_routing,
+                )
+            )
+
+        self.stats = {
+            "blocks": 0,
+            "evaluated": 0,
+            "rows": 0,
+            "opportunities": 0,
+            "skipped": {},
+        }
+
+    def load_progress(self) :
+        try:
+            with open(self.progress_path, "r", encoding="utf-8") as progress_file:
+                progress = json.load(progress_file)
+        except (OSError, ValueError):
+            return None
+        if (
+            progress.get("pool") != ACTIVE_POOL
+            or progress.get("from_block") != self.from_block
+            or progress.get("to_block") != self.to_block
+            or progress.get("output") != self.output_path
+        ):
+            print(f"[backfill] ignoring {self.progress_path}: different range or output")
+            return None
+        return progress
+
+    def save_progress(self, next_block: int) :
+        progress = {
+            "pool": ACTIVE_POOL,
+            "from_block": self.from_block,
+            "to_block": self.to_block,
+            "output": self.output_path,
+            "next_block": next_block,
+            "stats": self.stats,
+            "updated_at": time.time(),
+        }
+        tmp_path = f"{self.progress_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as progress_file:
+            json.dump(progress, progress_file)
+            progress_file.flush()
+            os.fsync(progress_file.fileno())
+        os.replace(tmp_path, self.progress_path)
+
+    def gas_price_for(self, header) :
+        if self.gas_price_wei is not None:
+            return self.gas_price_wei
+        return int(header.get("baseFeePerGas") or 0) + self.priority_fee_wei
+
+    # Runs on a worker thread - returns (rows, capture line or None, opportunities, skip_reason)
+    def evaluate(self, block_number: int) :
+        header = self.quoter.call(self.web3.eth.get_block, block_number)
+        block_timestamp = int(header["timestamp"])
+        block_hash = "0x" + bytes(header["hash"]).hex()
+
+        # Prices are read at the block; the hedge fills against the book in
+        # force once it lands, hedge_latency_s later
+        pair_book = self.books.as_of("pair", block_timestamp, self.max_book_age_s)
+        hedge_book = self.books.as_of(
+            "pair", block_timestamp + self.hedge_latency_s, self.max_book_age_s
+        )
+        gas_book = self.books.as_of("gas", block_timestamp, self.max_book_age_s)
+        if pair_book is None or hedge_book is None or gas_book is None:
+            return [], None, 0, "no book"
+        bids, asks, book_ts = hedge_book
+
+        base_price_quote_fx = depth_weighted_mid(pair_book[0], pair_book[1], DEPTH_WEIGHTED_LEVELS)
+        native_price_quote_fx = depth_weighted_mid(gas_book[0], gas_book[1], DEPTH_WEIGHTED_LEVELS)
+        if base_price_quote_fx is None or native_price_quote_fx is None:
+            return [], None, 0, "empty book"
+        quote_price_usd_fx = compute_quote_price_usd(base_price_quote_fx, native_price_quote_fx)
+        if quote_price_usd_fx is None:
+            return [], None, 0, "no usd price"
+
+        gas_price_wei = self.gas_price_for(header)
+        evaluator = self.evaluators.get()
+        try:
+            batch = evaluator.evaluate_block(
+                block_number=block_number,
+                block_hash=block_hash,
+                bids=bids,
+                asks=asks,
+                gas_price_wei=gas_price_wei,
+                base_price_quote_fx=base_price_quote_fx,
+                native_price_quote_fx=native_price_quote_fx,
+                book_timestamp=book_ts,
+            )
+            capture = None
+            if self.capture_path and evaluator.cached_block is not None:
+                capture = capture_bytes(
+                    block_number,
+                    block_timestamp,
+                    gas_price_wei,
+                    pair_book[:2],
+                    gas_book[:2],
+                    evaluator.cached_block,
+                    evaluator.route_index.routes,
+                    hedge_book[:2] if self.hedge_latency_s else None,
+                ) + b"\n"
+        finally:
+            self.evaluators.put(evaluator)
+        if batch is None or len(batch) == 0:
+            return [], None, 0, "no quotes"
+
+        # Rows are stamped with the block's time, not the time of the backfill
+        batch.timestamp = block_timestamp
+        report = BlockReport(batch, base_price_quote_fx, quote_price_usd_fx)
+        rows = []
+        found = 0
+        for i in range(len(report)):
+            if report.is_profitable[i]:
+                found += 1
+            elif not self.log_all:
+                continue
+            rows.append(report.row_bytes(i) + b"\n")
+        return rows, capture, found, None
+
+    def append_synced(self, path: str, lines: list) :
+        if lines:
+            with open(path, "ab") as output_file:
+                output_file.write(b"".join(lines))
+                output_file.flush()
+                os.fsync(output_file.fileno())
+            lines.clear()
+
+    def flush(self, lines: list, captures: list, next_block: int) :
+        self.append_synced(self.output_path, lines)
+        if self.capture_path:
+            self.append_synced(self.capture_path, captures)
+        self.save_progress(next_block)
+
+    def run(self) :
+        progress = self.load_progress()
+        start = self.from_block
+        if progress is not None:
+            start = progress["next_block"]
+            self.stats = progress.get("stats", self.stats)
+            print(f"[backfill] resuming at block {start}")
+        if start > self.to_block:
+            print("[backfill] range already complete")
+            return self.stats
+
+        started = time.perf_counter()
+        window = self.workers * 4
+        pending = {}
+        lines = []
+        captures = []
+        next_submit = start
+        since_flush = 0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backfill") as pool:
+            for block_number in range(start, self.to_block + 1):
+                while next_submit <= self.to_block and len(pending) < window:
+                    pending[next_submit] = pool.submit(self.evaluate, next_submit)
+                    next_submit += 1
+
+                # Oldest first - later blocks keep the workers busy meanwhile
+                try:
+                    rows, capture, found, skip_reason = pending.pop(block_number).result()
+                except Exception as e:
+                    rows, capture, found, skip_reason = [], None, 0, f"error: {type(e).__name__}"
+                    print(f"[backfill] block {block_number} failed: {e}")
+
+                self.stats["blocks"] += 1
+                if skip_reason is None:
+                    self.stats["evaluated"] += 1
+                else:
+                    skipped = self.stats["skipped"]
+                    skipped[skip_reason] = skipped.get(skip_reason, 0) + 1
+                self.stats["rows"] += len(rows)
+                self.stats["opportunities"] += found
+                lines.extend(rows)
+                if capture is not None:
+                    captures.append(capture)
+
+                since_flush += 1
+                if since_flush >= self.checkpoint_every or block_number == self.to_block:
+                    self.flush(lines, captures, block_number + 1)
+                    since_flush = 0
+                    elapsed = time.perf_counter() - started
+                    done = block_number - start + 1
+                    print(
+                        f"[backfill] {block_number}/{self.to_block} "
+                        f"{done / elapsed:.1f} blocks/s "
+                        f"rpc={self.limiter.requests} retried={self.quoter.retried} "
+                        f"opps={self.stats['opportunities']}"
+                    )
+
+        for _ in range(self.workers):
+            evaluator = self.evaluators.get()
+            if evaluator.splitter is not None:
+                evaluator.splitter.close()
+        return self.stats
+
+
+def main() :
+    parser = argparse.ArgumentParser(description="Evaluate a historical block range with recorded Binance books")
+    parser.add_argument("--from-block", type=int, required=True)
+    parser.add_argument("--to-block", type=int, required=True)
+    parser.add_argument("--books", required=True, help="JSONL of recorded pair/gas books")
+    parser.add_argument("--rpc", default=BACKFILL_RPC, help="archive RPC (or a local stand-in)")
+    parser.add_argument("--output", default=f"arb_backfill_{ACTIVE_POOL}.log", help="opportunity log (live format)")
+    parser.add_argument("--progress", default=None, help="resume file (default <output>.progress.json)")
+    parser.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+    parser.add_argument("--rate", type=float, default=BACKFILL_REQUESTS_PER_S, help="RPC requests per second")
+    parser.add_argument("--max-book-age", type=float, default=BACKFILL_MAX_BOOK_AGE_S, help="seconds a book may precede its block")
+    parser.add_argument("--checkpoint-every", type=int, default=BACKFILL_CHECKPOINT_EVERY)
+    parser.add_argument("--hedge-latency-ms", type=float, default=CEX_HEDGE_LATENCY_MS, help="fill the CEX leg this long after the block")
+    parser.add_argument("--gas-price-gwei", type=float, default=None, help="fixed gas price instead of header base fee + priority fee")
+    parser.add_argument("--profitable-only", action="store_true", help="log profitable rows only")
+    parser.add_argument("--no-split", action="store_true", help="disable split routing")
+    parser.add_argument("--capture", default=None, help="also write sweep captures here (python -m sweep)")
+    args = parser.parse_args()
+
+    books = HistoricalBooks.load(args.books)
+    print(f"[backfill] {len(books)} books loaded, pair span {books.span('pair')}")
+    runner = BackfillRunner(
+        books,
+        args.from_block,
+        args.to_block,
+        args.output,
+        args.progress or f"{args.output}.progress.json",
+        rpc_url=args.rpc,
+        requests_per_s=args.rate,
+        workers=args.workers,
+        max_book_age_s=args.max_book_age,
+        checkpoint_every=args.checkpoint_every,
+        gas_price_wei=int(args.gas_price_gwei * 1e9) if args.gas_price_gwei is not None else None,
+        log_all=not args.profitable_only,
+        split_routing=SPLIT_ROUTING and not args.no_split,
+        hedge_latency_ms=args.hedge_latency_ms,
+        capture_path=args.capture,
+    )
+    stats = runner.run()
+    for key, value in stats.items():
+        print(f"[backfill] {key:<14} {value}")
+
+
+if __name__ == "__main__":
+    main()
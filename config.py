@@ -18,7 +18,9 @@ DEFAULT_GAS_LIMIT = 150000
 DEPTH_WEIGHTED_LEVELS = 5
 
 # For building call data - wallet you're trading from
-UNIVERSAL_ROUTER_RECIPIENT = "0x0000000000000000000000000000000000000000"
+UNIVERSAL_ROUTER_RECIPIENT = os.getenv(
+    "UNIVERSAL_ROUTER_RECIPIENT", "0x0000000000000000000000000000000000000000"
+)
 
 # Choose logging all simulations, or just profitable ones
 LOG_ALL_EVALUATIONS = True
@@ -41,10 +43,11 @@ LOG_ALL_EVALUATIONS = True
 
 #LINEA_RPC= "https://rpc.linea.build"
 #LINEA_RPC = "https://1rpc.io/linea"
-LINEA_RPC = "https://linea-rpc.publicnode.com"
-LINEA_WSS = "wss://linea-rpc.publicnode.com"
+# Endpoints can be overridden from env, e.g. to point at the loadtest fakes
+LINEA_RPC = os.getenv("LINEA_RPC", "https://linea-rpc.publicnode.com")
+LINEA_WSS = os.getenv("LINEA_WSS", "wss://linea-rpc.publicnode.com")
 
-BINANCE_WS_GAS = "wss://stream.binance.com:9443/ws/ethusdc@depth10@100ms"
+BINANCE_WS_GAS = os.getenv("BINANCE_WS_GAS", "wss://stream.binance.com:9443/ws/ethusdc@depth10@100ms")
 
 # Contract addresses
 QUOTER_V2_ADDRESS = "0xE660C95E17884b6C81B01445EFC24556f8ABa037"
@@ -61,6 +64,7 @@ POOLS = {
         "quote_decimals": 6,
         "tick_spacing": 50,
         "binance_ws_pair": "wss://stream.binance.com:9443/ws/ethusdc@depth10@100ms",
+        "cex_pair": ("ETH", "USDC"),
         "trade_sizes_base": [
             Decimal("0.15"),
             Decimal("0.4"),
@@ -84,6 +88,7 @@ POOLS = {
         "quote_decimals": 6,
         "tick_spacing": 50,
         "binance_ws_pair": "wss://stream.binance.com:9443/ws/ethusdt@depth10@100ms",
+        "cex_pair": ("ETH", "USDT"),
         "trade_sizes_base": [
             Decimal("0.15"),
             Decimal("0.4"),
@@ -107,6 +112,7 @@ POOLS = {
         "quote_decimals": 8,
         "tick_spacing": 10,
         "binance_ws_pair": "wss://stream.binance.com:9443/ws/ethbtc@depth10@100ms",
+        "cex_pair": ("ETH", "BTC"),
         "trade_sizes_base": [
             Decimal("0.15"),
             Decimal("0.4"),
@@ -130,6 +136,7 @@ POOLS = {
         "quote_decimals": 6,
         "tick_spacing": 1,
         "binance_ws_pair": "wss://stream.binance.com:9443/ws/lineausdc@depth10@100ms",
+        "cex_pair": ("LINEA", "USDC"),
         "trade_sizes_base": [
             Decimal("15000"),
             Decimal("50000"),
@@ -154,6 +161,7 @@ POOLS = {
         "quote_decimals": 6,
         "tick_spacing": 10,
         "binance_ws_pair": "wss://stream.binance.com:9443/ws/lineausdc@depth10@100ms",
+        "cex_pair": ("LINEA", "USDC"),
         "trade_sizes_base": [
             Decimal("1000"),
             Decimal("3000"),
@@ -181,7 +189,25 @@ POOL_BASE_DECIMALS = POOLS[ACTIVE_POOL]["base_decimals"]
 POOL_QUOTE_DECIMALS = POOLS[ACTIVE_POOL]["quote_decimals"]
 POOL_TICK_SPACING = POOLS[ACTIVE_POOL]["tick_spacing"]
 
-BINANCE_WS_PAIR = POOLS[ACTIVE_POOL]["binance_ws_pair"]
+BINANCE_WS_PAIR = os.getenv("BINANCE_WS_PAIR", POOLS[ACTIVE_POOL]["binance_ws_pair"])
+# (base, quote) as the exchanges list the pair
+CEX_PAIR = POOLS[ACTIVE_POOL]["cex_pair"]
+
+# More CEX venues to hedge on, next to Binance - comma-separated from okx, bybit.
+# Their books are merged into one consolidated pair book, best net-of-fee price
+# first, and each level fills at its own venue's taker fee. Empty = Binance only
+CEX_VENUES = [venue for venue in os.getenv("CEX_VENUES", "").split(",") if venue]
+CEX_VENUE_FEES_BPS = {
+    "binance": BINANCE_TAKER_FEE_BPS,
+    "okx": Decimal(os.getenv("OKX_TAKER_FEE_BPS", "10")),
+    "bybit": Decimal(os.getenv("BYBIT_TAKER_FEE_BPS", "10")),
+}
+CEX_VENUE_URLS = {
+    "okx": os.getenv("OKX_WS_URL", "wss://ws.okx.com:8443/ws/v5/public"),
+    "bybit": os.getenv("BYBIT_WS_URL", "wss://stream.bybit.com/v5/public/spot"),
+}
+# Levels per side kept in the consolidated book
+CEX_CONSOLIDATED_DEPTH = 20
 
 # Gas pricing
 NATIVE_SYMBOL = "ETH"
@@ -206,7 +232,177 @@ BEST_TRADE_LOG_PATH = os.getenv(
     "BEST_TRADE_LOG_PATH", f"arb_best_trade_{ACTIVE_POOL}.log"
 )
 
+# Sub-block evaluation - re-run the CEX leg on every Binance book update
+# against the DEX quotes cached for the current block
+SUB_BLOCK_EVAL = os.getenv("SUB_BLOCK_EVAL", "1") == "1"
+# Min gap between sub-block evaluations per pool (0 = every book update)
+SUB_BLOCK_MIN_INTERVAL_MS = int(os.getenv("SUB_BLOCK_MIN_INTERVAL_MS", "0"))
+# Sub-block evals run ~10x per block, so only profitable ones are logged by default
+SUB_BLOCK_LOG_ALL = False
+
+# No-arbitrage price band - skip quoting while the Binance book sits inside
+# the band built from the pool marginal price, fees and per-block gas
+PRICE_BAND_ENABLED = os.getenv("PRICE_BAND_ENABLED", "1") == "1"
+# Widens the band outward to cover rounding/USD conversion differences
+PRICE_BAND_MARGIN_BPS = Decimal("1")
+# Per direction, the same bounds decide whether a block quotes DEX buys, DEX
+# sells or neither - at most one side of the band can be crossed. Needs the
+# slot0 read even with the band off; each pruned direction is logged
+DIRECTION_PRUNING = os.getenv("DIRECTION_PRUNING", "1") == "1"
+
+# Verified on-chain pool metadata (tickSpacing, decimals, fee), keyed by pool
+# address - lets restarts skip the startup checks. Empty string disables
+POOL_METADATA_CACHE_PATH = os.getenv("POOL_METADATA_CACHE_PATH", ".pool_metadata_cache.json")
+
+# Route search across all configured pools - candidates between the active
+# pool's tokens are precomputed at startup and each size is quoted on every one
+ROUTE_MAX_HOPS = int(os.getenv("ROUTE_MAX_HOPS", "3"))
+# Cap per direction - every candidate costs one quoter call per size per block
+ROUTE_MAX_CANDIDATES = int(os.getenv("ROUTE_MAX_CANDIDATES", "3"))
+# Gas limit added per hop beyond the first
+ROUTE_EXTRA_HOP_GAS_LIMIT = 80000
+
+# Split routing - spread one trade across parallel pools for the same pair
+# (e.g. linea_usdc + linea_usdc_low_tvl) by equalizing marginal prices
+SPLIT_ROUTING = os.getenv("SPLIT_ROUTING", "1") == "1"
+# Quote-curve samples per pool per direction per block
+SPLIT_CURVE_POINTS = 6
+# Legs smaller than this share of the trade are folded into the largest leg
+SPLIT_MIN_LEG_BPS = 500
+# Curve sampling + leg re-quotes must finish within this or the block falls back to single routes
+SPLIT_BUDGET_MS = int(os.getenv("SPLIT_BUDGET_MS", "500"))
+SPLIT_QUOTE_WORKERS = 8
+
+# Reorg handling - recent blocks kept by hash so a header whose parent doesn't
+# match can invalidate what was derived from the orphaned blocks
+BLOCK_RING_SIZE = 64
+REORG_LOG_PATH = os.getenv("REORG_LOG_PATH", f"arb_reorgs_{ACTIVE_POOL}.log")
+# Pin quoter calls to the block hash (EIP-1898) rather than the number, so a
+# reorg between header and quote can't mix state from two forks
+QUOTE_PIN_BY_HASH = os.getenv("QUOTE_PIN_BY_HASH", "1") == "1"
+
+# Profiling - wall-clock stack sampling of the main thread, started by env or
+# toggled with SIGUSR1, and cProfile captures of blocks whose eval ran longer
+# than PROFILE_SLOW_BLOCK_MS (0 disables)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLING = os.getenv("PROFILE_SAMPLING", "0") == "1"
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_DUMP_INTERVAL_S = float(os.getenv("PROFILE_DUMP_INTERVAL_S", "60"))
+PROFILE_SLOW_BLOCK_MS = float(os.getenv("PROFILE_SLOW_BLOCK_MS", "0"))
+# Per capture kind; oldest files are deleted first
+PROFILE_MAX_FILES = 50
+# Allocation tracking (tracemalloc) - every N blocks (0 disables), report the
+# call sites that allocated during that block's eval and what was retained since
+# the previous report. Tracing slows everything down while on
+PROFILE_ALLOC_EVERY_BLOCKS = int(os.getenv("PROFILE_ALLOC_EVERY_BLOCKS", "0"))
+PROFILE_ALLOC_TOP = 10
+# Stack depth per allocation - 1 groups by line, more tells callers apart
+PROFILE_ALLOC_FRAMES = int(os.getenv("PROFILE_ALLOC_FRAMES", "1"))
+
+# Garbage collection in the block loop. Startup objects are frozen out of the
+# collector; with GC_DEFER the automatic collector is off and the generations
+# it would have collected are collected in the gap after each block, or after
+# GC_MAX_DEFER_S without a block. Pauses at least GC_PAUSE_LOG_MS long are logged
+GC_FREEZE = os.getenv("GC_FREEZE", "1") == "1"
+GC_DEFER = os.getenv("GC_DEFER", "1") == "1"
+GC_MAX_DEFER_S = 1.0
+GC_PAUSE_LOG_MS = float(os.getenv("GC_PAUSE_LOG_MS", "5"))
+
+# RPC budget - requests are metered per provider (the HTTP quote endpoint and
+# the WSS connection). With a limit set (0 = none), each block quotes only the
+# (direction, size) pairs its allowance covers, highest priority first, and the
+# gas price falls back to the last known value rather than overspending
+RPC_BUDGET_DAILY_CALLS = int(os.getenv("RPC_BUDGET_DAILY_CALLS", "0"))
+RPC_BUDGET_PER_SECOND = float(os.getenv("RPC_BUDGET_PER_SECOND", "0"))
+WSS_BUDGET_DAILY_CALLS = int(os.getenv("WSS_BUDGET_DAILY_CALLS", "0"))
+# Linea block time, used to spread a daily budget over the blocks left in the day
+BLOCK_TIME_S = 2.0
+# Profitable-hit memory per (direction, size), as a half-life in blocks
+QUOTE_PLAN_HIT_HALFLIFE_BLOCKS = 200
+# Priority added per bp the CEX mid moved in a direction's favour since the last block
+QUOTE_PLAN_MOVE_WEIGHT = 0.02
+# Priority added per bp the CEX mid sits beyond the DEX mid in a direction's favour
+# (taken off when it sits against it)
+QUOTE_PLAN_SPREAD_WEIGHT = 0.05
+
+# Evaluation deadline - a block's DEX quotes must be in this long after its header
+# timestamp (0 = no deadline). Pairs are quoted best-first; when the deadline
+# passes or a newer header arrives, quoting stops and the block is evaluated on
+# what came back
+EVAL_BUDGET_MS = float(os.getenv("EVAL_BUDGET_MS", "2000"))
+
+# Book history - recent pair books kept for as-of lookups (~10 min at 100ms)
+BOOK_HISTORY_SIZE = 6000
+# Levels kept per side
+BOOK_HISTORY_DEPTH = 20
+# Decision-to-hedge delay - hedges are filled against the book this long after the decision
+CEX_HEDGE_LATENCY_MS = float(os.getenv("CEX_HEDGE_LATENCY_MS", "150"))
+
+# Book freshness - a pair or gas book older than this when a block is evaluated
+# is stale (0 = no check). Age is from local receipt, or from the exchange event
+# time when the venue stamps it and the clock offset is estimated. "skip" leaves
+# the block unquoted, "flag" evaluates it anyway and only logs it
+BOOK_MAX_AGE_MS = float(os.getenv("BOOK_MAX_AGE_MS", "1000"))
+BOOK_STALE_ACTION = os.getenv("BOOK_STALE_ACTION", "skip")
+# Samples in the exchange clock offset window (~1 min at 100ms)
+BOOK_SKEW_WINDOW = 600
+
+# Historical backfill (python -m backfill) - needs an archive node for old blocks
+BACKFILL_RPC = os.getenv("BACKFILL_RPC", LINEA_RPC)
+BACKFILL_REQUESTS_PER_S = float(os.getenv("BACKFILL_REQUESTS_PER_S", "20"))
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))
+# A recorded book older than this at the block's timestamp leaves the block unevaluated
+BACKFILL_MAX_BOOK_AGE_S = 5.0
+# Rows and the resume watermark are flushed together every N blocks
+BACKFILL_CHECKPOINT_EVERY = 50
+BACKFILL_RETRIES = 5
+
+# Parameter sweep (python -m sweep) - append each fully evaluated block's books
+# and DEX quotes here to re-price them offline. Band-skipped blocks aren't
+# captured. Empty disables capture
+SWEEP_CAPTURE_PATH = os.getenv("SWEEP_CAPTURE_PATH", "")
+
+# Execution - sign the best trade of each block and broadcast it. Off by default:
+# without it the bot only logs calldata. The key must hold the input token and
+# approvals; UNIVERSAL_ROUTER_RECIPIENT must be set to receive the output
+EXECUTION_ENABLED = os.getenv("EXECUTION_ENABLED", "0") == "1"
+EXECUTION_PRIVATE_KEY = os.getenv("EXECUTION_PRIVATE_KEY", "")
+# Comma-separated WSS endpoints - each held open, every tx sent to all at once
+EXECUTION_ENDPOINTS = [
+    url for url in os.getenv("EXECUTION_ENDPOINTS", LINEA_WSS).split(",") if url
+]
+EXECUTION_BROADCAST_TIMEOUT_S = 2.0
+# maxFeePerGas as a multiple of the block's gas price
+EXECUTION_MAX_FEE_MULTIPLIER = 2
+# Sends per block - sub-block ticks would otherwise resend the same trade
+EXECUTION_MAX_PER_BLOCK = 1
+EXECUTION_LOG_PATH = os.getenv("EXECUTION_LOG_PATH", f"arb_executions_{ACTIVE_POOL}.log")
+
+# Warm-state checkpoint - books, gas, slot0 and the latest block's DEX quotes are
+# saved periodically and restored on startup if still fresh. Empty path disables
+WARM_STATE_PATH = os.getenv("WARM_STATE_PATH", ".warm_state.json")
+WARM_STATE_INTERVAL_S = float(os.getenv("WARM_STATE_INTERVAL_S", "5"))
+# Checkpoints older than this are ignored entirely
+WARM_STATE_MAX_AGE_S = 300
+# Restored books are replaced by the live stream within ~100ms, so only keep very recent ones
+WARM_STATE_BOOK_MAX_AGE_S = 2.0
+# DEX quotes and slot0 are per block - accept the head block or the one before it
+WARM_STATE_QUOTE_MAX_AGE_BLOCKS = 1
+# Last known gas price is reused (restored or when eth_gasPrice fails) up to this many blocks
+GAS_PRICE_MAX_AGE_BLOCKS = 30
+
+# Binance feed - "inline" parses depth messages on the main event loop, "thread"
+# runs websocket I/O and parsing on a dedicated thread (on uvloop if installed)
+# and hands each book over as one reference swap
+BINANCE_FEED_MODE = os.getenv("BINANCE_FEED_MODE", "inline")
+BINANCE_FEED_UVLOOP = os.getenv("BINANCE_FEED_UVLOOP", "1") == "1"
+# Main-loop lag probe period
+LOOP_LAG_INTERVAL_MS = 20
+
 # WebSocket config
 WS_PING_INTERVAL = 20
 WS_PING_TIMEOUT = 20
 WS_RECONNECT_DELAY = 2  # seconds
+# Frames buffered by the websocket library before it stops reading the socket.
+# Whole-book feeds are conflated by the stream itself, so this only absorbs bursts
+WS_MAX_QUEUE = 64
@@ -0,0 +1,6 @@
+from .nonce import NonceManager
+from .signer import TxSigner
+from .broadcast import Broadcaster
+from .executor import TradeExecutor
+
+__all__ = ["NonceManager", "TxSigner", "Broadcaster", "TradeExecutor"]
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+from config import EXECUTION_ENDPOINTS, EXECUTION_BROADCAST_TIMEOUT_S
+from md.linea_rpc import LineaRpcClient
+
+# Node replies that mean the tx is in that node's pool already
+ALREADY_KNOWN_MARKERS = ("already known", "known transaction", "already imported")
+NONCE_TOO_LOW_MARKERS = ("nonce too low", "nonce is too low", "replacement transaction underpriced")
+
+
+# How one endpoint answered a broadcast
+class SendResult:
+    __slots__ = ("url", "tx_hash", "error", "elapsed_s", "timed_out")
+
+    def __init__(self, url: str, tx_hash: str, error: str, elapsed_s: float, timed_out: bool = False) :
+        self.url = url
+        self.tx_hash = tx_hash
+        self.error = error
+        self.elapsed_s = elapsed_s
+        self.timed_out = timed_out
+
+    @property
+    def accepted(self) :
+        if self.tx_hash is not None:
+            return True
+        return self.error is not None and any(m in self.error.lower() for m in ALREADY_KNOWN_MARKERS)
+
+    @property
+    def nonce_too_low(self) :
+        return self.error is not None and any(m in self.error.lower() for m in NONCE_TOO_LOW_MARKERS)
+
+
+# One persistent websocket per endpoint, opened at startup so a send is a single
+# frame on a warm connection. A signed tx goes to every endpoint at once; the
+# first acceptance is what counts, the rest are redundancy. Dropped connections
+# are reopened in the background and skipped until they are back
+class Broadcaster:
+    def __init__(self, urls: list = EXECUTION_ENDPOINTS, timeout_s: float = EXECUTION_BROADCAST_TIMEOUT_S) :
+        self.clients = [LineaRpcClient(url) for url in urls]
+        self.timeout_s = timeout_s
+        self.reconnecting = set()
+
+    async def connect(self) :
+        results = await asyncio.gather(
+            *(client.connect() for client in self.clients),
+            return_exceptions=True,
+        )
+        for client, result in zip(self.clients, results):
+            if isinstance(result, Exception):
+                print(f"[exec] broadcast endpoint {client.url} unavailable: {result}")
+        return sum(1 for client in self.clients if client.connected)
+
+    async def close(self) :
+        for client in self.clients:
+            if client.ws is not None:
+                await client.close()
+
+    # Any live connection, for the few reads execution needs
+    def primary(self) :
+        return next((client for client in self.clients if client.connected), None)
+
+    async def reconnect(self, client: LineaRpcClient) :
+        try:
+            await client.connect()
+        except Exception as e:
+            print(f"[exec] reconnect to {client.url} failed: {e}")
+        finally:
+            self.reconnecting.discard(client)
+
+    async def send(self, client: LineaRpcClient, raw_tx: str, started: float) :
+        try:
+            response = await asyncio.wait_for(
+                client.request("eth_sendRawTransaction", [raw_tx]),
+                timeout=self.timeout_s,
+            )
+            return SendResult(client.url, response.get("result"), None, time.perf_counter() - started)
+        except asyncio.TimeoutError:
+            return SendResult(client.url, None, "timeout", time.perf_counter() - started, timed_out=True)
+        except Exception as e:
+            return SendResult(client.url, None, str(e), time.perf_counter() - started)
+
+    async def broadcast(self, raw_tx: str) :
+        started = time.perf_counter()
+        live = []
+        for client in self.clients:
+            if client.connected:
+                live.append(client)
+            elif client not in self.reconnecting:
+                self.reconnecting.add(client)
+                asyncio.create_task(self.reconnect(client))
+        return await asyncio.gather(*(self.send(client, raw_tx, started) for client in live))
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import time
+
+from config import (
+    EXECUTION_PRIVATE_KEY,
+    EXECUTION_LOG_PATH,
+    EXECUTION_MAX_PER_BLOCK,
+    UNIVERSAL_ROUTER_RECIPIENT,
+)
+from models.types import ArbitrageOpportunity
+from arbitrage.gas_calc import GasCostCalculator
+from execution.broadcast import Broadcaster
+from execution.nonce import NonceManager
+from execution.signer import TxSigner
+
+ZERO_ADDRESS = "0x" + "00" * 20
+
+
+# Signs and broadcasts the best trade of a block. Everything a send needs - key,
+# chain id, nonce, fees, connections - is ready before the opportunity is, so
+# the path from decision to the first node's acceptance is: take a nonce, sign,
+# one websocket frame per endpoint. Each send is logged with its latencies
+class TradeExecutor:
+    def __init__(
+        self,
+        broadcaster: Broadcaster,
+        gas_calc: GasCostCalculator,
+        private_key: str = EXECUTION_PRIVATE_KEY,
+        log_path: str = EXECUTION_LOG_PATH,
+        max_per_block: int = EXECUTION_MAX_PER_BLOCK,
+    ) :
+        self.broadcaster = broadcaster
+        self.gas_calc = gas_calc
+        self.private_key = private_key
+        self.log_path = log_path
+        self.max_per_block = max_per_block
+        self.signer = None
+        self.nonces = NonceManager()
+        self.sent_by_block = {}
+        self.stats = {"sent": 0, "accepted": 0, "rejected": 0, "skipped": 0, "resyncs": 0}
+
+    # Connects the endpoints, loads the key and pre-fetches chain id, nonce and
+    # priority fee. Returns an error string, or None when ready to send
+    async def start(self) :
+        if not self.private_key:
+            return "EXECUTION_PRIVATE_KEY not set"
+        # Output would be sent to the zero address
+        if UNIVERSAL_ROUTER_RECIPIENT.lower() == ZERO_ADDRESS:
+            return "UNIVERSAL_ROUTER_RECIPIENT is the zero address"
+        if not await self.broadcaster.connect():
+            return "no broadcast endpoint reachable"
+        client = self.broadcaster.primary()
+        try:
+            chain_id, priority_fee = await asyncio.gather(
+                client.request("eth_chainId", []),
+                client.request("eth_maxPriorityFeePerGas", []),
+            )
+            self.signer = TxSigner(
+                self.private_key,
+                int(chain_id["result"], 16),
+                int(priority_fee["result"], 16),
+            )
+        except Exception as e:
+            return f"chain parameters unavailable: {e}"
+        if not await self.resync():
+            return "nonce unavailable"
+        # First signature pays eth_account's lazy imports - not the first trade
+        self.signer.update_gas_price(0)
+        self.signer.sign({"to": ZERO_ADDRESS, "data": "0x"}, 0, 21000)
+        self.signer.update_gas_price(None)
+        print(
+            f"[exec] ready: {self.signer.address} chain={self.signer.chain_id} "
+            f"nonce={self.nonces.next_nonce} endpoints={len(self.broadcaster.clients)}"
+        )
+        return None
+
+    async def close(self) :
+        await self.broadcaster.close()
+
+    async def resync(self) :
+        client = self.broadcaster.primary()
+        if client is None or self.signer is None:
+            return False
+        try:
+            response = await client.request("eth_getTransactionCount", [self.signer.address, "pending"])
+        except Exception as e:
+            print(f"[exec] nonce resync failed: {e}")
+            return False
+        self.nonces.sync(int(response["result"], 16))
+        self.stats["resyncs"] += 1
+        return True
+
+    def update_gas_price(self, gas_price_wei: int) :
+        if self.signer is not None:
+            self.signer.update_gas_price(gas_price_wei)
+
+    # Called synchronously at decision time - the per-block cap is checked and
+    # counted before any await, so sub-block ticks can't race past it
+    def submit(self, opp: ArbitrageOpportunity, tx_payload: dict, decided_at: float = None) :
+        if self.signer is None:
+            return None
+        sent = self.sent_by_block.get(opp.block_number, 0)
+        if sent >= self.max_per_block:
+            self.stats["skipped"] += 1
+            return None
+        self.sent_by_block = {opp.block_number: sent + 1}
+        return asyncio.create_task(
+            self.execute(opp, tx_payload, decided_at or time.perf_counter()),
+            name="execute",
+        )
+
+    async def execute(self, opp: ArbitrageOpportunity, tx_payload: dict, decided_at: float) :
+        hops = len(opp.split) if opp.split is not None else (opp.route.hops if opp.route is not None else 1)
+        gas_limit = self.gas_calc.gas_limit_for_hops(hops)
+        nonce = self.nonces.reserve()
+        try:
+            raw_tx, tx_hash = self.signer.sign(tx_payload, nonce, gas_limit)
+        except Exception as e:
+            self.nonces.release(nonce)
+            print(f"[exec] signing failed: {e}")
+            return None
+        signed_at = time.perf_counter()
+        results = await self.broadcaster.broadcast(raw_tx)
+        self.stats["sent"] += 1
+
+        accepted = [result for result in results if result.accepted]
+        if accepted:
+            self.stats["accepted"] += 1
+            self.nonces.settle(nonce)
+        else:
+            self.stats["rejected"] += 1
+            if any(result.nonce_too_low or result.timed_out for result in results):
+                # Our view of the nonce is off, or a node may have it after all
+                self.nonces.settle(nonce)
+                await self.resync()
+            else:
+                # Every endpoint refused it, or none was connected - the nonce is unused
+                self.nonces.release(nonce)
+
+        first_ack_s = min((result.elapsed_s for result in accepted), default=None)
+        record = {
+            "block": opp.block_number,
+            "tx_hash": tx_hash,
+            "nonce": nonce,
+            "accepted": bool(accepted),
+            # Includes the wait for this task to be scheduled after the decision
+            "decision_to_signed_ms": round((signed_at - decided_at) * 1000, 3),
+            "decision_to_ack_ms": (
+                round((signed_at - decided_at + first_ack_s) * 1000, 3)
+                if first_ack_s is not None
+                else None
+            ),
+            "endpoints": [
+                {
+                    "url": result.url,
+                    "ms": round(result.elapsed_s * 1000, 3),
+                    "error": result.error,
+                }
+                for result in results
+            ],
+        }
+        with open(self.log_path, "a", encoding="utf-8") as log_file:
+            log_file.write(json.dumps(record) + "\n")
+        ack_str = f"{record['decision_to_ack_ms']:.1f}ms" if accepted else "none"
+        print(
+            f"[exec] block={opp.block_number} nonce={nonce} tx={tx_hash} "
+            f"signed={record['decision_to_signed_ms']:.1f}ms ack={ack_str} "
+            f"endpoints={len(accepted)}/{len(results)}"
+        )
+        return record
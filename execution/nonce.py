@@ -0,0 +1,60 @@
+import heapq
+import threading
+
+
+# Local next-nonce for the trading account, so sending never waits on
+# eth_getTransactionCount. reserve() hands out nonces under a lock - two
+# opportunities in flight at once can't share one. A nonce whose tx provably
+# reached no node is released and handed out again before any new one, so
+# later txs aren't left stuck behind a gap. Anything ambiguous (timeouts,
+# "nonce too low") is settled by re-reading the pending count from the node.
+# A re-read while other nonces are still reserved can't move next_nonce below
+# them - the node hasn't seen those txs yet, so its count is behind
+class NonceManager:
+    def __init__(self) :
+        self.next_nonce = None
+        # Released nonces below next_nonce, lowest first
+        self.released = []
+        # Handed out and not yet settled or released
+        self.reserved = set()
+        self.lock = threading.Lock()
+
+    @property
+    def synced(self) :
+        return self.next_nonce is not None
+
+    # Node's pending transaction count - the next nonce it will accept
+    def sync(self, pending_count: int) :
+        with self.lock:
+            if not self.reserved or self.next_nonce is None:
+                self.next_nonce = pending_count
+                self.released = []
+                return
+            self.next_nonce = max(pending_count, self.next_nonce)
+            # Anything under the node's count was used after all
+            self.released = [nonce for nonce in self.released if nonce >= pending_count]
+            heapq.heapify(self.released)
+
+    def reserve(self) :
+        with self.lock:
+            if self.next_nonce is None:
+                raise RuntimeError("nonce manager not synced")
+            if self.released:
+                nonce = heapq.heappop(self.released)
+            else:
+                nonce = self.next_nonce
+                self.next_nonce += 1
+            self.reserved.add(nonce)
+            return nonce
+
+    # The tx reached a node, or may have - the nonce is spent either way
+    def settle(self, nonce: int) :
+        with self.lock:
+            self.reserved.discard(nonce)
+
+    # Only for a tx no endpoint accepted
+    def release(self, nonce: int) :
+        with self.lock:
+            self.reserved.discard(nonce)
+            if self.next_nonce is not None and nonce < self.next_nonce and nonce not in self.released:
+                heapq.heappush(self.released, nonce)
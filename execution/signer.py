@@ -0,0 +1,53 @@
+from config import EXECUTION_MAX_FEE_MULTIPLIER
+
+
+# EIP-1559 signing with the key loaded once at startup. Chain id and the priority
+# fee are fetched before the first trade and the gas price is refreshed every
+# block, so building a tx is local work only. eth_account signs in pure Python
+# (~6ms) unless coincurve is installed, in which case it is used automatically
+class TxSigner:
+    def __init__(
+        self,
+        private_key: str,
+        chain_id: int,
+        priority_fee_wei: int = 0,
+        max_fee_multiplier: int = EXECUTION_MAX_FEE_MULTIPLIER,
+    ) :
+        # eth_account comes with web3, already imported by the quoter
+        from eth_account import Account
+
+        self.account = Account.from_key(private_key)
+        self.address = self.account.address
+        self.chain_id = chain_id
+        self.priority_fee_wei = priority_fee_wei
+        self.max_fee_multiplier = max_fee_multiplier
+        self.gas_price_wei = None
+
+    def update_gas_price(self, gas_price_wei: int) :
+        self.gas_price_wei = gas_price_wei
+
+    # Headroom over the block's gas price so the tx survives a fee bump next block
+    def fees(self) :
+        priority_fee = self.priority_fee_wei
+        max_fee = max(self.gas_price_wei * self.max_fee_multiplier, priority_fee)
+        return max_fee, priority_fee
+
+    # (raw tx hex, tx hash hex) for the router call in tx_payload
+    def sign(self, tx_payload: dict, nonce: int, gas_limit: int) :
+        if self.gas_price_wei is None:
+            raise RuntimeError("no gas price yet")
+        max_fee, priority_fee = self.fees()
+        signed = self.account.sign_transaction({
+            "type": 2,
+            "chainId": self.chain_id,
+            "nonce": nonce,
+            "to": tx_payload["to"],
+            "value": int(tx_payload.get("value", 0)),
+            "data": tx_payload["data"],
+            "gas": gas_limit,
+            "maxFeePerGas": max_fee,
+            "maxPriorityFeePerGas": priority_fee,
+        })
+        # eth_account renamed rawTransaction in 0.13
+        raw = getattr(signed, "raw_transaction", None) or signed.rawTransaction
+        return "0x" + bytes(raw).hex(), "0x" + bytes(signed.hash).hex()
@@ -0,0 +1,11 @@
+from .fake_binance import FakeBinanceServer
+from .fake_linea import FakeChain, FakeLineaNode
+from .market import FakePool, ReferencePrice
+
+__all__ = [
+    "FakeBinanceServer",
+    "FakeChain",
+    "FakeLineaNode",
+    "FakePool",
+    "ReferencePrice",
+]
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import random
+import time
+
+import websockets
+
+from loadtest.market import (
+    ReferencePrice,
+    bybit_orderbook_message,
+    okx_books_message,
+    synth_depth_message,
+)
+
+# Paths served in another venue's message format instead of Binance's
+VENUE_FORMATS = {
+    "/okx": okx_books_message,
+    "/bybit": bybit_orderbook_message,
+}
+
+
+def request_path(ws) :
+    # websockets >= 13 exposes ws.request, the legacy server ws.path
+    request = getattr(ws, "request", None)
+    if request is not None:
+        return request.path
+    return getattr(ws, "path", "/")
+
+
+# Local stand-in for Binance depth10 streams. Each path ("/pair", "/gas") is
+# one stream of (reference price, base qty per level); every tick builds one
+# message per stream and fans it out. "/okx" and "/bybit" stand in for those
+# venues' depth feeds (client subscriptions are ignored).
+# A replay file (JSONL of raw Binance messages) replaces the synthetic pair book
+class FakeBinanceServer:
+    def __init__(
+        self,
+        streams: dict,
+        host: str = "127.0.0.1",
+        port: int = 9101,
+        interval_ms: float = 100.0,
+        replay_path: str = None,
+        seed: int = None,
+    ) :
+        self.streams = streams
+        self.host = host
+        self.port = port
+        self.interval_s = interval_ms / 1000
+        self.rng = random.Random(seed)
+        self.clients = {path: set() for path in streams}
+        self.replay = self.load_replay(replay_path) if replay_path else None
+        self.update_id = 0
+        self.messages_sent = 0
+        self.server = None
+        self.tick_task = None
+
+    @staticmethod
+    def load_replay(path: str) :
+        with open(path, "r", encoding="utf-8") as replay_file:
+            return [line.strip() for line in replay_file if line.strip()]
+
+    def url(self, path: str) :
+        return f"ws://{self.host}:{self.port}{path}"
+
+    async def start(self) :
+        self.server = await websockets.serve(self.handler, self.host, self.port)
+        self.tick_task = asyncio.create_task(self.tick_loop())
+
+    async def stop(self) :
+        if self.tick_task:
+            self.tick_task.cancel()
+            try:
+                await self.tick_task
+            except asyncio.CancelledError:
+                pass
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handler(self, ws, *args) :
+        path = request_path(ws)
+        clients = self.clients.get(path)
+        if clients is None:
+            await ws.close(code=1008, reason=f"unknown stream {path}")
+            return
+        clients.add(ws)
+        try:
+            await ws.wait_closed()
+        finally:
+            clients.discard(ws)
+
+    def build_message(self, path: str, price: ReferencePrice, level_qty: float) :
+        if self.replay is not None and path == "/pair":
+            return self.replay[self.update_id % len(self.replay)]
+        message = synth_depth_message(price.mid_fx, self.rng, self.update_id, level_qty=level_qty)
+        venue_format = VENUE_FORMATS.get(path)
+        if venue_format is not None:
+            message = venue_format(message, int(time.time() * 1000))
+        return json.dumps(message)
+
+    async def tick_loop(self) :
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            self.update_id += 1
+            for path, (price, level_qty) in self.streams.items():
+                price.step()
+                clients = self.clients[path]
+                if not clients:
+                    continue
+                message = self.build_message(path, price, level_qty)
+                for ws in list(clients):
+                    try:
+                        await ws.send(message)
+                        self.messages_sent += 1
+                    except websockets.ConnectionClosed:
+                        clients.discard(ws)
+
+            # Fixed-rate schedule; falls behind rather than bursting if overloaded
+            next_tick += self.interval_s
+            delay = next_tick - loop.time()
+            if delay < 0:
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
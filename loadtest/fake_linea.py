@@ -0,0 +1,386 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import websockets
+
+from config import (
+    POOL_ADDRESS,
+    POOL_BASE_ADDRESS,
+    POOL_QUOTE_ADDRESS,
+    POOL_BASE_DECIMALS,
+    POOL_QUOTE_DECIMALS,
+    POOL_TICK_SPACING,
+    QUOTER_V2_ADDRESS,
+)
+from loadtest.market import FakePool, ReferencePrice
+
+LINEA_CHAIN_ID = 59144
+
+SELECTOR_TICK_SPACING = "d0c93a7c"
+SELECTOR_FEE = "ddca3f43"
+SELECTOR_TOKEN0 = "0dfe1681"
+SELECTOR_SLOT0 = "3850c7bd"
+SELECTOR_DECIMALS = "313ce567"
+SELECTOR_QUOTE_EXACT_INPUT_SINGLE = "9e7defe6"
+SELECTOR_QUOTE_EXACT_INPUT = "cdca1753"
+
+
+def word(value: int) :
+    return format(value % (1 << 256), "064x")
+
+
+def encode_words(*values) :
+    return "0x" + "".join(word(value) for value in values)
+
+
+def read_word(data: str, index: int) :
+    return int(data[index * 64:(index + 1) * 64], 16)
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str) :
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+# Chain state behind both transports: one pool, one quoter, two tokens.
+# Blocks are produced by FakeLineaNode; the pool re-prices to the reference
+# price once per block
+class FakeChain:
+    def __init__(
+        self,
+        price: ReferencePrice,
+        depth_base: str = "200",
+        fee_pips: int = 500,
+        gas_price_wei: int = 50_000_000,
+        seed: int = None,
+        reorg_rate: float = 0.0,
+    ) :
+        self.price = price
+        self.rng = random.Random(seed)
+        self.base_address = POOL_BASE_ADDRESS.lower()
+        self.quote_address = POOL_QUOTE_ADDRESS.lower()
+        self.pool_address = POOL_ADDRESS.lower()
+        self.quoter_address = QUOTER_V2_ADDRESS.lower()
+        base_is_token0 = int(self.base_address, 16) < int(self.quote_address, 16)
+        self.token0 = self.base_address if base_is_token0 else self.quote_address
+        self.pool = FakePool(
+            POOL_BASE_DECIMALS,
+            POOL_QUOTE_DECIMALS,
+            base_is_token0,
+            depth_base,
+            fee_pips,
+        )
+        self.pool.set_price(price.mid_fx)
+        self.base_gas_price_wei = gas_price_wei
+        self.gas_price_wei = gas_price_wei
+        self.block_number = 20_000_000
+        self.block_timestamp = int(time.time())
+        self.calls = 0
+        # Chance a block is replaced by a sibling at the same height
+        self.reorg_rate = reorg_rate
+        self.reorgs = 0
+        self.head_hash = self.random_hash()
+        self.parent_hash = self.random_hash()
+        # Raw transactions accepted per sender, by nonce
+        self.transactions = {}
+        # Sends that reused a nonce with a different tx
+        self.nonce_conflicts = 0
+
+    def random_hash(self) :
+        return "0x" + format(self.rng.getrandbits(256), "064x")
+
+    def new_block(self) :
+        if self.reorg_rate and self.rng.random() < self.reorg_rate:
+            # Sibling of the current head - same height and parent, new hash
+            self.reorgs += 1
+        else:
+            self.block_number += 1
+            self.parent_hash = self.head_hash
+        self.head_hash = self.random_hash()
+        self.block_timestamp = int(time.time())
+        self.pool.set_price(self.price.mid_fx)
+        self.gas_price_wei = int(self.base_gas_price_wei * self.rng.uniform(0.9, 1.1))
+        return {
+            "number": hex(self.block_number),
+            "hash": self.head_hash,
+            "parentHash": self.parent_hash,
+            "timestamp": hex(self.block_timestamp),
+        }
+
+    # Past headers are synthesized - 2s apart, hash derived from the number - so
+    # the node can stand in for an archive RPC in backfill runs
+    def block_header(self, block_id: str) :
+        number = self.block_number if block_id in ("latest", "pending", "safe", "finalized") else int(block_id, 16)
+        if number > self.block_number:
+            return None
+        if number == self.block_number:
+            block_hash, parent_hash = self.head_hash, self.parent_hash
+        else:
+            block_hash = "0x" + format(number, "064x")
+            parent_hash = "0x" + format(number - 1, "064x")
+        return {
+            "number": hex(number),
+            "hash": block_hash,
+            "parentHash": parent_hash,
+            "timestamp": hex(self.block_timestamp - 2 * (self.block_number - number)),
+            "baseFeePerGas": hex(7),
+        }
+
+    def dispatch(self, method: str, params: list) :
+        self.calls += 1
+        if method == "eth_chainId":
+            return hex(LINEA_CHAIN_ID)
+        if method == "net_version":
+            return str(LINEA_CHAIN_ID)
+        if method == "web3_clientVersion":
+            return "fake-linea/loadtest"
+        if method == "eth_blockNumber":
+            return hex(self.block_number)
+        if method == "eth_gasPrice":
+            return hex(self.gas_price_wei)
+        if method == "eth_maxPriorityFeePerGas":
+            return hex(self.gas_price_wei)
+        if method == "eth_getBlockByNumber":
+            return self.block_header(params[0])
+        if method == "eth_getCode":
+            known = {self.pool_address, self.quoter_address, self.base_address, self.quote_address}
+            return "0x6080" if params[0].lower() in known else "0x"
+        if method == "eth_call":
+            return self.eth_call(params[0]["to"].lower(), params[0].get("data") or params[0].get("input"))
+        if method == "eth_getTransactionCount":
+            return hex(self.pending_nonce(params[0].lower()))
+        if method == "eth_sendRawTransaction":
+            return self.send_raw_transaction(params[0])
+        raise RpcError(-32601, f"method {method} not supported")
+
+    # Next nonce the pool would accept - the first gap in the sender's nonces
+    def pending_nonce(self, sender: str) :
+        sent = self.transactions.get(sender, {})
+        nonce = 0
+        while nonce in sent:
+            nonce += 1
+        return nonce
+
+    # Accepted into the "pool" and never mined - the load test only checks
+    # what reaches the node. Signature and nonce are checked like a real node
+    def send_raw_transaction(self, raw_tx: str) :
+        from eth_account import Account
+        from eth_utils import keccak
+        import rlp
+
+        raw = bytes.fromhex(raw_tx[2:])
+        if raw[0] != 2:
+            raise RpcError(-32000, "only type-2 transactions are supported")
+        nonce = int.from_bytes(rlp.decode(raw[1:])[1], "big")
+        sender = Account.recover_transaction(raw_tx).lower()
+        tx_hash = "0x" + keccak(raw).hex()
+        sent = self.transactions.setdefault(sender, {})
+        if nonce in sent:
+            if sent[nonce] == tx_hash:
+                raise RpcError(-32000, "already known")
+            self.nonce_conflicts += 1
+            raise RpcError(-32000, "nonce too low")
+        sent[nonce] = tx_hash
+        return tx_hash
+
+    def eth_call(self, to: str, data: str) :
+        selector, args = data[2:10], data[10:]
+        if to == self.pool_address:
+            if selector == SELECTOR_TICK_SPACING:
+                return encode_words(POOL_TICK_SPACING)
+            if selector == SELECTOR_FEE:
+                return encode_words(self.pool.fee_pips)
+            if selector == SELECTOR_TOKEN0:
+                return encode_words(int(self.token0, 16))
+            if selector == SELECTOR_SLOT0:
+                return encode_words(self.pool.sqrt_price_x96(), 0, 0, 1, 1, 0, 1)
+        elif to in (self.base_address, self.quote_address) and selector == SELECTOR_DECIMALS:
+            return encode_words(POOL_BASE_DECIMALS if to == self.base_address else POOL_QUOTE_DECIMALS)
+        elif to == self.quoter_address and selector == SELECTOR_QUOTE_EXACT_INPUT_SINGLE:
+            token_in = "0x" + format(read_word(args, 0), "040x")
+            amount_in = read_word(args, 2)
+            tick_spacing = read_word(args, 3)
+            amount_out = self.quote_hop(token_in, tick_spacing, amount_in)
+            gas_estimate = 110_000 + self.rng.randrange(0, 20_000)
+            return encode_words(amount_out, self.pool.sqrt_price_x96(), 1, gas_estimate)
+        elif to == self.quoter_address and selector == SELECTOR_QUOTE_EXACT_INPUT:
+            # (bytes path, uint256 amountIn) - path is the dynamic tail
+            amount_in = read_word(args, 1)
+            path_offset = read_word(args, 0) * 2
+            path_length = int(args[path_offset:path_offset + 64], 16) * 2
+            path = args[path_offset + 64:path_offset + 64 + path_length]
+            hops = (len(path) - 40) // 46
+            amount = amount_in
+            for hop in range(hops):
+                start = hop * 46
+                token_in = "0x" + path[start:start + 40]
+                tick_spacing = int(path[start + 40:start + 46], 16)
+                amount = self.quote_hop(token_in, tick_spacing, amount)
+            # (amountOut, uint160[] sqrtPriceX96AfterList, uint32[] ticksCrossedList, gasEstimate)
+            head = [amount, 0x80, 0xA0 + 32 * hops, 120_000 * hops]
+            sqrt_prices = [hops] + [self.pool.sqrt_price_x96()] * hops
+            ticks = [hops] + [1] * hops
+            return encode_words(*head, *sqrt_prices, *ticks)
+        raise RpcError(3, "execution reverted")
+
+    # Only the one fake pool exists - any other hop reverts like a missing pool
+    def quote_hop(self, token_in: str, tick_spacing: int, amount_in: int) :
+        if token_in not in (self.base_address, self.quote_address) or tick_spacing != POOL_TICK_SPACING:
+            raise RpcError(3, "execution reverted")
+        amount_out = self.pool.quote(amount_in, base_in=token_in == self.base_address)
+        if amount_out <= 0:
+            raise RpcError(3, "execution reverted")
+        return amount_out
+
+    def handle(self, request: dict) :
+        response = {"jsonrpc": "2.0", "id": request.get("id")}
+        try:
+            response["result"] = self.dispatch(request["method"], request.get("params") or [])
+        except RpcError as e:
+            response["error"] = {"code": e.code, "message": e.message}
+        except Exception as e:
+            response["error"] = {"code": -32603, "message": str(e)}
+        return response
+
+
+# Fake Linea node: JSON-RPC over WS (incl. newHeads) and HTTP, sharing one
+# FakeChain. Every response is delayed by latency_ms +/- jitter_ms
+class FakeLineaNode:
+    def __init__(
+        self,
+        chain: FakeChain,
+        host: str = "127.0.0.1",
+        ws_port: int = 9201,
+        http_port: int = 9202,
+        block_interval_s: float = 2.0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+    ) :
+        self.chain = chain
+        self.host = host
+        self.ws_port = ws_port
+        self.http_port = http_port
+        self.block_interval_s = block_interval_s
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rng = random.Random()
+        self.subscriptions = {}
+        self.next_sub_id = 0
+        self.ws_server = None
+        self.http_server = None
+        self.block_task = None
+
+    @property
+    def ws_url(self) :
+        return f"ws://{self.host}:{self.ws_port}"
+
+    @property
+    def http_url(self) :
+        return f"http://{self.host}:{self.http_port}"
+
+    def delay_s(self) :
+        jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    async def start(self) :
+        self.ws_server = await websockets.serve(self.ws_handler, self.host, self.ws_port)
+        self.http_server = ThreadingHTTPServer((self.host, self.http_port), self.http_handler_class())
+        self.http_server.daemon_threads = True
+        threading.Thread(target=self.http_server.serve_forever, daemon=True).start()
+        self.block_task = asyncio.create_task(self.block_loop())
+
+    async def stop(self) :
+        if self.block_task:
+            self.block_task.cancel()
+            try:
+                await self.block_task
+            except asyncio.CancelledError:
+                pass
+        if self.http_server:
+            self.http_server.shutdown()
+            self.http_server.server_close()
+        if self.ws_server:
+            self.ws_server.close()
+            await self.ws_server.wait_closed()
+
+    async def block_loop(self) :
+        while True:
+            await asyncio.sleep(self.block_interval_s)
+            header = self.chain.new_block()
+            for sub_id, ws in list(self.subscriptions.items()):
+                message = json.dumps({
+                    "jsonrpc": "2.0",
+                    "method": "eth_subscription",
+                    "params": {"subscription": sub_id, "result": header},
+                })
+                try:
+                    await ws.send(message)
+                except websockets.ConnectionClosed:
+                    self.subscriptions.pop(sub_id, None)
+
+    async def ws_handler(self, ws, *args) :
+        try:
+            async for message in ws:
+                asyncio.create_task(self.ws_respond(ws, json.loads(message)))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for sub_id, sub_ws in list(self.subscriptions.items()):
+                if sub_ws is ws:
+                    self.subscriptions.pop(sub_id, None)
+
+    def ws_handle(self, ws, request: dict) :
+        if request.get("method") == "eth_subscribe":
+            self.next_sub_id += 1
+            sub_id = hex(self.next_sub_id)
+            self.subscriptions[sub_id] = ws
+            return {"jsonrpc": "2.0", "id": request.get("id"), "result": sub_id}
+        if request.get("method") == "eth_unsubscribe":
+            removed = self.subscriptions.pop(request["params"][0], None) is not None
+            return {"jsonrpc": "2.0", "id": request.get("id"), "result": removed}
+        return self.chain.handle(request)
+
+    async def ws_respond(self, ws, payload) :
+        delay = self.delay_s()
+        if delay:
+            await asyncio.sleep(delay)
+        if isinstance(payload, list):
+            response = [self.ws_handle(ws, request) for request in payload]
+        else:
+            response = self.ws_handle(ws, payload)
+        try:
+            await ws.send(json.dumps(response))
+        except websockets.ConnectionClosed:
+            pass
+
+    def http_handler_class(self) :
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) :
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+                delay = node.delay_s()
+                if delay:
+                    time.sleep(delay)
+                if isinstance(payload, list):
+                    response = [node.chain.handle(request) for request in payload]
+                else:
+                    response = node.chain.handle(payload)
+                body = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) :
+                return
+
+        return Handler
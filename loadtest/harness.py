@@ -0,0 +1,389 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import sys
+import tempfile
+import time
+
+from config import ACTIVE_POOL
+from loadtest.fake_binance import FakeBinanceServer
+from loadtest.fake_linea import FakeChain, FakeLineaNode
+from loadtest.market import ReferencePrice
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Starting price, pool depth (base units) and Binance base qty per level
+POOL_PROFILES = {
+    "weth_usdc": {"mid": "2950", "depth_base": "200", "level_qty": 5.0},
+    "weth_usdt": {"mid": "2950", "depth_base": "200", "level_qty": 5.0},
+    "weth_wbtc": {"mid": "0.034", "depth_base": "100", "level_qty": 5.0},
+    "linea_usdc": {"mid": "0.025", "depth_base": "20000000", "level_qty": 100000.0},
+    "linea_usdc_low_tvl": {"mid": "0.025", "depth_base": "2000000", "level_qty": 20000.0},
+}
+GAS_MID = "2950"
+
+BLOCK_LINE = re.compile(
+    r"^\[block\] num=(\d+) .*eval=(\S+) sub=(\d+)/(\d+)"
+    r"(?: h2e=(\d+)ms)?(?: lag=([\d.]+)/[\d.]+ms)?(?: rpc=(\d+) plan=(\S+))?"
+    r"(?: gc=(\d+)/([\d.]+)ms)?(?: sched=(?:\d+/\d+:(\w+)|\S+))?"
+)
+READY_LINE = re.compile(r"^\[startup\] ready in (\d+)ms")
+FEED_LINE = re.compile(r"^\[feed\] (\S+) received=(\d+) processed=(\d+) dropped=(\d+)")
+EXEC_LINE = re.compile(r"^\[exec\] block=\d+ nonce=\d+ .*signed=([\d.]+)ms ack=(?:([\d.]+)ms|none)")
+# Well-known dev-chain account - never holds real funds
+TEST_PRIVATE_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+TEST_ADDRESS = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+
+
+def percentile(sorted_values: list, q: float) :
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def read_rss_kb(pid: int) :
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+# Parses main.py stdout as it streams - the bot's own log lines are the metrics
+class RunStats:
+    def __init__(self) :
+        self.blocks = []
+        self.eval_ms = []
+        self.header_to_eval_ms = []
+        self.loop_lag_ms = []
+        self.rpc_per_block = []
+        self.gc_collections = 0
+        self.gc_pause_ms = []
+        self.exec_signed_ms = []
+        self.exec_ack_ms = []
+        self.exec_unacked = 0
+        self.reduced_plans = 0
+        self.partial_evals = {}
+        self.band_skips = 0
+        self.stale_blocks = 0
+        self.feeds = {}
+        self.sub_evals = 0
+        self.sub_band_skips = 0
+        self.opportunities = 0
+        self.reorgs = 0
+        self.startup_ms = None
+        self.ready_at = None
+        self.rss_samples = []
+
+    def feed(self, line: str) :
+        match = BLOCK_LINE.match(line)
+        if match:
+            self.blocks.append((time.time(), int(match.group(1))))
+            eval_str = match.group(2)
+            if eval_str.endswith("ms"):
+                self.eval_ms.append(float(eval_str[:-2]))
+            else:
+                self.band_skips += 1
+            self.sub_evals += int(match.group(3))
+            self.sub_band_skips += int(match.group(4))
+            if match.group(5) is not None:
+                self.header_to_eval_ms.append(float(match.group(5)))
+            if match.group(6) is not None:
+                self.loop_lag_ms.append(float(match.group(6)))
+            if match.group(7) is not None:
+                self.rpc_per_block.append(int(match.group(7)))
+                if match.group(8) != "-":
+                    self.reduced_plans += 1
+            if match.group(9) is not None and int(match.group(9)):
+                self.gc_collections += int(match.group(9))
+                self.gc_pause_ms.append(float(match.group(10)))
+            if match.group(11) is not None:
+                reason = match.group(11)
+                self.partial_evals[reason] = self.partial_evals.get(reason, 0) + 1
+            return
+        if line.startswith("[arb]"):
+            self.opportunities += 1
+            return
+        if line.startswith("[reorg]"):
+            self.reorgs += 1
+            return
+        if line.startswith("[stale]"):
+            self.stale_blocks += 1
+            return
+        match = FEED_LINE.match(line)
+        if match:
+            self.feeds[match.group(1)] = {
+                "received": int(match.group(2)),
+                "processed": int(match.group(3)),
+                "dropped": int(match.group(4)),
+            }
+            return
+        match = EXEC_LINE.match(line)
+        if match:
+            self.exec_signed_ms.append(float(match.group(1)))
+            if match.group(2) is None:
+                self.exec_unacked += 1
+            else:
+                self.exec_ack_ms.append(float(match.group(2)))
+            return
+        match = READY_LINE.match(line)
+        if match:
+            self.startup_ms = int(match.group(1))
+            self.ready_at = time.time()
+
+    def report(self, duration_s: float, binance: FakeBinanceServer, chain: FakeChain) :
+        eval_ms = sorted(self.eval_ms)
+        header_to_eval_ms = sorted(self.header_to_eval_ms)
+        loop_lag_ms = sorted(self.loop_lag_ms)
+        rpc_per_block = sorted(self.rpc_per_block)
+        gc_pause_ms = sorted(self.gc_pause_ms)
+        exec_signed_ms = sorted(self.exec_signed_ms)
+        exec_ack_ms = sorted(self.exec_ack_ms)
+        blocks_per_s = None
+        if len(self.blocks) > 1:
+            span = self.blocks[-1][0] - self.blocks[0][0]
+            blocks_per_s = (len(self.blocks) - 1) / span if span > 0 else None
+
+        # Growth is measured from the end of startup - imports aren't a leak
+        samples = [s for s in self.rss_samples if self.ready_at is None or s[0] >= self.ready_at]
+        rss_start_kb = samples[0][1] if samples else None
+        rss_end_kb = samples[-1][1] if samples else None
+        rss_growth_kb_per_min = None
+        if len(samples) > 1:
+            span = samples[-1][0] - samples[0][0]
+            if span > 0:
+                rss_growth_kb_per_min = (rss_end_kb - rss_start_kb) / span * 60
+
+        return {
+            "pool": ACTIVE_POOL,
+            "duration_s": round(duration_s, 1),
+            "startup_ms": self.startup_ms,
+            "blocks": len(self.blocks),
+            "blocks_per_s": round(blocks_per_s, 3) if blocks_per_s else None,
+            "full_evals": len(eval_ms),
+            "band_skips": self.band_skips,
+            "sub_block_evals": self.sub_evals,
+            "sub_block_band_skips": self.sub_band_skips,
+            "opportunities": self.opportunities,
+            "reorgs_injected": chain.reorgs,
+            "reorgs_detected": self.reorgs,
+            "eval_ms_p50": percentile(eval_ms, 0.50),
+            "eval_ms_p90": percentile(eval_ms, 0.90),
+            "eval_ms_p99": percentile(eval_ms, 0.99),
+            "eval_ms_max": eval_ms[-1] if eval_ms else None,
+            "header_to_eval_ms_p50": percentile(header_to_eval_ms, 0.50),
+            "header_to_eval_ms_p99": percentile(header_to_eval_ms, 0.99),
+            # Worst main-loop stall between consecutive blocks
+            "loop_lag_ms_p50": percentile(loop_lag_ms, 0.50),
+            "loop_lag_ms_p99": percentile(loop_lag_ms, 0.99),
+            "rss_start_mb": round(rss_start_kb / 1024, 1) if rss_start_kb else None,
+            "rss_end_mb": round(rss_end_kb / 1024, 1) if rss_end_kb else None,
+            "rss_growth_mb_per_min": (
+                round(rss_growth_kb_per_min / 1024, 3)
+                if rss_growth_kb_per_min is not None
+                else None
+            ),
+            "book_messages_sent": binance.messages_sent,
+            "rpc_calls_served": chain.calls,
+            # HTTP calls the bot metered per block, and blocks quoted under a reduced plan
+            "rpc_per_block_p50": percentile(rpc_per_block, 0.50),
+            "rpc_per_block_max": rpc_per_block[-1] if rpc_per_block else None,
+            "reduced_plans": self.reduced_plans,
+            # Blocks whose quoting was cut short, by reason (deadline / newer_block)
+            "partial_evals": self.partial_evals,
+            # Blocks that found a book past BOOK_MAX_AGE_MS, and per-stream
+            # messages received / parsed / conflated away
+            "stale_blocks": self.stale_blocks,
+            "book_feeds": self.feeds,
+            # Collections, and the longest pause between consecutive block lines
+            "gc_collections": self.gc_collections,
+            "gc_pause_ms_p99": percentile(gc_pause_ms, 0.99),
+            "gc_pause_ms_max": gc_pause_ms[-1] if gc_pause_ms else None,
+            # Execution (--execute): decision to signed, and to the first node's acceptance
+            "txs_sent": len(exec_signed_ms),
+            "txs_unacked": self.exec_unacked,
+            "txs_on_node": sum(len(sent) for sent in chain.transactions.values()),
+            "nonce_conflicts": chain.nonce_conflicts,
+            "exec_signed_ms_p50": percentile(exec_signed_ms, 0.50),
+            "exec_ack_ms_p50": percentile(exec_ack_ms, 0.50),
+            "exec_ack_ms_p99": percentile(exec_ack_ms, 0.99),
+        }
+
+
+async def pump_output(stream, stats: RunStats, echo: bool) :
+    while True:
+        raw = await stream.readline()
+        if not raw:
+            return
+        line = raw.decode(errors="replace").rstrip()
+        stats.feed(line)
+        if echo:
+            print(f"  | {line}")
+
+
+async def sample_memory(pid: int, stats: RunStats, interval_s: float) :
+    while True:
+        rss_kb = read_rss_kb(pid)
+        if rss_kb is not None:
+            stats.rss_samples.append((time.time(), rss_kb))
+        await asyncio.sleep(interval_s)
+
+
+async def run(args) :
+    profile = POOL_PROFILES[ACTIVE_POOL]
+    pair_price = ReferencePrice(profile["mid"], args.volatility_bps, seed=args.seed)
+    gas_price = ReferencePrice(GAS_MID, args.volatility_bps, seed=args.seed)
+    streams = {
+        "/pair": (pair_price, profile["level_qty"]),
+        "/gas": (gas_price, 5.0),
+    }
+    # Other venues walk on their own around the same price
+    for offset, venue in enumerate(args.venues, start=1):
+        venue_seed = None if args.seed is None else args.seed + offset
+        venue_price = ReferencePrice(profile["mid"], args.volatility_bps, seed=venue_seed)
+        streams[f"/{venue}"] = (venue_price, profile["level_qty"])
+
+    binance = FakeBinanceServer(
+        streams,
+        port=args.binance_port,
+        interval_ms=args.book_interval_ms,
+        replay_path=args.replay,
+        seed=args.seed,
+    )
+    chain = FakeChain(
+        pair_price,
+        depth_base=profile["depth_base"],
+        seed=args.seed,
+        reorg_rate=args.reorg_rate,
+    )
+    node = FakeLineaNode(
+        chain,
+        ws_port=args.ws_port,
+        http_port=args.http_port,
+        block_interval_s=args.block_interval,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+    )
+    await binance.start()
+    await node.start()
+
+    log_dir = tempfile.mkdtemp(prefix="arb-loadtest-")
+    env = dict(os.environ)
+    env.update({
+        "BINANCE_WS_PAIR": binance.url("/pair"),
+        "BINANCE_WS_GAS": binance.url("/gas"),
+        "LINEA_WSS": node.ws_url,
+        "LINEA_RPC": node.http_url,
+        "LOG_PATH": os.path.join(log_dir, "opportunities.log"),
+        "BEST_TRADE_LOG_PATH": os.path.join(log_dir, "best_trade.log"),
+        "REORG_LOG_PATH": os.path.join(log_dir, "reorgs.log"),
+        # Each run starts cold and leaves no state behind
+        "WARM_STATE_PATH": "",
+        "POOL_METADATA_CACHE_PATH": "",
+        "PYTHONUNBUFFERED": "1",
+    })
+    if args.no_band:
+        env["PRICE_BAND_ENABLED"] = "0"
+    if args.feed_mode:
+        env["BINANCE_FEED_MODE"] = args.feed_mode
+    if args.venues:
+        env["CEX_VENUES"] = ",".join(args.venues)
+        for venue in args.venues:
+            env[f"{venue.upper()}_WS_URL"] = binance.url(f"/{venue}")
+    if args.gc_auto:
+        env["GC_FREEZE"] = "0"
+        env["GC_DEFER"] = "0"
+    if args.execute:
+        env.update({
+            "EXECUTION_ENABLED": "1",
+            "EXECUTION_PRIVATE_KEY": TEST_PRIVATE_KEY,
+            "UNIVERSAL_ROUTER_RECIPIENT": TEST_ADDRESS,
+            # Two connections to the one node - exercises the parallel send
+            "EXECUTION_ENDPOINTS": f"{node.ws_url},{node.ws_url}",
+            "EXECUTION_LOG_PATH": os.path.join(log_dir, "executions.log"),
+        })
+    print(
+        f"[loadtest] pool={ACTIVE_POOL} books every {args.book_interval_ms}ms, "
+        f"block every {args.block_interval}s, rpc latency {args.latency_ms}+/-{args.jitter_ms}ms, "
+        f"{args.duration}s run, logs in {log_dir}"
+    )
+
+    started = time.time()
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable,
+        os.path.join(REPO_ROOT, "main.py"),
+        cwd=REPO_ROOT,
+        env=env,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    stats = RunStats()
+    pump_task = asyncio.create_task(pump_output(proc.stdout, stats, args.verbose))
+    memory_task = asyncio.create_task(sample_memory(proc.pid, stats, args.memory_interval))
+
+    try:
+        await asyncio.wait_for(proc.wait(), timeout=args.duration)
+        print(f"[loadtest] bot exited early with code {proc.returncode}")
+    except asyncio.TimeoutError:
+        proc.send_signal(signal.SIGINT)
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+    finally:
+        memory_task.cancel()
+        await pump_task
+        await node.stop()
+        await binance.stop()
+
+    report = stats.report(time.time() - started, binance, chain)
+    for key, value in report.items():
+        print(f"[loadtest] {key:<24} {value}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+    return report
+
+
+def parse_args(argv=None) :
+    parser = argparse.ArgumentParser(
+        description="Run main.py against local fake Binance/Linea servers and report throughput"
+    )
+    parser.add_argument("--duration", type=float, default=60.0, help="run length in seconds")
+    parser.add_argument("--book-interval-ms", type=float, default=100.0, help="Binance update interval (1-100ms)")
+    parser.add_argument("--block-interval", type=float, default=2.0, help="seconds between blocks")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="injected RPC latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform +/- jitter on RPC latency")
+    parser.add_argument("--volatility-bps", type=float, default=1.0, help="per-tick price move stddev")
+    parser.add_argument("--replay", default=None, help="JSONL of raw Binance depth messages for the pair stream")
+    parser.add_argument("--memory-interval", type=float, default=1.0, help="RSS sample interval in seconds")
+    parser.add_argument("--binance-port", type=int, default=9101)
+    parser.add_argument("--ws-port", type=int, default=9201)
+    parser.add_argument("--http-port", type=int, default=9202)
+    parser.add_argument("--reorg-rate", type=float, default=0.0, help="chance each block replaces the head at the same height")
+    parser.add_argument("--feed-mode", choices=("inline", "thread"), default=None, help="override BINANCE_FEED_MODE")
+    parser.add_argument(
+        "--venues",
+        type=lambda value: [venue for venue in value.split(",") if venue],
+        default=[],
+        help="comma-separated extra CEX venues (okx, bybit) served as fake feeds and merged into the pair book",
+    )
+    parser.add_argument("--execute", action="store_true", help="sign and broadcast best trades to the fake node")
+    parser.add_argument("--gc-auto", action="store_true", help="leave collection to the automatic thresholds (no freeze, no deferral)")
+    parser.add_argument("--no-band", action="store_true", help="disable the no-arb band so every block is fully evaluated")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="write the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="echo bot output")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
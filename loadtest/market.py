@@ -0,0 +1,114 @@
+import random
+from math import isqrt
+
+from models.fixed_point import FIXED_SCALE, PIPS_SCALE, parse_fixed
+
+Q192 = 2 ** 192
+
+
+# Shared "true" price both fakes quote around. Binance tracks it every tick;
+# the fake pool only catches up once per block, which is what opens
+# CEX-DEX gaps for the bot to find
+class ReferencePrice:
+    def __init__(
+        self,
+        mid: str,
+        volatility_bps: float = 1.0,
+        seed: int = None,
+    ) :
+        self.mid_fx = parse_fixed(mid)
+        self.anchor_fx = self.mid_fx
+        self.volatility_bps = volatility_bps
+        self.rng = random.Random(seed)
+
+    # One random-walk step, pulled gently back to the starting price
+    def step(self) :
+        shock = self.rng.gauss(0.0, self.volatility_bps) / 10000
+        reversion = (self.anchor_fx - self.mid_fx) / self.anchor_fx * 0.01
+        self.mid_fx = max(1, int(self.mid_fx * (1 + shock + reversion)))
+        return self.mid_fx
+
+
+# Constant-product stand-in for a V3 pool at one price - good enough to give
+# size-dependent quotes with realistic price impact
+class FakePool:
+    def __init__(
+        self,
+        base_decimals: int,
+        quote_decimals: int,
+        base_is_token0: bool,
+        depth_base: str,
+        fee_pips: int = 500,
+    ) :
+        self.base_unit = 10 ** base_decimals
+        self.quote_unit = 10 ** quote_decimals
+        self.base_is_token0 = base_is_token0
+        self.fee_pips = fee_pips
+        self.base_reserve = parse_fixed(depth_base) * self.base_unit // FIXED_SCALE
+        self.quote_reserve = 0
+
+    def set_price(self, mid_fx: int) :
+        self.quote_reserve = (
+            self.base_reserve * mid_fx * self.quote_unit // (self.base_unit * FIXED_SCALE)
+        )
+
+    def quote(self, amount_in: int, base_in: bool) :
+        if base_in:
+            reserve_in, reserve_out = self.base_reserve, self.quote_reserve
+        else:
+            reserve_in, reserve_out = self.quote_reserve, self.base_reserve
+        amount_in_after_fee = amount_in * (PIPS_SCALE - self.fee_pips) // PIPS_SCALE
+        return reserve_out * amount_in_after_fee // (reserve_in + amount_in_after_fee)
+
+    def sqrt_price_x96(self) :
+        if self.base_is_token0:
+            return isqrt(self.quote_reserve * Q192 // self.base_reserve)
+        return isqrt(self.base_reserve * Q192 // self.quote_reserve)
+
+
+# depth10 message in Binance's partial-book format around a mid
+def synth_depth_message(
+    mid_fx: int,
+    rng: random.Random,
+    update_id: int,
+    levels: int = 10,
+    half_spread_bps: float = 0.5,
+    level_step_bps: float = 0.3,
+    level_qty: float = 5.0,
+) :
+    mid = mid_fx / FIXED_SCALE
+    bids = []
+    asks = []
+    for i in range(levels):
+        offset = (half_spread_bps + i * level_step_bps) / 10000
+        qty = level_qty * rng.uniform(0.2, 1.8)
+        bids.append([f"{mid * (1 - offset):.8f}", f"{qty:.6f}"])
+        asks.append([f"{mid * (1 + offset):.8f}", f"{qty:.6f}"])
+    return {"lastUpdateId": update_id, "bids": bids, "asks": asks}
+
+
+# The same book as an OKX books5 push (top 5, [price, size, "0", orders])
+def okx_books_message(depth_message: dict, ts_ms: int, inst_id: str = "ETH-USDC") :
+    return {
+        "arg": {"channel": "books5", "instId": inst_id},
+        "data": [{
+            "bids": [[price, qty, "0", "1"] for price, qty in depth_message["bids"][:5]],
+            "asks": [[price, qty, "0", "1"] for price, qty in depth_message["asks"][:5]],
+            "ts": str(ts_ms),
+        }],
+    }
+
+
+# The same book as a Bybit orderbook snapshot - every push replaces the book
+def bybit_orderbook_message(depth_message: dict, ts_ms: int, symbol: str = "ETHUSDC") :
+    return {
+        "topic": f"orderbook.50.{symbol}",
+        "type": "snapshot",
+        "ts": ts_ms,
+        "data": {
+            "s": symbol,
+            "b": depth_message["bids"],
+            "a": depth_message["asks"],
+            "u": depth_message["lastUpdateId"],
+        },
+    }
@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import time
+
+from config import (
+    ACTIVE_POOL,
+    POOL_BASE_ADDRESS,
+    POOL_QUOTE_ADDRESS,
+    POOL_TICK_SPACING,
+    QUOTER_V2_ADDRESS,
+)
+from loadtest.fake_linea import FakeChain, FakeLineaNode
+from loadtest.harness import POOL_PROFILES
+from loadtest.market import ReferencePrice
+from quoter.calldata import (
+    decode_exact_input_single,
+    encode_exact_input_single,
+    exact_input_single_template,
+)
+from quoter.quoter_v2 import QuoterV2Client, load_quoter_abi
+
+QUOTE_EXACT_INPUT_SINGLE_OUTPUTS = ["uint256", "uint160", "uint32", "uint256"]
+
+
+# Best of `repeats` runs of `calls` calls, in microseconds per call
+def per_call_us(fn, calls: int, repeats: int) :
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for amount_in in range(1, calls + 1):
+            fn(amount_in)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / calls * 1e6
+
+
+# Encode + decode of one quoteExactInputSingle: through the web3 contract layer
+# as every quote used to, and through the precomputed templates
+def bench_codec(calls: int, repeats: int) :
+    from eth_abi import decode
+    from web3 import Web3
+
+    contract = Web3().eth.contract(address=Web3.to_checksum_address(QUOTER_V2_ADDRESS), abi=load_quoter_abi())
+    result = "0x" + "".join(format(value, "064x") for value in (10 ** 18, 2 ** 96, 1, 120_000))
+    raw = bytes.fromhex(result[2:])
+
+    def web3_path(amount_in: int) :
+        params = (
+            Web3.to_checksum_address(POOL_QUOTE_ADDRESS),
+            Web3.to_checksum_address(POOL_BASE_ADDRESS),
+            amount_in,
+            POOL_TICK_SPACING,
+            0,
+        )
+        contract.encode_abi("quoteExactInputSingle", args=[params])
+        decode(QUOTE_EXACT_INPUT_SINGLE_OUTPUTS, raw)
+
+    def raw_path(amount_in: int) :
+        template = exact_input_single_template(POOL_QUOTE_ADDRESS, POOL_BASE_ADDRESS, POOL_TICK_SPACING)
+        encode_exact_input_single(template, amount_in)
+        decode_exact_input_single(result)
+
+    # Both paths must put the same bytes on the wire
+    template = exact_input_single_template(POOL_QUOTE_ADDRESS, POOL_BASE_ADDRESS, POOL_TICK_SPACING)
+    expected = contract.encode_abi(
+        "quoteExactInputSingle",
+        args=[(Web3.to_checksum_address(POOL_QUOTE_ADDRESS), Web3.to_checksum_address(POOL_BASE_ADDRESS), 12345, POOL_TICK_SPACING, 0)],
+    )
+    assert encode_exact_input_single(template, 12345) == expected
+    assert decode_exact_input_single(result) == tuple(decode(QUOTE_EXACT_INPUT_SINGLE_OUTPUTS, raw))
+
+    return per_call_us(web3_path, calls, repeats), per_call_us(raw_path, calls, repeats)
+
+
+# Whole quote against the local fake node over HTTP: contract .call() vs the
+# client's raw eth_call. Network time is the same for both
+async def bench_round_trip(calls: int, repeats: int, http_port: int, ws_port: int) :
+    from web3 import Web3
+
+    profile = POOL_PROFILES[ACTIVE_POOL]
+    chain = FakeChain(ReferencePrice(profile["mid"], 0.0, seed=1), depth_base=profile["depth_base"], seed=1)
+    node = FakeLineaNode(chain, ws_port=ws_port, http_port=http_port, block_interval_s=3600)
+    await node.start()
+    try:
+        client = QuoterV2Client(rpc_url=node.http_url)
+        contract = client.web3.eth.contract(address=client.quoter_address, abi=load_quoter_abi())
+
+        def web3_path(amount_in: int) :
+            params = (
+                Web3.to_checksum_address(POOL_QUOTE_ADDRESS),
+                Web3.to_checksum_address(POOL_BASE_ADDRESS),
+                amount_in * 10 ** 6,
+                POOL_TICK_SPACING,
+                0,
+            )
+            contract.functions.quoteExactInputSingle(params).call(block_identifier="latest")
+
+        def raw_path(amount_in: int) :
+            client.quote_quote_to_base(amount_in * 10 ** 6)
+
+        # Warm both (web3 caches eth_chainId on its first call)
+        web3_path(1)
+        raw_path(1)
+        return await asyncio.to_thread(
+            lambda: (per_call_us(web3_path, calls, repeats), per_call_us(raw_path, calls, repeats))
+        )
+    finally:
+        await node.stop()
+
+
+def report(label: str, before_us: float, after_us: float) :
+    print(
+        f"[bench] {label:<22} web3 {before_us:8.1f}us  raw {after_us:8.1f}us  "
+        f"saved {before_us - after_us:8.1f}us ({before_us / after_us:.1f}x)"
+    )
+
+
+def parse_args(argv=None) :
+    parser = argparse.ArgumentParser(
+        description="Per-call cost of quoter eth_calls through web3 vs the raw ABI fast path"
+    )
+    parser.add_argument("--calls", type=int, default=5000, help="calls per timed run (encode/decode)")
+    parser.add_argument("--round-trip-calls", type=int, default=300, help="calls per timed run against the fake node")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs; the best is reported")
+    parser.add_argument("--http-port", type=int, default=9302)
+    parser.add_argument("--ws-port", type=int, default=9301)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) :
+    args = parse_args(argv)
+    report("encode+decode", *bench_codec(args.calls, args.repeats))
+    report(
+        "eth_call (fake node)",
+        *asyncio.run(bench_round_trip(args.round_trip_calls, args.repeats, args.http_port, args.ws_port)),
+    )
+
+
+if __name__ == "__main__":
+    main()
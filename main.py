@@ -1,54 +1,83 @@
-import asyncio
-import json
-import os
-import signal
 import time
-from datetime import datetime
-from decimal import Decimal
-from functools import lru_cache
-from eth_abi import encode as abi_encode
-from eth_utils import keccak
 
-try:
-    import orjson
+PROCESS_START = time.perf_counter()
 
-    def dumps(obj):
-        return orjson.dumps(obj).decode()
-except ImportError:
-
-    def dumps(obj):
-        return json.dumps(obj, default=str)
+import asyncio
+import signal
 
 from config import (
     LOG_PATH,
     LOG_ALL_EVALUATIONS,
     BEST_TRADE_LOG_PATH,
     DEPTH_WEIGHTED_LEVELS,
-    LINEA_RPC,
     BINANCE_WS_PAIR,
     BINANCE_WS_GAS,
-    POOL_ADDRESS,
+    CEX_VENUES,
+    CEX_VENUE_FEES_BPS,
     POOL_TICK_SPACING,
     POOL_BASE_SYMBOL,
     POOL_QUOTE_SYMBOL,
     POOL_BASE_ADDRESS,
     POOL_QUOTE_ADDRESS,
-    NATIVE_SYMBOL,
-    GAS_QUOTE_SYMBOL,
     UNIVERSAL_ROUTER_ADDRESS,
     UNIVERSAL_ROUTER_RECIPIENT,
     UR_DEADLINE_SECONDS,
     UR_COMMAND_V3_SWAP_EXACT_IN,
     UR_PAYER_IS_USER,
+    SUB_BLOCK_EVAL,
+    SUB_BLOCK_MIN_INTERVAL_MS,
+    SUB_BLOCK_LOG_ALL,
+    PRICE_BAND_ENABLED,
+    DIRECTION_PRUNING,
+    ACTIVE_POOL,
+    POOL_METADATA_CACHE_PATH,
+    WARM_STATE_PATH,
+    GAS_PRICE_MAX_AGE_BLOCKS,
+    REORG_LOG_PATH,
+    PROFILE_SAMPLING,
+    BINANCE_FEED_MODE,
+    CEX_HEDGE_LATENCY_MS,
+    BOOK_MAX_AGE_MS,
+    BOOK_STALE_ACTION,
+    RPC_BUDGET_DAILY_CALLS,
+    RPC_BUDGET_PER_SECOND,
+    WSS_BUDGET_DAILY_CALLS,
+    EXECUTION_ENABLED,
+    SWEEP_CAPTURE_PATH,
 )
 from md.linea_rpc import LineaRpcClient
 from md.binance_ws import BinanceOrderbookStream
+from md.consolidated import ConsolidatedBook
+from md.venues import VENUE_STREAMS
+from md.feed_thread import FeedThread
+from md.rpc_budget import RpcBudget
 from quoter.quoter_v2 import QuoterV2Client
+from quoter.pool_state import PoolStateClient
 from orderbook.execution_sim import CEXExecutionSimulator
+from orderbook.history import BookHistory
 from arbitrage.gas_calc import GasCostCalculator
 from arbitrage.evaluator import ArbitrageEvaluator
+from arbitrage.price_band import PriceBandCalculator
+from arbitrage.quote_plan import QuotePlanner
+from arbitrage.scheduler import EvalScheduler
+from arbitrage.results import DEX_BUY_CEX_SELL, DEX_SELL_CEX_BUY, EvaluationBatch
+from arbitrage.report import BlockReport, compute_quote_price_usd, dumps_bytes
+from execution import Broadcaster, TradeExecutor
+from sweep.capture import capture_bytes
 from models.types import ArbitrageOpportunity, Direction
-from web3 import Web3
+from models.fixed_point import FIXED_SCALE
+from quoter.path import encode_v3_path
+from startup import StartupTimer, resolve_pool_metadata
+from profiling import AllocationTracker, GcController, LoopLagMonitor, SlowBlockProfiler, StackSampler
+from state import (
+    BlockEntry,
+    BlockRing,
+    capture_warm_state,
+    checkpoint_loop,
+    load_checkpoint,
+    restore_warm_state,
+    write_checkpoint,
+)
 
 
 TOKEN_ADDRESS_BY_SYMBOL = {
@@ -56,286 +85,461 @@ TOKEN_ADDRESS_BY_SYMBOL = {
     POOL_QUOTE_SYMBOL: POOL_QUOTE_ADDRESS,
 }
 
-
-def format_opportunity(
-    opp: ArbitrageOpportunity,
-    base_price_quote: Decimal,
-    quote_price_usd: Decimal,
-) :
-    cex_token_in = opp.cex_quote.token_in
-    cex_token_out = opp.cex_quote.token_out
-    cex_amount_in = opp.cex_quote.amount_in
-    cex_amount_out = opp.cex_quote.amount_out
-    avg_price = opp.cex_quote.average_price
-
-    profit_token_amount = opp.gross_profit_token
-    profit_usd = compute_profit_token_usd(opp, base_price_quote, quote_price_usd)
-    gas_cost_usd = compute_gas_cost_usd(opp, quote_price_usd)
-    net_profit_usd = profit_usd - gas_cost_usd
-    if opp.dex_quote.token_in == POOL_QUOTE_SYMBOL:
-        notional_quote = opp.dex_quote.amount_in
-    elif opp.dex_quote.token_in == POOL_BASE_SYMBOL:
-        notional_quote = opp.dex_quote.amount_in * base_price_quote
-    else:
-        notional_quote = Decimal("0")
-    notional_usd = notional_quote * quote_price_usd
-    profit_bps = None
-    capital_usd = notional_usd + gas_cost_usd
-    if capital_usd > 0:
-        profit_bps = (net_profit_usd / capital_usd) * Decimal("10000")
-
-    is_profitable = net_profit_usd > 0
-    opp.is_profitable = is_profitable
-
-    return {
-        "timestamp": datetime.fromtimestamp(opp.timestamp).isoformat(),
-        "block": opp.block_number,
-        "net_profit_usd": float(net_profit_usd),
-        "direction": opp.direction.value,
-        "dex": {
-            "token_in": opp.dex_quote.token_in,
-            "token_out": opp.dex_quote.token_out,
-            "amount_in": float(opp.dex_quote.amount_in),
-            "amount_out": float(opp.dex_quote.amount_out),
-            "price": float(opp.dex_price),
-            "gas_estimate": opp.dex_quote.gas_estimate,
-        },
-        "cex": {
-            "token_in": cex_token_in,
-            "token_out": cex_token_out,
-            "amount_in": float(cex_amount_in),
-            "amount_out": float(cex_amount_out),
-            "avg_price": float(avg_price),
-        },
-        "gas_price_gwei": opp.gas_price_wei / 1e9,
-        "gas_cost_usd": float(gas_cost_usd),
-        "profit_token": opp.profit_token,
-        "profit_token_amount": float(profit_token_amount),
-        "profit_bps": float(profit_bps) if profit_bps is not None else None,
-        "is_profitable": is_profitable,
-    }
-
-# Load & cache byte call data for set token_in + tick_spacing + token_out
-@lru_cache(maxsize=2)
-def encode_v3_path(token_in: str, token_out: str, tick_spacing: int) :
-    token_in_bytes = bytes.fromhex(Web3.to_checksum_address(token_in)[2:])
-    token_out_bytes = bytes.fromhex(Web3.to_checksum_address(token_out)[2:])
-    tick_bytes = int(tick_spacing).to_bytes(3, "big")
-    return token_in_bytes + tick_bytes + token_out_bytes
-
+# keccak("execute(bytes,bytes[],uint256)")[:4]
+UR_EXECUTE_SELECTOR = bytes.fromhex("3593564c")
 
 def build_universal_router_exact_in_tx(
     opp: ArbitrageOpportunity,
     deadline: int,
 ) :
-    token_in_symbol = opp.dex_quote.token_in
-    token_out_symbol = opp.dex_quote.token_out
-    token_in = TOKEN_ADDRESS_BY_SYMBOL.get(token_in_symbol)
-    token_out = TOKEN_ADDRESS_BY_SYMBOL.get(token_out_symbol)
-    router_address = Web3.to_checksum_address(UNIVERSAL_ROUTER_ADDRESS)
-    recipient = Web3.to_checksum_address(UNIVERSAL_ROUTER_RECIPIENT)
-
-    commands = bytes([int(UR_COMMAND_V3_SWAP_EXACT_IN)])
-    path = encode_v3_path(token_in, token_out, POOL_TICK_SPACING)
+    # Already loaded by web3 during startup, so these are dict lookups by now
+    from eth_abi import encode as abi_encode
+    from eth_utils import to_checksum_address
+
+    route = opp.route
+    if route is not None:
+        tokens = route.tokens
+        tick_spacings = route.tick_spacings
+    else:
+        tokens = (
+            TOKEN_ADDRESS_BY_SYMBOL.get(opp.dex_quote.token_in),
+            TOKEN_ADDRESS_BY_SYMBOL.get(opp.dex_quote.token_out),
+        )
+        tick_spacings = (POOL_TICK_SPACING,)
+    token_in = tokens[0]
+    token_out = tokens[-1]
+    router_address = to_checksum_address(UNIVERSAL_ROUTER_ADDRESS)
+    recipient = to_checksum_address(UNIVERSAL_ROUTER_RECIPIENT)
     amount_in_raw = int(opp.dex_quote.amount_in_raw)
     amount_out_min_raw = int(opp.dex_quote.amount_out_raw)
 
-    input_bytes = abi_encode(
-        ["address", "uint256", "uint256", "bytes", "bool"],
-        [
-            recipient,
-            amount_in_raw,
-            amount_out_min_raw,
-            path,
-            bool(UR_PAYER_IS_USER),
-        ],
-    )
+    # One V3_SWAP_EXACT_IN per pool leg - a split has several, everything else one
+    if opp.split is not None:
+        legs = [
+            (leg_route.tokens, leg_route.tick_spacings, leg_in, leg_out)
+            for leg_route, leg_in, leg_out in opp.split
+        ]
+    else:
+        legs = [(tokens, tick_spacings, amount_in_raw, amount_out_min_raw)]
+
+    commands = bytes([int(UR_COMMAND_V3_SWAP_EXACT_IN)] * len(legs))
+    inputs = []
+    paths = []
+    for leg_tokens, leg_tick_spacings, leg_in, leg_out_min in legs:
+        # Same encoder as the quoter - single and multi-hop
+        path = encode_v3_path(leg_tokens, leg_tick_spacings)
+        paths.append(path)
+        inputs.append(abi_encode(
+            ["address", "uint256", "uint256", "bytes", "bool"],
+            [
+                recipient,
+                int(leg_in),
+                int(leg_out_min),
+                path,
+                bool(UR_PAYER_IS_USER),
+            ],
+        ))
 
     call_data = abi_encode(
         ["bytes", "bytes[]", "uint256"],
-        [commands, [input_bytes], int(deadline)],
+        [commands, inputs, int(deadline)],
     )
-    selector = keccak(text="execute(bytes,bytes[],uint256)")[:4]
-    data = "0x" + (selector + call_data).hex()
+    data = "0x" + (UR_EXECUTE_SELECTOR + call_data).hex()
 
     return {
         "to": router_address,
         "data": data,
         "value": 0,
         "deadline": int(deadline),
-        "commands": Web3.to_hex(commands),
-        "inputs": [Web3.to_hex(input_bytes)],
-        "path": Web3.to_hex(path),
-        "token_in": Web3.to_checksum_address(token_in),
-        "token_out": Web3.to_checksum_address(token_out),
+        "commands": "0x" + commands.hex(),
+        "inputs": ["0x" + input_bytes.hex() for input_bytes in inputs],
+        "path": "0x" + paths[0].hex() if len(paths) == 1 else ["0x" + path.hex() for path in paths],
+        "token_in": to_checksum_address(token_in),
+        "token_out": to_checksum_address(token_out),
         "amount_in_raw": amount_in_raw,
         "amount_out_min_raw": amount_out_min_raw,
         "recipient": recipient,
         "payer_is_user": bool(UR_PAYER_IS_USER),
-        "tick_spacing": int(POOL_TICK_SPACING),
-    }
-
-
-# Cost of 1 pool quote token as 1 dollar
-def compute_quote_price_usd(
-    base_price_quote: Decimal,
-    native_price_quote: Decimal,
-) :
-    # quote token already USDC - pegged
-    if POOL_QUOTE_SYMBOL == GAS_QUOTE_SYMBOL:
-        return Decimal("1")
-    # quote token is native gas so native_price_quote is weth/usdc - pegged
-    if POOL_QUOTE_SYMBOL in {NATIVE_SYMBOL, "WETH"}:
-        return native_price_quote
-    
-    # Consider WETH/WBTC - need to approx convert WBTC to USD for pnl
-    # native_price_quote (gas stream weth/usdc) represents USDC per ETH
-    # base_price_quote (pair stream weth/wbtc) - so need approx USDC per WBTC
-    # (weth/usdc) / (weth/wbtc) = wbtc/usdc - can now convert to $
-    # This is all infinitely easier if I had pricing for everything separately
-    if POOL_BASE_SYMBOL in {NATIVE_SYMBOL, "WETH"}:
-        if base_price_quote <= 0:
-            return None
-        return native_price_quote / base_price_quote
-    # no conversion path from quote to USD
-    return None
-
-
-def compute_profit_token_usd(
-    opp: ArbitrageOpportunity,
-    base_price_quote: Decimal,
-    quote_price_usd: Decimal,
-) :
-    if opp.profit_token == POOL_QUOTE_SYMBOL:
-        return opp.gross_profit_token * quote_price_usd
-    if opp.profit_token == POOL_BASE_SYMBOL:
-        return opp.gross_profit_token * base_price_quote * quote_price_usd
-    return Decimal("0")
-
-
-def compute_gas_cost_usd(
-    opp: ArbitrageOpportunity,
-    quote_price_usd: Decimal,
-) :
-    return opp.gas_cost_quote * quote_price_usd
-
-
-def compute_net_profit_usd(
-    opp: ArbitrageOpportunity,
-    base_price_quote: Decimal,
-    quote_price_usd: Decimal,
-) :
-    return compute_profit_token_usd(opp, base_price_quote, quote_price_usd) - compute_gas_cost_usd(
-        opp, quote_price_usd
-    )
-
-
-def format_best_trade(
-    opp: ArbitrageOpportunity,
-    base_price_quote: Decimal,
-    quote_price_usd: Decimal,
-    tx_payload: dict,
-) :
-    data = format_opportunity(opp, base_price_quote, quote_price_usd)
-    data["tx"] = {
-        "to": tx_payload.get("to"),
-        "data": tx_payload.get("data"),
+        "tick_spacing": (
+            int(tick_spacings[0]) if len(tick_spacings) == 1 else list(tick_spacings)
+        ),
+        "route": (
+            ["/".join(leg_route.pool_keys) for leg_route, _, _ in opp.split]
+            if opp.split is not None
+            else "/".join(route.pool_keys) if route is not None else None
+        ),
     }
-    return data
-
-
-def log_best_trade(
-    opp: ArbitrageOpportunity,
-    base_price_quote: Decimal,
-    quote_price_usd: Decimal,
-    tx_payload: dict,
-) :
-    data = format_best_trade(opp, base_price_quote, quote_price_usd, tx_payload)
-    line = dumps(data)
-    with open(BEST_TRADE_LOG_PATH, "a") as f:
-        f.write(line + "\n")
-
-
-def log_opportunity(
-    opp: ArbitrageOpportunity,
-    base_price_quote: Decimal,
-    quote_price_usd: Decimal,
-) :
-    data = format_opportunity(opp, base_price_quote, quote_price_usd)
-    line = dumps(data)
-    with open(LOG_PATH, "a") as f:
-        f.write(line + "\n")
 
 
-def print_opportunity_summary(
-    opp: ArbitrageOpportunity,
-    base_price_quote: Decimal,
-    quote_price_usd: Decimal,
-) :
-    if opp.direction == Direction.DEX_BUY_CEX_SELL:
+def print_opportunity_summary(report: BlockReport, i: int) :
+    batch = report.batch
+    units = batch.units
+    if batch.direction[i] == DEX_BUY_CEX_SELL:
         direction_str = "DEX(buy)->CEX(sell)"
-    elif opp.direction == Direction.DEX_SELL_CEX_BUY:
-        direction_str = "DEX(sell)->CEX(buy)"
+        size_token = batch.quote_symbol
+        size_value = format(batch.dex_amount_in_raw[i] / units.quote_unit, ".2f")
     else:
-        direction_str = opp.direction.value
-    size_token = opp.dex_quote.token_in
-    size_precision = ".2f" if size_token == POOL_QUOTE_SYMBOL else ".4f"
-    size_value = format(opp.dex_quote.amount_in, size_precision)
-    cex_price = opp.cex_quote.average_price
-    net_profit_usd = compute_net_profit_usd(opp, base_price_quote, quote_price_usd)
-    if opp.dex_quote.token_in == POOL_QUOTE_SYMBOL:
-        notional_quote = opp.dex_quote.amount_in
-    elif opp.dex_quote.token_in == POOL_BASE_SYMBOL:
-        notional_quote = opp.dex_quote.amount_in * base_price_quote
-    else:
-        notional_quote = Decimal("0")
-    notional_usd = notional_quote * quote_price_usd
-    gas_cost_usd = compute_gas_cost_usd(opp, quote_price_usd)
-    profit_bps = None
-    capital_usd = notional_usd + gas_cost_usd
-    if capital_usd > 0:
-        profit_bps = (net_profit_usd / capital_usd) * Decimal("10000")
+        direction_str = "DEX(sell)->CEX(buy)"
+        size_token = batch.base_symbol
+        size_value = format(batch.dex_amount_in_raw[i] / units.base_unit, ".4f")
+    dex_price_fx, cex_price_fx = report.prices_fx(i)
+    net_profit_usd_fx = report.net_profit_usd_fx[i]
+    profit_bps = report.profit_bps[i]
     bps_str = f"{profit_bps:.2f}" if profit_bps is not None else "n/a"
-    profit_indicator = "+" if net_profit_usd > 0 else ""
+    profit_indicator = "+" if net_profit_usd_fx > 0 else ""
+    # Only called out when the DEX leg left the configured pool
+    route = batch.route(i)
+    split = batch.split(i)
+    route_str = ""
+    if split is not None:
+        amount_in_raw = batch.dex_amount_in_raw[i]
+        route_str = " split=" + ",".join(
+            f"{'/'.join(leg_route.pool_keys)}:{leg_in * 100 // amount_in_raw}%"
+            for leg_route, leg_in, _ in split
+        )
+    elif route is not None and route.pool_keys != (ACTIVE_POOL,):
+        route_str = f" route={'/'.join(route.pool_keys)}"
 
     print(
-        f"[arb] block={opp.block_number} "
+        f"[arb] block={batch.block_number} "
         f"dir={direction_str} "
         f"size={size_value}{size_token} "
-        f"dex_px={opp.dex_price:.6f} "
-        f"cex_px={cex_price:.6f} "
-        f"gas=${gas_cost_usd:.6f} "
-        f"pnl={profit_indicator}${net_profit_usd:.6f} "
+        f"dex_px={dex_price_fx / FIXED_SCALE:.6f} "
+        f"cex_px={cex_price_fx / FIXED_SCALE:.6f} "
+        f"gas=${report.gas_cost_usd_fx[i] / FIXED_SCALE:.6f} "
+        f"pnl={profit_indicator}${net_profit_usd_fx / FIXED_SCALE:.6f} "
         f"bps={bps_str}"
+        f"{route_str}"
     )
 
 
-def load_pool_abi() :
-    abi_path = os.path.join(os.path.dirname(__file__), "abis", "v3_abi.json")
-    with open(abi_path, "r", encoding="utf-8") as abi_file:
-        return json.load(abi_file)
+# Re-fills the best trade's hedge against the book that was in force when the
+# hedge would have landed - runs once that moment has passed, so the book is known
+def report_hedge_fill(exec_sim: CEXExecutionSimulator, opp: ArbitrageOpportunity, decision_ts: float) :
+    cex = opp.cex_quote
+    if opp.direction == Direction.DEX_BUY_CEX_SELL:
+        fill = exec_sim.fill_sell_at(decision_ts, cex.amount_in_raw)
+    else:
+        fill = exec_sim.fill_buy_at(decision_ts, cex.amount_in_raw)
+    if fill is None:
+        print(f"[hedge] block={opp.block_number} no book at +{CEX_HEDGE_LATENCY_MS:.0f}ms")
+        return
+    _, realized_out = fill
+    expected_out = cex.amount_out_raw
+    slip_bps = (realized_out - expected_out) * 10000 / expected_out if expected_out else 0.0
+    print(
+        f"[hedge] block={opp.block_number} +{CEX_HEDGE_LATENCY_MS:.0f}ms "
+        f"expected={expected_out} realized={realized_out} slip={slip_bps:+.2f}bps"
+    )
 
 
-def check_pool_tick_spacing() :
-    web3 = Web3(Web3.HTTPProvider(LINEA_RPC))
-    contract = web3.eth.contract(
-        address=Web3.to_checksum_address(POOL_ADDRESS),
-        abi=load_pool_abi(),
-    )
-    tick_spacing = contract.functions.tickSpacing().call()
+# One open + write per block per log file
+def write_log_lines(path: str, lines: list) :
+    if not lines:
+        return
+    with open(path, "ab") as f:
+        f.write(b"".join(lines))
+
+
+def process_opportunities(
+    batch: EvaluationBatch,
+    base_price_quote_fx: int,
+    quote_price_usd_fx: int,
+    block_timestamp: int,
+    log_all: bool = LOG_ALL_EVALUATIONS,
+    hedge_sim: CEXExecutionSimulator = None,
+    planner: QuotePlanner = None,
+    executor: TradeExecutor = None,
+) :
+    found = 0
+    if batch is None or len(batch) == 0:
+        return found
+
+    # USD metrics computed once per row; each row is serialized once and
+    # the same bytes go to the evaluation log and the best-trade log
+    report = BlockReport(batch, base_price_quote_fx, quote_price_usd_fx)
+    if planner is not None:
+        planner.record(batch, report.is_profitable)
+
+    # Log and print opportunities
+    lines = []
+    for i in range(len(report)):
+        if report.is_profitable[i]:
+            found += 1
+            print_opportunity_summary(report, i)
+        elif not log_all:
+            continue
+        lines.append(report.row_bytes(i) + b"\n")
+    write_log_lines(LOG_PATH, lines)
+
+    # Build and log best trade per block (profitable only) - the only row
+    # materialized into a full model object
+    if report.best_index is not None:
+        decided_at = time.perf_counter()
+        best_opp = batch.materialize(report.best_index)
+        best_opp.is_profitable = True
+        deadline = int(block_timestamp + UR_DEADLINE_SECONDS)
+        tx_payload = build_universal_router_exact_in_tx(best_opp, deadline)
+        if tx_payload:
+            if executor is not None:
+                executor.submit(best_opp, tx_payload, decided_at)
+            write_log_lines(
+                BEST_TRADE_LOG_PATH,
+                [report.best_trade_bytes(tx_payload) + b"\n"],
+            )
+        if hedge_sim is not None and hedge_sim.history is not None:
+            asyncio.get_running_loop().call_later(
+                hedge_sim.hedge_latency_s,
+                report_hedge_fill,
+                hedge_sim,
+                best_opp,
+                batch.timestamp,
+            )
+
+    return found
 
+
+# (cached quotes are this block's, and they still cover the book - no direction
+# pruned at the header has opened since)
+def cached_quotes_cover(
+    evaluator: ArbitrageEvaluator,
+    block_number: int,
+    block_hash: str,
+    pool_band,
+    book,
+) :
+    cached = evaluator.cached_block
+    if cached is None or cached["block_number"] != block_number or cached.get("block_hash") != block_hash:
+        return False, False
+    return True, not evaluator.pruned_direction_opened(pool_band, book.best_bid, book.best_ask)
+
+
+# Re-run the CEX leg on every pair book update against the current block's DEX quotes.
+# No RPC unless the book crosses a band the header didn't - a few integer fills
+# per cached size, so it keeps up with 100ms books. That re-quote goes through
+# the same plan and scheduler as the header: charged to the RPC budget, cut by
+# the block's deadline or a newer header, and not started once either has passed
+async def sub_block_loop(
+    evaluator: ArbitrageEvaluator,
+    binance_pair: BinanceOrderbookStream,
+    binance_gas: BinanceOrderbookStream,
+    block_context: dict,
+    stats: dict,
+    scheduler: EvalScheduler,
+    planner: QuotePlanner,
+    http_budget: RpcBudget,
+    executor: TradeExecutor = None,
+) :
+    min_interval = SUB_BLOCK_MIN_INTERVAL_MS / 1000
+    last_book_ts = 0.0
+
+    while True:
+        book = await binance_pair.wait_for_update()
+        if not book:
+            continue
+        book_ts = book.local_ts
+
+        if block_context["block_number"] is None or block_context["evaluating"]:
+            continue
+        # Book already seen by the block evaluation or a previous tick
+        if book_ts <= block_context["book_ts"] or book_ts <= last_book_ts:
+            continue
+        if book_ts - last_book_ts < min_interval:
+            continue
+        last_book_ts = book_ts
+
+        bids, asks = book.bids, book.asks
+
+        # O(1) screen - nothing to do while the book sits inside the band
+        band = block_context["band"]
+        if band is not None and not band.is_crossed(book.best_bid, book.best_ask):
+            stats["band_skips"] += 1
+            continue
+
+        # Mids are cached on the snapshots - no per-tick recompute
+        base_price_quote_fx = book.depth_weighted_mid(DEPTH_WEIGHTED_LEVELS)
+        native_price_quote_fx = binance_gas.depth_weighted_mid(DEPTH_WEIGHTED_LEVELS)
+        if base_price_quote_fx is None or native_price_quote_fx is None:
+            continue
+        quote_price_usd_fx = compute_quote_price_usd(base_price_quote_fx, native_price_quote_fx)
+        if quote_price_usd_fx is None:
+            continue
+
+        # This block's fields - the header loop may replace them during a re-quote
+        block_number = block_context["block_number"]
+        block_hash = block_context["block_hash"]
+        block_timestamp = block_context["block_timestamp"]
+        entry = block_context["entry"]
+        pool_band = block_context["pool_band"]
+
+        current, covers = cached_quotes_cover(evaluator, block_number, block_hash, pool_band, book)
+        requoted = False
+        if not covers:
+            # Book crossed the band (or a pruned direction's bound) after the
+            # header - quote this block now, if it still has time and calls left
+            deadline = scheduler.deadline(block_timestamp)
+            superseded = block_context["superseded"]
+            plan = None
+            if not superseded.is_set() and (deadline is None or time.time() < deadline):
+                # The block's own ranking - a tick doesn't move the planner's per-block state
+                plan = planner.select(http_budget.allowance())
+                requoted = plan is None or len(plan) > 0
+            if requoted:
+                async with block_context["eval_lock"]:
+                    # The header loop may have moved on while this waited
+                    if superseded.is_set():
+                        continue
+                    # or quoted this block itself - its quotes are used as they are
+                    current, covers = cached_quotes_cover(evaluator, block_number, block_hash, pool_band, book)
+                    requoted = not covers
+                    if requoted:
+                        batch, _, _, _ = await scheduler.evaluate(
+                            block_number=block_number,
+                            block_timestamp=block_timestamp,
+                            block_hash=block_hash,
+                            bids=bids,
+                            asks=asks,
+                            gas_price_wei=block_context["gas_price_wei"],
+                            base_price_quote_fx=base_price_quote_fx,
+                            native_price_quote_fx=native_price_quote_fx,
+                            book_timestamp=book_ts,
+                            plan=plan,
+                            band=pool_band,
+                            newer_block=superseded,
+                        )
+            else:
+                stats["requotes_skipped"] += 1
+                if not current:
+                    continue
+        if not requoted:
+            batch = evaluator.evaluate_cex_leg(
+                bids,
+                asks,
+                book_timestamp=book_ts,
+                log_skips=False,
+            )
+        stats["evals"] += 1
+        found = process_opportunities(
+            batch,
+            base_price_quote_fx,
+            quote_price_usd_fx,
+            block_timestamp,
+            log_all=SUB_BLOCK_LOG_ALL,
+            hedge_sim=evaluator.exec_sim,
+            planner=planner if requoted else None,
+            executor=executor,
+        )
+        stats["opportunities_found"] += found
+        if entry is not None:
+            entry.opportunities += found
+
+        # Hand control back so header processing is never starved
+        await asyncio.sleep(0)
+
+
+# A header replaced blocks we already evaluated. Their rows stay in the log, so
+# record which hashes were orphaned and what was found on them, and drop any
+# quotes taken against the losing fork
+def handle_reorg(
+    entry: BlockEntry,
+    orphaned: list,
+    evaluator: ArbitrageEvaluator,
+    block_context: dict,
+) :
     print(
-        f"[main] Pool tickSpacing={tick_spacing} "
+        f"[reorg] num={entry.number} hash={entry.hash[:10]} orphaned "
+        + " ".join(f"{old.number}:{old.hash[:10]}" for old in orphaned)
+    )
+    write_log_lines(REORG_LOG_PATH, [dumps_bytes({
+        "type": "reorg",
+        "timestamp": entry.received_at,
+        "block": entry.number,
+        "block_hash": entry.hash,
+        "parent_hash": entry.parent_hash,
+        "orphaned": [
+            {
+                "block": old.number,
+                "block_hash": old.hash,
+                "opportunities": old.opportunities,
+                "rows_logged": old.rows_logged,
+            }
+            for old in orphaned
+        ],
+    }) + b"\n"])
+
+    orphaned_hashes = {old.hash for old in orphaned}
+    cached = evaluator.cached_block
+    if cached is not None and cached.get("block_hash") in orphaned_hashes:
+        evaluator.cached_block = None
+    if block_context["block_hash"] in orphaned_hashes:
+        # Sub-block loop idles until the replacement block is evaluated
+        block_context["block_number"] = None
+        block_context["block_hash"] = None
+        block_context["entry"] = None
+        block_context["band"] = None
+
+
+def check_pool_metadata(metadata: dict, errors: list, from_cache: bool) :
+    source = f"cache ({POOL_METADATA_CACHE_PATH})" if from_cache else "chain"
+    print(
+        f"[main] Pool tickSpacing={metadata['tick_spacing']} "
+        f"fee={metadata['fee_pips']} "
+        f"decimals={metadata['base_decimals']}/{metadata['quote_decimals']} "
+        f"from {source} "
         f"(config POOL_TICK_SPACING={POOL_TICK_SPACING})"
     )
-    if tick_spacing != POOL_TICK_SPACING:
-        print("[main] WARNING: Pool tickSpacing does not match config")
+    for error in errors:
+        print(f"[main] WARNING: {error}")
+    if errors:
         return False
 
-    print("[main] Pool tickSpacing confirmed")
+    print("[main] Pool metadata confirmed")
     return True
 
 
+# Head block for checkpoint freshness - None just means block-pinned state isn't restored
+async def read_head_block(linea: LineaRpcClient) :
+    try:
+        return await linea.eth_block_number()
+    except Exception as e:
+        print(f"[main] eth_blockNumber failed: {e}")
+        return None
+
+
+# Runs in a worker thread: web3 import + HTTP client build + reachability
+# check all block, so they overlap with the websocket handshakes instead
+def build_quoter(budget: RpcBudget = None) :
+    quoter = QuoterV2Client(budget=budget)
+    return quoter, quoter.is_connected
+
+
+# Band for this block from the pool's slot0 price - None means evaluate everything
+def compute_price_band(
+    block_number: int,
+    pool_state: PoolStateClient,
+    band_calc: PriceBandCalculator,
+    evaluator: ArbitrageEvaluator,
+    gas_price_wei: int,
+    base_price_quote_fx: int,
+    native_price_quote_fx: int,
+) :
+    gas_price_quote_fx = evaluator.gas_price_in_quote(
+        base_price_quote_fx, native_price_quote_fx
+    )
+    if gas_price_quote_fx is None:
+        return None
+    try:
+        dex_price_fx = pool_state.read_marginal_price(block_number)
+        pool_fee_pips = pool_state.fee()
+    except Exception as e:
+        print(f"[main] slot0 read failed, evaluating without band: {e}")
+        return None
+    gas_cost_quote_raw = evaluator.gas_calc.calculate_gas_cost_quote(
+        gas_price_wei, gas_price_quote_fx, evaluator.units
+    )
+    return band_calc.compute(block_number, dex_price_fx, pool_fee_pips, gas_cost_quote_raw)
+
+
 async def main() :
     print("=" * 60)
     print("Binance-Etherex CEX-DEX Arbitrage Bot")
@@ -351,51 +555,212 @@ async def main() :
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
-    linea = LineaRpcClient()
-    binance_pair = BinanceOrderbookStream(BINANCE_WS_PAIR, label="pair")
-    binance_gas = BinanceOrderbookStream(BINANCE_WS_GAS, label="gas")
-    quoter = QuoterV2Client()
-    exec_sim = CEXExecutionSimulator()
-    gas_calc = GasCostCalculator()
-    evaluator = ArbitrageEvaluator(quoter, exec_sim, gas_calc)
-
+    # Stack sampling on demand: PROFILE_SAMPLING=1, or `kill -USR1 <pid>` to toggle
+    sampler = StackSampler(loop=asyncio.get_running_loop())
+    if PROFILE_SAMPLING:
+        sampler.start()
+
+    def profile_handler(sig, frame):
+        enabled = sampler.toggle()
+        print(f"[profile] stack sampling {'on' if enabled else 'off'}")
+
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, profile_handler)
+    block_profiler = SlowBlockProfiler()
+    alloc_tracker = AllocationTracker()
+    gc_control = GcController()
+
+    timer = StartupTimer(PROCESS_START)
+    timer.mark("imports")
+
+    # Request spend per provider - quotes and pool reads go over HTTP, the rest over WSS
+    http_budget = RpcBudget("http", RPC_BUDGET_DAILY_CALLS, RPC_BUDGET_PER_SECOND)
+    wss_budget = RpcBudget("wss", WSS_BUDGET_DAILY_CALLS)
+    linea = LineaRpcClient(budget=wss_budget)
+    # Both streams share one feed thread - parsing stays off the header path
+    feed_thread = None
+    if BINANCE_FEED_MODE == "thread":
+        feed_thread = FeedThread()
+        feed_thread.start()
+        print(f"[main] Binance feed on its own thread ({feed_thread.loop_name} loop)")
+    # Recent pair books, for filling hedges at the time they would land
+    pair_history = BookHistory()
+    if CEX_VENUES:
+        # Binance plus the other venues, merged into one pair book that is
+        # used everywhere the Binance pair stream would be
+        venue_streams = [BinanceOrderbookStream(BINANCE_WS_PAIR, label="pair", feed_thread=feed_thread)]
+        venue_streams += [
+            VENUE_STREAMS[venue](label="pair", feed_thread=feed_thread) for venue in CEX_VENUES
+        ]
+        binance_pair = ConsolidatedBook(venue_streams, label="pair", history=pair_history)
+        print(f"[main] consolidated pair book over binance,{','.join(CEX_VENUES)}")
+    else:
+        binance_pair = BinanceOrderbookStream(
+            BINANCE_WS_PAIR,
+            label="pair",
+            feed_thread=feed_thread,
+            history=pair_history,
+        )
+    binance_gas = BinanceOrderbookStream(BINANCE_WS_GAS, label="gas", feed_thread=feed_thread)
+
+    # Quoter build starts first - it's the slowest step and needs no sockets
+    quoter_task = asyncio.create_task(
+        timer.run("quoter init", asyncio.to_thread(build_quoter, http_budget))
+    )
     await asyncio.gather(
-        linea.connect(),
+        timer.run("linea connect", linea.connect()),
         binance_pair.connect(),
         binance_gas.connect(),
     )
+    # First books are timed from here, arriving while the checks below run
+    books_ready = asyncio.ensure_future(
+        timer.run(
+            "binance first books",
+            asyncio.gather(binance_pair.wait_until_ready(), binance_gas.wait_until_ready()),
+        )
+    )
+
+    # On-chain checks go out as one batch while the quoter is still building
+    (
+        (quoter, quoter_connected),
+        (metadata, errors, from_cache),
+        block_queue,
+        head_block,
+        checkpoint,
+    ) = await asyncio.gather(
+        quoter_task,
+        timer.run("pool metadata", resolve_pool_metadata(linea)),
+        timer.run("subscribe newHeads", linea.subscribe_new_heads()),
+        timer.run("head block", read_head_block(linea)),
+        timer.run("load checkpoint", asyncio.to_thread(load_checkpoint)),
+    )
+    print("[main] Subscribed to new block headers")
 
     # Verify quoter connection
-    if not quoter.is_connected:
+    if not quoter_connected:
         print("[main] ERROR: Cannot connect to Linea RPC for QuoterV2")
         return
 
-    if not check_pool_tick_spacing():
-        print("[main] ERROR: Pool tickSpacing mismatch; aborting")
+    if not check_pool_metadata(metadata, errors, from_cache):
+        print("[main] ERROR: Pool metadata mismatch; aborting")
         return
 
-    # Subscribe to new blocks
-    block_queue = await linea.subscribe_new_heads()
-    print("[main] Subscribed to new block headers")
-
-    # Wait for first orderbook update
+    pool_state = PoolStateClient(web3=quoter.web3, fee_pips=metadata["fee_pips"])
+    # Bounds must hold for the cheapest venue a hedge can fill on
+    band_calc = PriceBandCalculator(
+        taker_fee_bps=min(CEX_VENUE_FEES_BPS[venue] for venue in ["binance"] + CEX_VENUES)
+    )
+    exec_sim = CEXExecutionSimulator(history=pair_history, venue_fees=CEX_VENUE_FEES_BPS)
+    gas_calc = GasCostCalculator()
+    evaluator = ArbitrageEvaluator(quoter, exec_sim, gas_calc)
+    planner = QuotePlanner(evaluator)
+    scheduler = EvalScheduler(evaluator, planner, profiler=block_profiler)
+    executor = None
+    if EXECUTION_ENABLED:
+        executor = TradeExecutor(Broadcaster(), gas_calc)
+        error = await executor.start()
+        if error is not None:
+            print(f"[exec] execution disabled: {error}")
+            await executor.close()
+            executor = None
+    print(
+        f"[main] Routes: {len(evaluator.buy_routes)} buy / {len(evaluator.sell_routes)} sell "
+        f"candidates, up to {evaluator.max_hops} hops"
+    )
+    # The band is built from the configured pool alone, so it can't screen other routes
+    use_price_band = PRICE_BAND_ENABLED and not evaluator.has_alternative_routes
+    if PRICE_BAND_ENABLED and not use_price_band:
+        print("[main] Price band disabled: alternative routes beyond the configured pool")
+    # Same bounds per direction - a losing direction isn't quoted at all
+    use_pruning = DIRECTION_PRUNING and not evaluator.has_alternative_routes
+
+    # Block the cached DEX quotes belong to, shared with the sub-block loop
+    block_context = {
+        "block_number": None,
+        "block_hash": None,
+        "block_timestamp": None,
+        "book_ts": 0.0,
+        "gas_price_wei": None,
+        "band": None,
+        # Pool price bounds behind direction pruning - the band itself when screening
+        "pool_band": None,
+        "entry": None,
+        # Set while the header evaluation is quoting - it yields between quotes
+        "evaluating": False,
+        # Held by whichever of the header loop and a sub-block re-quote is quoting
+        "eval_lock": asyncio.Lock(),
+        # Set when a newer header arrives - replaced with each block
+        "superseded": asyncio.Event(),
+    }
+    # Recent headers by hash, with what was evaluated on each - detects reorgs
+    block_ring = BlockRing()
+    # Last successful eth_gasPrice read
+    last_gas = {"block_number": None, "gas_price_wei": None}
+    streams = {"pair": binance_pair, "gas": binance_gas}
+
+    # Warm state from the last run - each component only if still fresh
+    with timer.phase("restore checkpoint"):
+        restored = restore_warm_state(
+            checkpoint,
+            head_block,
+            evaluator,
+            pool_state,
+            streams,
+            block_context,
+            last_gas,
+        )
+    for component, outcome in restored.items():
+        print(f"[state] {component}: {outcome}")
+
+    # Wait for first orderbook update on both streams
     print("[main] Waiting for Binance orderbook...")
-    while (
-        not binance_pair.is_connected()
-        or binance_pair.last_update_time() == 0
-        or not binance_gas.is_connected()
-        or binance_gas.last_update_time() == 0
-    ):
-        await asyncio.sleep(0.1)
-        if shutdown_event.is_set():
-            return
+    shutdown_wait = asyncio.ensure_future(shutdown_event.wait())
+    await asyncio.wait({books_ready, shutdown_wait}, return_when=asyncio.FIRST_COMPLETED)
+    books_ready.cancel()
+    shutdown_wait.cancel()
+    if shutdown_event.is_set():
+        return
 
+    # What is alive now lives for the whole run - keep it out of collections
+    with timer.phase("gc freeze"):
+        gc_control.start()
+    timer.report()
+    alloc_tracker.start_tracing()
     print("[main] Ready. Starting arbitrage evaluation loop...")
     print("-" * 60)
 
     blocks_processed = 0
     opportunities_found = 0
-    last_eval = 0.0
+
+    sub_block_stats = {"evals": 0, "band_skips": 0, "opportunities_found": 0, "requotes_skipped": 0}
+    band_skips = 0
+    stale_blocks = 0
+    sub_block_task = None
+    if SUB_BLOCK_EVAL:
+        sub_block_task = asyncio.create_task(
+            sub_block_loop(
+                evaluator,
+                binance_pair,
+                binance_gas,
+                block_context,
+                sub_block_stats,
+                scheduler,
+                planner,
+                http_budget,
+                executor,
+            ),
+            name="sub_block",
+        )
+
+    loop_lag = LoopLagMonitor()
+    loop_lag.start()
+
+    def capture() :
+        return capture_warm_state(evaluator, pool_state, streams, block_context, last_gas)
+
+    checkpoint_task = None
+    if WARM_STATE_PATH:
+        checkpoint_task = asyncio.create_task(checkpoint_loop(capture), name="checkpoint")
 
     try:
         while not shutdown_event.is_set():
@@ -407,78 +772,209 @@ async def main() :
                 )
             except asyncio.TimeoutError:
                 continue
+            # Set again by the next header - the scheduler waits on it
+            linea.notified.clear()
+            # Cuts a sub-block re-quote of the last block
+            block_context["superseded"].set()
 
             block_number = int(block["number"], 16)
             block_timestamp = int(block["timestamp"], 16)
             received_at = block.get("received_at")
+            block_hash = block.get("hash")
+
+            entry, orphaned = block_ring.add_header(
+                block_number,
+                block_hash,
+                block.get("parentHash"),
+                block_timestamp,
+                received_at,
+            )
+            if entry is None:
+                # Same header delivered twice
+                continue
+            if orphaned:
+                handle_reorg(entry, orphaned, evaluator, block_context)
             blocks_processed += 1
 
-
-            bids, asks = binance_pair.get_orderbook()
-            if not bids or not asks:
+            # One snapshot for the whole block - book, timestamp and mid agree
+            book = binance_pair.book
+            if not book:
                 continue
-
+            book_ts = book.local_ts
+            bids, asks = book.bids, book.asks
+
+            # Quoting the DEX against a stale CEX book finds spreads that are
+            # already gone - checked before any RPC is spent on the block
+            if BOOK_MAX_AGE_MS > 0:
+                now = time.time()
+                pair_age = binance_pair.book_age(now)
+                gas_age = binance_gas.book_age(now)
+                max_age_s = BOOK_MAX_AGE_MS / 1000
+                if pair_age > max_age_s or gas_age is None or gas_age > max_age_s:
+                    stale_blocks += 1
+                    gas_str = f"{gas_age * 1000:.0f}ms" if gas_age is not None else "none"
+                    print(
+                        f"[stale] num={block_number} pair_age={pair_age * 1000:.0f}ms "
+                        f"gas_age={gas_str} {BOOK_STALE_ACTION}"
+                    )
+                    if BOOK_STALE_ACTION == "skip":
+                        continue
+
+            # A same-height replacement reuses the orphaned block's gas price -
+            # only the DEX quotes need re-reading against the new hash
+            gas_price_wei = next(
+                (
+                    old.gas_price_wei
+                    for old in orphaned
+                    if old.number == block_number and old.gas_price_wei is not None
+                ),
+                None,
+            )
+            # Out of WSS budget - keep the calls for headers and use the last price
+            if gas_price_wei is None and wss_budget.allowance() == 0:
+                gas_price_wei = last_gas["gas_price_wei"]
+                if (
+                    gas_price_wei is None
+                    or block_number - last_gas["block_number"] > GAS_PRICE_MAX_AGE_BLOCKS
+                ):
+                    continue
             try:
-                gas_price_wei = await linea.eth_gas_price()
+                if gas_price_wei is None:
+                    gas_price_wei = await linea.eth_gas_price()
+                    last_gas["block_number"] = block_number
+                    last_gas["gas_price_wei"] = gas_price_wei
             except Exception:
-                continue
+                # Rate-limited or flaky RPC - reuse the last known gas price while recent
+                if (
+                    last_gas["block_number"] is None
+                    or block_number - last_gas["block_number"] > GAS_PRICE_MAX_AGE_BLOCKS
+                ):
+                    continue
+                gas_price_wei = last_gas["gas_price_wei"]
 
-            base_price_quote = binance_pair.depth_weighted_mid(DEPTH_WEIGHTED_LEVELS)
-            if base_price_quote is None:
+            base_price_quote_fx = book.depth_weighted_mid(DEPTH_WEIGHTED_LEVELS)
+            if base_price_quote_fx is None:
                 continue
 
-            native_price_quote = binance_gas.depth_weighted_mid(DEPTH_WEIGHTED_LEVELS)
-            if native_price_quote is None:
+            native_price_quote_fx = binance_gas.depth_weighted_mid(DEPTH_WEIGHTED_LEVELS)
+            if native_price_quote_fx is None:
                 continue
-            quote_price_usd = compute_quote_price_usd(base_price_quote, native_price_quote)
-            if quote_price_usd is None:
+            quote_price_usd_fx = compute_quote_price_usd(base_price_quote_fx, native_price_quote_fx)
+            if quote_price_usd_fx is None:
                 continue
 
-            # Evaluate opportunities
+            alloc_tracker.start()
+            block_profiler.start()
             eval_start = time.perf_counter()
-            opportunities = evaluator.evaluate_block(
-                block_number=block_number,
-                bids=bids,
-                asks=asks,
-                gas_price_wei=gas_price_wei,
-                base_price_quote=base_price_quote,
-                native_price_quote=native_price_quote,
-            )
-            last_eval = (time.perf_counter() - eval_start) * 1000
-
-            # Log and print opportunities
-            for opp in opportunities:
-                net_profit_usd = compute_net_profit_usd(
-                    opp, base_price_quote, quote_price_usd
+            # Header arrival to evaluation start - gas read plus any loop backlog
+            header_to_eval_str = "-"
+            if received_at is not None:
+                header_to_eval_str = f"{(time.time() - received_at) * 1000:.0f}ms"
+            rpc_before = http_budget.spent_total
+            plan_str = "-"
+            sched_str = "-"
+            band = None
+            pool_band = None
+            if use_price_band or use_pruning:
+                pool_band = compute_price_band(
+                    block_number,
+                    pool_state,
+                    band_calc,
+                    evaluator,
+                    gas_price_wei,
+                    base_price_quote_fx,
+                    native_price_quote_fx,
                 )
-                opp.is_profitable = net_profit_usd > 0
-                if opp.is_profitable:
-                    opportunities_found += 1
-                    print_opportunity_summary(opp, base_price_quote, quote_price_usd)
-                    log_opportunity(opp, base_price_quote, quote_price_usd)
-                elif LOG_ALL_EVALUATIONS:
-                    log_opportunity(opp, base_price_quote, quote_price_usd)
-
-            # Build and log best trade per block (profitable only)
-            best_opp = None
-            best_profit_usd = None
-            for opp in opportunities:
-                profit_usd = compute_net_profit_usd(
-                    opp, base_price_quote, quote_price_usd
+            if use_price_band:
+                band = pool_band
+            if not use_pruning:
+                pool_band = None
+
+            entry.gas_price_wei = gas_price_wei
+            if executor is not None:
+                executor.update_gas_price(gas_price_wei)
+            entry.book_ts = book_ts
+            entry.bids = bids
+            entry.asks = asks
+            entry.band = band
+
+            block_context["block_number"] = block_number
+            block_context["block_hash"] = block_hash
+            block_context["block_timestamp"] = block_timestamp
+            block_context["book_ts"] = book_ts
+            block_context["gas_price_wei"] = gas_price_wei
+            block_context["band"] = band
+            block_context["pool_band"] = pool_band
+            block_context["entry"] = entry
+            block_context["superseded"] = asyncio.Event()
+
+            # Full evaluation only when the book crosses the no-arb band
+            if band is None or band.is_crossed(book.best_bid, book.best_ask):
+                # DEX mid for the spread - the slot0 price, else the last block's quotes
+                dex_mid_fx = (
+                    pool_band.dex_price_fx if pool_band is not None else evaluator.last_dex_mid_fx()
                 )
-                if profit_usd <= 0:
-                    continue
-                opp.is_profitable = True
-                if best_profit_usd is None or profit_usd > best_profit_usd:
-                    best_profit_usd = profit_usd
-                    best_opp = opp
-
-            if best_opp is not None:
-                base_ts = block_timestamp
-                deadline = int(base_ts + UR_DEADLINE_SECONDS)
-                tx_payload = build_universal_router_exact_in_tx(best_opp, deadline)
-                if tx_payload:
-                    log_best_trade(best_opp, base_price_quote, quote_price_usd, tx_payload)
+                # Quote only what this block's share of the RPC budget covers
+                plan = planner.plan(base_price_quote_fx, http_budget.allowance(), dex_mid_fx)
+                if plan is not None:
+                    plan_str = f"{len(plan)}/{len(planner.candidates)}"
+                # Best pairs first, stopping at the deadline or a newer header.
+                # Waits out a sub-block re-quote of the last block - already cut
+                async with block_context["eval_lock"]:
+                    block_context["evaluating"] = True
+                    try:
+                        batch, quoted, planned, stop_reason = await scheduler.evaluate(
+                            block_number=block_number,
+                            block_timestamp=block_timestamp,
+                            block_hash=block_hash,
+                            bids=bids,
+                            asks=asks,
+                            gas_price_wei=gas_price_wei,
+                            base_price_quote_fx=base_price_quote_fx,
+                            native_price_quote_fx=native_price_quote_fx,
+                            book_timestamp=book_ts,
+                            plan=plan,
+                            band=pool_band,
+                            newer_block=linea.notified,
+                        )
+                    finally:
+                        block_context["evaluating"] = False
+                sched_str = f"{quoted}/{planned}"
+                if stop_reason is not None:
+                    sched_str += f":{stop_reason}"
+                found = process_opportunities(
+                    batch,
+                    base_price_quote_fx,
+                    quote_price_usd_fx,
+                    block_timestamp,
+                    hedge_sim=exec_sim,
+                    planner=planner,
+                    executor=executor,
+                )
+                opportunities_found += found
+                entry.quotes = evaluator.cached_block
+                entry.opportunities += found
+                if SWEEP_CAPTURE_PATH and evaluator.cached_block is not None:
+                    gas_book = binance_gas.book
+                    write_log_lines(SWEEP_CAPTURE_PATH, [capture_bytes(
+                        block_number,
+                        block_timestamp,
+                        gas_price_wei,
+                        (bids, asks),
+                        (gas_book.bids, gas_book.asks),
+                        evaluator.cached_block,
+                        evaluator.route_index.routes,
+                    ) + b"\n"])
+                if batch is not None:
+                    entry.rows_logged += len(batch) if LOG_ALL_EVALUATIONS else found
+                eval_str = f"{(time.perf_counter() - eval_start) * 1000:.0f}ms"
+            else:
+                band_skips += 1
+                eval_str = "skip(band)"
+            profile_path = block_profiler.finish(block_number)
+            if profile_path is not None:
+                print(f"[profile] block {block_number} eval={eval_str} -> {profile_path}")
+            alloc_tracker.finish(block_number)
 
             now = time.time()
             block_age_ms = (now - block_timestamp) * 1000
@@ -488,24 +984,97 @@ async def main() :
             if received_at is not None:
                 recv_delay_ms = (received_at - block_timestamp) * 1000
             recv_delay_str = f"{recv_delay_ms:.0f}ms"
+            lag_max_ms, lag_mean_ms = loop_lag.take()
+            gc_count, gc_max_ms = gc_control.take()
             print(
                 f"[block] num={block_number} "
                 f"age={block_age_str} "
                 f"recv={recv_delay_str} "
-                f"pair_mid={base_price_quote:.6f} "
+                f"pair_mid={base_price_quote_fx / FIXED_SCALE:.6f} "
                 f"gas={gas_price_wei/1e9:.4f}gwei "
-                f"eval={last_eval:.0f}ms"
+                f"eval={eval_str} "
+                f"sub={sub_block_stats['evals']}/{sub_block_stats['band_skips']} "
+                f"h2e={header_to_eval_str} "
+                f"lag={lag_max_ms:.1f}/{lag_mean_ms:.1f}ms "
+                f"rpc={http_budget.spent_total - rpc_before} "
+                f"plan={plan_str} "
+                f"gc={gc_count}/{gc_max_ms:.1f}ms "
+                f"sched={sched_str}"
             )
+            sub_block_stats["evals"] = 0
+            sub_block_stats["band_skips"] = 0
+            # Block handled - the gap before the next one is where collection goes
+            gc_control.collect_idle()
 
     except Exception as e:
         print(f"[main] Error in main loop: {e}")
         raise
     finally:
         print("[main] Shutting down...")
+        if sub_block_task:
+            sub_block_task.cancel()
+            try:
+                await sub_block_task
+            except asyncio.CancelledError:
+                pass
+        if checkpoint_task:
+            checkpoint_task.cancel()
+            try:
+                await checkpoint_task
+            except asyncio.CancelledError:
+                pass
+            # Final checkpoint so a deploy restarts from the latest block
+            try:
+                write_checkpoint(capture())
+            except Exception as e:
+                print(f"[state] final checkpoint write failed: {e}")
+        opportunities_found += sub_block_stats["opportunities_found"]
+        sampler.stop()
+        await loop_lag.stop()
+        await gc_control.stop()
+        alloc_tracker.stop_tracing()
+        gc_stats = gc_control.stats
+        print(
+            f"[main] GC: {gc_stats['collections']} collections "
+            f"({gc_stats['idle']} idle, {gc_stats['automatic']} automatic), "
+            f"max pause {gc_stats['max_ms']:.1f}ms, total {gc_stats['total_ms']:.0f}ms"
+        )
         await linea.close()
+        if executor is not None:
+            await executor.close()
+            print(f"[main] Executions: {executor.stats}")
         await binance_pair.close()
         await binance_gas.close()
+        if feed_thread is not None:
+            feed_thread.stop()
+        if evaluator.splitter is not None:
+            evaluator.splitter.close()
         print(f"[main] Processed {blocks_processed} blocks, found {opportunities_found} profitable opportunities")
+        print(f"[main] Skipped {band_skips} blocks inside the no-arb band")
+        print(f"[main] Stale books at {stale_blocks} blocks ({BOOK_STALE_ACTION})")
+        for name, feed in streams.items():
+            for source in feed.sources():
+                stats = source.stats()
+                print(
+                    f"[feed] {source.venue}/{name} received={stats['received']} "
+                    f"processed={stats['processed']} dropped={stats['dropped']} "
+                    f"skew_ms={stats['offset_ms']} late_ms={stats['last_excess_ms']}"
+                )
+        print(f"[main] Reorgs seen: {block_ring.reorgs}")
+        for budget in (http_budget, wss_budget):
+            print(f"[main] RPC spend: {budget.snapshot()}")
+        if http_budget.limited:
+            print(f"[main] Quote plans: {planner.stats}")
+        print(f"[main] Eval schedule: {scheduler.stats}")
+        print(
+            f"[main] Sub-block re-quotes skipped (deadline, newer header or budget): "
+            f"{sub_block_stats['requotes_skipped']}"
+        )
+        if use_pruning:
+            print(
+                f"[main] Directions pruned: {evaluator.prune_stats[DEX_BUY_CEX_SELL]} DEX buy / "
+                f"{evaluator.prune_stats[DEX_SELL_CEX_BUY]} DEX sell"
+            )
         print("[main] Goodbye!")
 
 
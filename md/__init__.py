@@ -1,5 +1,19 @@
 
 from .linea_rpc import LineaRpcClient
+from .cex_stream import CexDepthStream
 from .binance_ws import BinanceOrderbookStream
+from .venues import OkxOrderbookStream, BybitOrderbookStream
+from .consolidated import ConsolidatedBook
+from .feed_thread import FeedThread
+from .rpc_budget import RpcBudget
 
-__all__ = ["LineaRpcClient", "BinanceOrderbookStream"]
+__all__ = [
+    "LineaRpcClient",
+    "CexDepthStream",
+    "BinanceOrderbookStream",
+    "OkxOrderbookStream",
+    "BybitOrderbookStream",
+    "ConsolidatedBook",
+    "FeedThread",
+    "RpcBudget",
+]
@@ -0,0 +1,295 @@
+import asyncio
+import json
+import time
+
+import websockets
+
+try:
+    import orjson
+
+    def loads(data):
+        return orjson.loads(data)
+except ImportError:
+
+    def loads(data):
+        return json.loads(data)
+
+from config import WS_MAX_QUEUE, WS_PING_INTERVAL, WS_PING_TIMEOUT, WS_RECONNECT_DELAY
+from models.types import OrderbookLevel
+from models.fixed_point import from_fixed, parse_fixed
+from md.clock import ClockSkewEstimator
+from md.feed_thread import FeedThread
+from orderbook.history import BookHistory
+from orderbook.snapshot import EMPTY_BOOK, BookSnapshot
+
+
+# [[price, qty, ...], ...] strings -> levels on one venue
+def parse_levels(raw_levels: list, venue: str) :
+    return tuple(
+        OrderbookLevel(
+            price=parse_fixed(raw_level[0]),
+            quantity=parse_fixed(raw_level[1]),
+            venue=venue,
+        )
+        for raw_level in raw_levels
+    )
+
+
+# Publishes a book as immutable BookSnapshots. The latest book is replaced by a
+# single attribute store, so a reader - on this loop or another thread - sees
+# the old book or the new one, never a mix, and can hold on to it without
+# copying. When books are built on a feed thread only a wake-up crosses back
+# to the main loop
+class BookFeed:
+    def __init__(self, label: str = "", history: BookHistory = None) :
+        self.label = label
+        self.book = EMPTY_BOOK
+        self.version = 0
+        # Every published book is also recorded here when given
+        self.history = history
+        self.main_loop = None
+        self.wake_pending = False
+        self.update_event = asyncio.Event()
+        # Set once on the first book, never cleared
+        self.ready_event = asyncio.Event()
+        # Fed by streams whose messages carry an exchange event time
+        self.clock = ClockSkewEstimator()
+
+    def last_update_time(self) :
+        return self.book.local_ts
+
+    # Seconds the current book has been out of date at `now`: since it was
+    # received, or - when the exchange stamps its events and the clock offset is
+    # known - since it was generated, less the fastest delivery seen. A book
+    # that arrived late or stopped updating (disconnect) ages either way
+    def book_age(self, now: float) :
+        book = self.book
+        if not book.local_ts:
+            return None
+        age = now - book.local_ts
+        generated = self.clock.to_local(book.exchange_ts)
+        if generated is not None:
+            age = max(age, now - generated)
+        return age
+
+    # The streams behind this book
+    def sources(self) :
+        return [self]
+
+    # Latest snapshot once a newer one has been published
+    async def wait_for_update(self) :
+        await self.update_event.wait()
+        self.update_event.clear()
+        return self.book
+
+    def publish(self, bids: tuple, asks: tuple, ts: float, exchange_ts: float = None) :
+        self.version += 1
+        self.book = BookSnapshot(self.version, bids, asks, ts, exchange_ts)
+
+    # Seed the book from a checkpoint - keeps its original timestamp so staleness
+    # stays visible, and is overwritten by the first live update
+    def restore_book(self, bids: list, asks: list, ts: float) :
+        if self.book.local_ts >= ts:
+            return
+        self.publish(tuple(bids), tuple(asks), ts)
+        self.ready_event.set()
+
+    async def wait_until_ready(self) :
+        await self.ready_event.wait()
+
+    # The snapshot's own level tuples - shared, not copied
+    def get_orderbook(self) :
+        book = self.book
+        return book.bids, book.asks
+
+    # Fixed-point quote per base, cached on the snapshot
+    def depth_weighted_mid(self, levels: int) :
+        return self.book.depth_weighted_mid(levels)
+
+    # Records the new book and wakes the main loop. Called where the book was built
+    def notify(self) :
+        if self.history is not None:
+            book = self.book
+            self.history.append(book.local_ts, book.bids, book.asks)
+        if self.main_loop is None:
+            self.wake()
+        elif not self.wake_pending:
+            # One wake-up in flight at a time - a burst of messages costs the
+            # main loop a single callback, which reads whichever book is latest
+            self.wake_pending = True
+            self.main_loop.call_soon_threadsafe(self.wake)
+
+    # Runs on the main loop
+    def wake(self) :
+        self.wake_pending = False
+        self.update_event.set()
+        self.ready_event.set()
+
+
+# One exchange's public depth websocket. A venue adapter says what to send once
+# connected and how to turn a message into (bids, asks, exchange_ts); the
+# connection, reconnects and publishing are shared. With a feed_thread the
+# websocket and parsing run there. A listener, when set, takes each new
+# snapshot on the parsing thread in place of the usual wake-up - and an empty
+# book when the connection drops, so nothing downstream keeps quoting a dead venue.
+#
+# Venues that push whole books are conflated: the socket is drained as fast as
+# it delivers and only the newest message is parsed once the parser gets a turn,
+# the ones it replaced counted as dropped. Delta feeds must apply every message
+# and set conflate = False
+class CexDepthStream(BookFeed):
+    venue = "cex"
+    conflate = True
+
+    def __init__(
+        self,
+        ws_url: str,
+        label: str = "",
+        feed_thread: FeedThread = None,
+        history: BookHistory = None,
+    ) :
+        super().__init__(label, history)
+        self.url = ws_url
+        self.connected = False
+        self.stream_task = None
+        self.feed_thread = feed_thread
+        self.listener = None
+        self.first_update_logged = False
+        # Raw messages off the socket, handed to the parser, and conflated away
+        self.messages = {"received": 0, "processed": 0, "dropped": 0}
+        self.pending = None
+        self.pending_event = None
+
+    async def connect(self) :
+        print(f"[{self.venue}] connecting to {self.url}")
+        if self.feed_thread is None:
+            self.stream_task = asyncio.create_task(self.stream_loop())
+            return
+        self.main_loop = asyncio.get_running_loop()
+        self.stream_task = self.feed_thread.submit(self.stream_loop())
+
+    async def close(self) :
+        if self.stream_task:
+            self.stream_task.cancel()
+            try:
+                if self.feed_thread is None:
+                    await self.stream_task
+                else:
+                    await asyncio.wrap_future(self.stream_task)
+            except asyncio.CancelledError:
+                pass
+        self.connected = False
+        print(f"[{self.venue}] stream stopped")
+
+    def is_connected(self) :
+        return self.connected
+
+    # Drops per-connection state before a (re)connect
+    def reset(self) :
+        pass
+
+    # JSON messages sent right after connecting (subscriptions)
+    def subscribe_messages(self) :
+        return []
+
+    # (bids, asks, exchange_ts) from one decoded message, or None to skip it
+    def parse(self, data) :
+        raise NotImplementedError
+
+    async def stream_loop(self) :
+        while True:
+            try:
+                async with websockets.connect(
+                    self.url,
+                    ping_interval=WS_PING_INTERVAL,
+                    ping_timeout=WS_PING_TIMEOUT,
+                    max_queue=WS_MAX_QUEUE,
+                    compression=None,
+                ) as ws:
+                    self.reset()
+                    for message in self.subscribe_messages():
+                        await ws.send(json.dumps(message))
+                    self.connected = True
+                    print(f"[{self.venue}] connected")
+
+                    if self.conflate:
+                        await self.read_conflated(ws)
+                    else:
+                        async for message in ws:
+                            self.messages["received"] += 1
+                            self.process_message(message)
+
+            except websockets.ConnectionClosed as e:
+                self.connected = False
+                print(f"[{self.venue}] connection closed: {e}")
+            except Exception as e:
+                self.connected = False
+                print(f"[{self.venue}] stream error: {e}")
+            if self.listener is not None:
+                self.listener(self, EMPTY_BOOK)
+
+            # Reconnect after delay
+            print(f"[{self.venue}] reconnecting in {WS_RECONNECT_DELAY}s...")
+            await asyncio.sleep(WS_RECONNECT_DELAY)
+
+    # Reader keeps only the newest message; the parser task takes it when it runs.
+    # Messages already buffered arrive back to back without a turn for the
+    # parser, so a backlog collapses to its last book
+    async def read_conflated(self, ws) :
+        self.pending = None
+        self.pending_event = asyncio.Event()
+        parser = asyncio.create_task(self.parse_latest())
+        try:
+            async for message in ws:
+                self.messages["received"] += 1
+                if self.pending is not None:
+                    self.messages["dropped"] += 1
+                self.pending = message
+                self.pending_event.set()
+        finally:
+            parser.cancel()
+
+    async def parse_latest(self) :
+        while True:
+            await self.pending_event.wait()
+            self.pending_event.clear()
+            message, self.pending = self.pending, None
+            if message is not None:
+                self.process_message(message)
+
+    # Message counters and clock estimate, for the shutdown report
+    def stats(self) :
+        return {**self.messages, **self.clock.snapshot()}
+
+    def process_message(self, message: str) :
+        self.messages["processed"] += 1
+        try:
+            parsed = self.parse(loads(message))
+            if parsed is None:
+                return
+            bids, asks, exchange_ts = parsed
+            if not bids or not asks:
+                return
+
+            local_ts = time.time()
+            if exchange_ts:
+                self.clock.add(local_ts, exchange_ts)
+            self.publish(bids, asks, local_ts, exchange_ts)
+            if self.listener is None:
+                self.notify()
+            else:
+                # The listener publishes downstream - nothing waits on this stream
+                self.listener(self, self.book)
+
+            # Log first update
+            if not self.first_update_logged:
+                self.first_update_logged = True
+                label = f"{self.label} " if self.label else ""
+                print(
+                    f"[{self.venue}] {label}first orderbook update: "
+                    f"best_bid={from_fixed(bids[0].price)} "
+                    f"best_ask={from_fixed(asks[0].price)}"
+                )
+
+        except Exception as e:
+            print(f"[{self.venue}] message parse error: {e}")
@@ -0,0 +1,47 @@
+from collections import deque
+
+from config import BOOK_SKEW_WINDOW
+
+
+# Exchange-to-local clock offset from event timestamps. Each sample is
+# local receive time minus exchange event time: clock offset plus that
+# message's delivery latency. The minimum over the recent window is the offset
+# plus the fastest delivery seen, so a sample's excess over it is how much later
+# than usual that message arrived. Kept with a monotonic deque - O(1) amortised
+# per sample. Written on the parsing thread; readers only load the floats
+class ClockSkewEstimator:
+    def __init__(self, window: int = BOOK_SKEW_WINDOW) :
+        self.window = max(1, int(window))
+        self.count = 0
+        # (sample index, offset_s) with increasing offsets - the front is the window minimum
+        self.minima = deque()
+        # Window minimum and latest sample, seconds; None until the first sample
+        self.offset_s = None
+        self.last_s = None
+
+    def add(self, local_ts: float, exchange_ts: float) :
+        sample = local_ts - exchange_ts
+        minima = self.minima
+        while minima and minima[-1][1] >= sample:
+            minima.pop()
+        minima.append((self.count, sample))
+        if minima[0][0] <= self.count - self.window:
+            minima.popleft()
+        self.count += 1
+        self.last_s = sample
+        self.offset_s = minima[0][1]
+
+    # Exchange timestamp on the local clock, or None without an estimate
+    def to_local(self, exchange_ts: float) :
+        if self.offset_s is None or not exchange_ts:
+            return None
+        return exchange_ts + self.offset_s
+
+    def snapshot(self) :
+        return {
+            "samples": self.count,
+            "offset_ms": round(self.offset_s * 1000, 1) if self.offset_s is not None else None,
+            "last_excess_ms": (
+                round((self.last_s - self.offset_s) * 1000, 1) if self.offset_s is not None else None
+            ),
+        }
@@ -0,0 +1,79 @@
+import asyncio
+
+from config import CEX_VENUE_FEES_BPS, CEX_CONSOLIDATED_DEPTH
+from models.fixed_point import FIXED_SCALE, bps_to_fixed
+from md.cex_stream import BookFeed, CexDepthStream
+from orderbook.history import BookHistory
+from orderbook.merge import MergedSide
+
+
+# One pair book across several venue streams, published like a single stream.
+# Each venue update is merged into the consolidated sides on the thread that
+# parsed it - with a feed thread that is the same thread for every venue, so
+# the sides are only ever touched from one place. Levels keep their venue, which
+# is how the execution simulator charges each fill its own venue's fee. A venue
+# that drops out publishes an empty book and leaves the consolidated book
+class ConsolidatedBook(BookFeed):
+    def __init__(
+        self,
+        streams: list,
+        label: str = "",
+        history: BookHistory = None,
+        venue_fees: dict = None,
+        depth: int = CEX_CONSOLIDATED_DEPTH,
+    ) :
+        super().__init__(label, history)
+        venue_fees = CEX_VENUE_FEES_BPS if venue_fees is None else venue_fees
+        self.streams = list(streams)
+        # Earlier streams win ties on equal net price
+        self.ranks = {}
+        self.keep_fx = {}
+        for rank, stream in enumerate(self.streams):
+            self.ranks[stream] = rank
+            self.keep_fx[stream] = FIXED_SCALE - bps_to_fixed(venue_fees[stream.venue])
+            stream.listener = self.on_venue_update
+        self.bid_side = MergedSide(depth, descending=True)
+        self.ask_side = MergedSide(depth, descending=False)
+
+    async def connect(self) :
+        if any(stream.feed_thread is not None for stream in self.streams):
+            self.main_loop = asyncio.get_running_loop()
+        await asyncio.gather(*(stream.connect() for stream in self.streams))
+
+    async def close(self) :
+        for stream in self.streams:
+            await stream.close()
+
+    def is_connected(self) :
+        return any(stream.is_connected() for stream in self.streams)
+
+    def sources(self) :
+        return list(self.streams)
+
+    # As old as the oldest venue with levels in the merged sides, each aged on
+    # its own clock. A dropped venue keeps its last snapshot but leaves the
+    # sides, so it stops counting; with no venue in them the merged book's own age
+    def book_age(self, now: float) :
+        bid_taken = self.bid_side.taken
+        ask_taken = self.ask_side.taken
+        ages = [
+            stream.book_age(now)
+            for stream, rank in self.ranks.items()
+            if bid_taken.get(rank) or ask_taken.get(rank)
+        ]
+        ages = [age for age in ages if age is not None]
+        if not ages:
+            return super().book_age(now)
+        return max(ages)
+
+    # Listener for every venue stream - runs where that stream parsed
+    def on_venue_update(self, stream: CexDepthStream, book) :
+        rank = self.ranks[stream]
+        keep_fx = self.keep_fx[stream]
+        bids = self.bid_side.update(rank, book.bids, keep_fx)
+        asks = self.ask_side.update(rank, book.asks, keep_fx)
+        if not bids or not asks:
+            return
+        # Stamped with the venue book that changed it
+        self.publish(bids, asks, book.local_ts or self.book.local_ts, book.exchange_ts)
+        self.notify()
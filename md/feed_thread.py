@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+from config import BINANCE_FEED_UVLOOP
+
+
+def new_event_loop(use_uvloop: bool = BINANCE_FEED_UVLOOP) :
+    if use_uvloop:
+        try:
+            import uvloop
+
+            return uvloop.new_event_loop()
+        except ImportError:
+            pass
+    return asyncio.new_event_loop()
+
+
+# A private event loop on its own thread for websocket I/O and message parsing,
+# so a burst of depth updates never delays header handling on the main loop.
+# Coroutines are submitted from the main loop and awaited there via futures
+class FeedThread:
+    def __init__(self, name: str = "binance-feed", use_uvloop: bool = BINANCE_FEED_UVLOOP) :
+        self.name = name
+        self.loop = new_event_loop(use_uvloop)
+        self.thread = None
+
+    @property
+    def loop_name(self) :
+        return type(self.loop).__module__.split(".")[0]
+
+    def start(self) :
+        if self.thread is not None:
+            return
+        started = threading.Event()
+
+        def run() :
+            asyncio.set_event_loop(self.loop)
+            self.loop.call_soon(started.set)
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, name=self.name, daemon=True)
+        self.thread.start()
+        started.wait()
+
+    # concurrent.futures.Future - cancelling it cancels the task on the feed loop
+    def submit(self, coro) :
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, timeout: float = 5.0) :
+        if self.thread is None:
+            return
+
+        async def shutdown() :
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        self.thread = None
+        self.loop.close()
@@ -4,15 +4,20 @@ import time
 import websockets
 
 from config import LINEA_WSS, WS_PING_INTERVAL, WS_PING_TIMEOUT
+from md.rpc_budget import RpcBudget
 
 
 class LineaRpcClient:
-    def __init__(self, ws_url: str = LINEA_WSS) :
+    def __init__(self, ws_url: str = LINEA_WSS, budget: RpcBudget = None) :
         self.url = ws_url
+        # Every request sent is metered here when given
+        self.budget = budget
         self.next_id = 0
         self.ws = None
         self.pending = {}
         self.subscriptions = {}
+        # Set on every subscription notification; the consumer clears it
+        self.notified = asyncio.Event()
         self.recv_task = None
         self.connected = False
 
@@ -46,6 +51,14 @@ class LineaRpcClient:
             async for message in self.ws:
                 data = json.loads(message)
 
+                # Batch response - one entry per call, any order
+                if isinstance(data, list):
+                    for item in data:
+                        future = self.pending.pop(item.get("id"), None)
+                        if future and not future.done():
+                            future.set_result(item)
+                    continue
+
                 if "id" in data:
                     future = self.pending.pop(data["id"], None)
                     if future and not future.done():
@@ -69,6 +82,7 @@ class LineaRpcClient:
                             queue.put_nowait(result)
                         except asyncio.QueueFull:
                             pass
+                        self.notified.set()
         except websockets.ConnectionClosed:
             self.connected = False
             print("[linea] connection closed unexpectedly")
@@ -92,6 +106,8 @@ class LineaRpcClient:
         future = asyncio.get_running_loop().create_future()
         self.pending[request_id] = future
 
+        if self.budget is not None:
+            self.budget.spend(method)
         await self.ws.send(json.dumps(payload))
         response = await future
 
@@ -100,10 +116,62 @@ class LineaRpcClient:
 
         return response
 
+    # Sends calls as one JSON-RPC batch and returns raw responses in call order.
+    # Errors are left in each response for the caller. Nodes that ignore WS
+    # batches time out and fall back to individual concurrent requests
+    async def batch_request(self, calls: list, timeout: float = 5.0) :
+        if not self.ws:
+            raise RuntimeError("Not connected to Linea")
+        if not calls:
+            return []
+
+        loop = asyncio.get_running_loop()
+        payload = []
+        futures = []
+        for method, params in calls:
+            self.next_id += 1
+            request_id = self.next_id
+            payload.append({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": method,
+                "params": params,
+            })
+            future = loop.create_future()
+            self.pending[request_id] = future
+            futures.append((request_id, future))
+            # Providers bill each call in a batch
+            if self.budget is not None:
+                self.budget.spend(method)
+
+        await self.ws.send(json.dumps(payload))
+        try:
+            return list(await asyncio.wait_for(
+                asyncio.gather(*(future for _, future in futures)),
+                timeout=timeout,
+            ))
+        except asyncio.TimeoutError:
+            for request_id, _ in futures:
+                self.pending.pop(request_id, None)
+            print("[linea] batch request timed out, retrying calls individually")
+
+        results = await asyncio.gather(
+            *(self.request(method, params) for method, params in calls),
+            return_exceptions=True,
+        )
+        return [
+            {"error": str(result)} if isinstance(result, Exception) else result
+            for result in results
+        ]
+
     async def eth_gas_price(self) :
         response = await self.request("eth_gasPrice", [])
         return int(response["result"], 16)
 
+    async def eth_block_number(self) :
+        response = await self.request("eth_blockNumber", [])
+        return int(response["result"], 16)
+
     async def subscribe_new_heads(self) :
         response = await self.request("eth_subscribe", ["newHeads"])
         sub_id = response["result"]
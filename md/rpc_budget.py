@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import defaultdict
+
+from config import BLOCK_TIME_S
+
+SECONDS_PER_DAY = 86400
+
+
+# Request spend against one provider's limits: a per-second token bucket and/or
+# a daily credit pool that resets at UTC midnight (0 = no limit). Every request
+# is recorded as it is made; allowance() turns what is left into the number of
+# calls one block may use, spreading the daily pool over the blocks left today
+class RpcBudget:
+    def __init__(
+        self,
+        name: str,
+        daily_calls: int = 0,
+        per_second: float = 0.0,
+        block_time_s: float = BLOCK_TIME_S,
+    ) :
+        self.name = name
+        self.daily_calls = int(daily_calls)
+        self.per_second = float(per_second)
+        self.block_time_s = block_time_s
+        # Bucket holds one block's worth of calls at most
+        self.capacity = self.per_second * block_time_s
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.day = int(time.time() // SECONDS_PER_DAY)
+        self.spent_today = 0
+        self.spent_total = 0
+        self.by_method = defaultdict(int)
+        self.lock = threading.Lock()
+
+    @property
+    def limited(self) :
+        return self.daily_calls > 0 or self.per_second > 0
+
+    def refill(self, now: float) :
+        if self.per_second > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.per_second)
+        self.updated = now
+        day = int(time.time() // SECONDS_PER_DAY)
+        if day != self.day:
+            self.day = day
+            self.spent_today = 0
+
+    def spend(self, method: str, calls: int = 1) :
+        with self.lock:
+            self.refill(time.monotonic())
+            self.tokens -= calls
+            self.spent_today += calls
+            self.spent_total += calls
+            self.by_method[method] += calls
+
+    # Calls this block can afford, or None when unlimited
+    def allowance(self) :
+        if not self.limited:
+            return None
+        with self.lock:
+            self.refill(time.monotonic())
+            limits = []
+            if self.per_second > 0:
+                limits.append(int(self.tokens))
+            if self.daily_calls > 0:
+                seconds_left = SECONDS_PER_DAY - time.time() % SECONDS_PER_DAY
+                blocks_left = max(1.0, seconds_left / self.block_time_s)
+                limits.append(int((self.daily_calls - self.spent_today) / blocks_left))
+        return max(0, min(limits))
+
+    # Meters a web3 provider. Handshake methods the provider caches are excluded
+    # since only the first of them reaches the network
+    def instrument(self, provider) :
+        cached = set(provider.cacheable_requests or ()) if provider.cache_allowed_requests else set()
+        make_request = provider.make_request
+        make_batch_request = provider.make_batch_request
+
+        def metered_request(method, params) :
+            if method not in cached:
+                self.spend(method)
+            return make_request(method, params)
+
+        def metered_batch_request(requests) :
+            for method, _ in requests:
+                if method not in cached:
+                    self.spend(method)
+            return make_batch_request(requests)
+
+        provider.make_request = metered_request
+        provider.make_batch_request = metered_batch_request
+        return provider
+
+    def snapshot(self) :
+        with self.lock:
+            return {
+                "provider": self.name,
+                "spent_total": self.spent_total,
+                "spent_today": self.spent_today,
+                "daily_calls": self.daily_calls or None,
+                "per_second": self.per_second or None,
+                "by_method": dict(self.by_method),
+            }
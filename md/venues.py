@@ -0,0 +1,110 @@
+from config import CEX_PAIR, CEX_VENUE_URLS
+from models.types import OrderbookLevel
+from models.fixed_point import parse_fixed
+from md.cex_stream import CexDepthStream, parse_levels
+from md.feed_thread import FeedThread
+
+
+# OKX public books5: every push is the full top 5 of both sides
+class OkxOrderbookStream(CexDepthStream):
+    venue = "okx"
+
+    def __init__(
+        self,
+        ws_url: str = CEX_VENUE_URLS["okx"],
+        pair: tuple = CEX_PAIR,
+        label: str = "",
+        feed_thread: FeedThread = None,
+    ) :
+        super().__init__(ws_url, label, feed_thread)
+        self.inst_id = f"{pair[0]}-{pair[1]}"
+
+    def subscribe_messages(self) :
+        return [{"op": "subscribe", "args": [{"channel": "books5", "instId": self.inst_id}]}]
+
+    def parse(self, data) :
+        # Subscription acks and errors carry "event" and no data
+        books = data.get("data")
+        if not books:
+            return None
+        book = books[0]
+        # Levels are [price, size, deprecated, order count]
+        bids = parse_levels(book.get("bids", ()), self.venue)
+        asks = parse_levels(book.get("asks", ()), self.venue)
+        ts_ms = book.get("ts")
+        return bids, asks, int(ts_ms) / 1000 if ts_ms else None
+
+
+# Bybit spot orderbook.50: a snapshot, then deltas against it (size "0" removes
+# the level). The book is kept as price -> size per side and the top `depth`
+# levels are rebuilt per message
+class BybitOrderbookStream(CexDepthStream):
+    venue = "bybit"
+    # Every delta has to be applied
+    conflate = False
+
+    def __init__(
+        self,
+        ws_url: str = CEX_VENUE_URLS["bybit"],
+        pair: tuple = CEX_PAIR,
+        label: str = "",
+        feed_thread: FeedThread = None,
+        depth: int = 50,
+    ) :
+        super().__init__(ws_url, label, feed_thread)
+        self.symbol = f"{pair[0]}{pair[1]}"
+        self.depth = depth
+        self.bid_sizes = {}
+        self.ask_sizes = {}
+        self.update_id = None
+
+    def subscribe_messages(self) :
+        return [{"op": "subscribe", "args": [f"orderbook.{self.depth}.{self.symbol}"]}]
+
+    def apply(self, sizes: dict, raw_levels: list) :
+        for raw_price, raw_size in raw_levels:
+            price = parse_fixed(raw_price)
+            size = parse_fixed(raw_size)
+            if size > 0:
+                sizes[price] = size
+            else:
+                sizes.pop(price, None)
+
+    def levels(self, sizes: dict, descending: bool) :
+        prices = sorted(sizes, reverse=descending)[:self.depth]
+        return tuple(OrderbookLevel(price=price, quantity=sizes[price], venue=self.venue) for price in prices)
+
+    def parse(self, data) :
+        book = data.get("data")
+        if not book or not data.get("topic", "").startswith("orderbook."):
+            return None
+        kind = data.get("type")
+        update_id = book.get("u")
+        # u == 1 is a fresh snapshot after a service restart
+        if kind == "snapshot" or update_id == 1:
+            self.bid_sizes = {}
+            self.ask_sizes = {}
+        elif self.update_id is None:
+            # A delta before any snapshot has nothing to apply to
+            return None
+        self.update_id = update_id
+        self.apply(self.bid_sizes, book.get("b", ()))
+        self.apply(self.ask_sizes, book.get("a", ()))
+        ts_ms = data.get("ts")
+        return (
+            self.levels(self.bid_sizes, True),
+            self.levels(self.ask_sizes, False),
+            ts_ms / 1000 if ts_ms else None,
+        )
+
+    # A new connection starts over from its own snapshot
+    def reset(self) :
+        self.update_id = None
+        self.bid_sizes = {}
+        self.ask_sizes = {}
+
+
+VENUE_STREAMS = {
+    "okx": OkxOrderbookStream,
+    "bybit": BybitOrderbookStream,
+}
@@ -5,7 +5,9 @@ from .types import (
     CEXQuote,
     ArbitrageOpportunity,
     Direction,
+    PriceBand,
 )
+from .fixed_point import FIXED_SCALE, PoolUnits
 
 __all__ = [
     "QuoteResult",
@@ -13,4 +15,7 @@ __all__ = [
     "CEXQuote",
     "ArbitrageOpportunity",
     "Direction",
+    "PriceBand",
+    "FIXED_SCALE",
+    "PoolUnits",
 ]
@@ -0,0 +1,125 @@
+from decimal import Decimal
+
+from config import NATIVE_DECIMALS
+
+# Integer conventions for the evaluation hot path:
+#  - token amounts are raw on-chain integers (10 ** decimals per token)
+#  - prices, CEX quantities and USD values are fixed-point, scaled by FIXED_SCALE
+#  - one rounding policy, always against us: amounts received round down,
+#    amounts paid (CEX cost, fees, gas) round up
+# Decimal only shows up at the edges - config sizes in, display values out
+FIXED_DECIMALS = 18
+FIXED_SCALE = 10 ** FIXED_DECIMALS
+BPS_SCALE = 10000
+# Pool fees are quoted in hundredths of a bip
+PIPS_SCALE = 1000000
+
+
+def ceil_div(numerator: int, denominator: int) :
+    return -(-numerator // denominator)
+
+
+# Binance sends plain decimal strings - parse straight to fixed-point ints
+def parse_fixed(text: str) :
+    if "e" in text or "E" in text:
+        return to_fixed(Decimal(text))
+    negative = text.startswith("-")
+    if negative:
+        text = text[1:]
+    whole, _, frac = text.partition(".")
+    frac = frac[:FIXED_DECIMALS]
+    value = int(whole or "0") * FIXED_SCALE
+    if frac:
+        value += int(frac) * 10 ** (FIXED_DECIMALS - len(frac))
+    return -value if negative else value
+
+
+def to_fixed(value) :
+    return int(Decimal(value) * FIXED_SCALE)
+
+
+def from_fixed(value: int) :
+    return Decimal(value) / FIXED_SCALE
+
+
+# Fee in bps as a fixed-point fraction (1 bps -> FIXED_SCALE / 10000)
+def bps_to_fixed(bps) :
+    return to_fixed(bps) // BPS_SCALE
+
+
+def apply_fee(amount: int, fee_fx: int) :
+    return amount - ceil_div(amount * fee_fx, FIXED_SCALE)
+
+
+class PoolUnits:
+    __slots__ = (
+        "base_decimals",
+        "quote_decimals",
+        "base_unit",
+        "quote_unit",
+        "native_unit",
+        "base_quote_den",
+        "qty_base_num",
+        "qty_base_den",
+    )
+
+    # Conversion constants computed once per pool
+    def __init__(
+        self,
+        base_decimals: int,
+        quote_decimals: int,
+        native_decimals: int = NATIVE_DECIMALS,
+    ) :
+        self.base_decimals = int(base_decimals)
+        self.quote_decimals = int(quote_decimals)
+        self.base_unit = 10 ** self.base_decimals
+        self.quote_unit = 10 ** self.quote_decimals
+        self.native_unit = 10 ** int(native_decimals)
+        # quote_raw = base_raw * price_fx * quote_unit / base_quote_den
+        self.base_quote_den = self.base_unit * FIXED_SCALE
+        # base_raw = qty_fx * qty_base_num / qty_base_den
+        self.qty_base_num = self.base_unit
+        self.qty_base_den = FIXED_SCALE
+
+    def base_to_raw(self, amount) :
+        return int(Decimal(amount) * self.base_unit)
+
+    def quote_to_raw(self, amount) :
+        return int(Decimal(amount) * self.quote_unit)
+
+    def base_from_raw(self, amount_raw: int) :
+        return Decimal(amount_raw) / self.base_unit
+
+    def quote_from_raw(self, amount_raw: int) :
+        return Decimal(amount_raw) / self.quote_unit
+
+    def qty_to_base_raw(self, qty_fx: int) :
+        return qty_fx * self.qty_base_num // self.qty_base_den
+
+    # Quote raw for base_raw at price_fx (quote per base)
+    def quote_for_base(self, base_raw: int, price_fx: int, round_up: bool = False) :
+        numerator = base_raw * price_fx * self.quote_unit
+        if round_up:
+            return ceil_div(numerator, self.base_quote_den)
+        return numerator // self.base_quote_den
+
+    # Base raw bought with quote_raw at price_fx (quote per base)
+    def base_for_quote(self, quote_raw: int, price_fx: int, round_up: bool = False) :
+        numerator = quote_raw * self.base_quote_den
+        denominator = price_fx * self.quote_unit
+        if round_up:
+            return ceil_div(numerator, denominator)
+        return numerator // denominator
+
+    # Fixed-point price from a base/quote raw pair (display and band inputs)
+    def price_fx(self, base_raw: int, quote_raw: int) :
+        if base_raw <= 0:
+            return 0
+        return quote_raw * self.base_quote_den // (base_raw * self.quote_unit)
+
+    # Native (ETH) wei -> quote raw at eth_price_fx (quote per ETH)
+    def native_to_quote(self, amount_wei: int, eth_price_fx: int) :
+        return ceil_div(
+            amount_wei * eth_price_fx * self.quote_unit,
+            self.native_unit * FIXED_SCALE,
+        )
@@ -1,5 +1,4 @@
 from dataclasses import dataclass
-from decimal import Decimal
 from enum import Enum
 
 
@@ -16,27 +15,29 @@ class QuoteResult:
     gas_estimate: int
 
 
+# Amounts are raw token units, prices and CEX quantities fixed-point
+# (see models.fixed_point). venue names the exchange the level rests on - None
+# for books without attribution, which fill at the default taker fee
 @dataclass
 class OrderbookLevel:
-    price: Decimal
-    quantity: Decimal
+    price: int
+    quantity: int
+    venue: str = None
 
 
 @dataclass
 class CEXQuote:
     token_in: str
     token_out: str
-    amount_in: Decimal
-    amount_out: Decimal
-    average_price: Decimal
+    amount_in_raw: int
+    amount_out_raw: int
+    average_price_fx: int
 
 
 @dataclass
 class DEXQuote:
     token_in: str
     token_out: str
-    amount_in: Decimal
-    amount_out: Decimal
     amount_in_raw: int
     amount_out_raw: int
     gas_estimate: int
@@ -47,15 +48,33 @@ class ArbitrageOpportunity:
     timestamp: float
     block_number: int
     direction: Direction
-    trade_size_base: Decimal
+    trade_size_base_raw: int
     dex_quote: DEXQuote
     cex_quote: CEXQuote
     gas_price_wei: int
-    gas_cost_native: Decimal
-    gas_cost_quote: Decimal
+    gas_cost_wei: int
+    gas_cost_quote_raw: int
     profit_token: str
-    gross_profit_token: Decimal
-    net_profit_token: Decimal
-    dex_price: Decimal
-    cex_price: Decimal
+    gross_profit_raw: int
+    net_profit_raw: int
+    dex_price_fx: int
+    cex_price_fx: int
     is_profitable: bool = False
+    book_timestamp: float = 0.0
+    block_hash: str = None
+    # arbitrage.routes.Route the DEX leg was quoted on (None = configured pool)
+    route: object = None
+    # ((Route, amount_in_raw, amount_out_raw), ...) when split across pools
+    split: tuple = None
+
+
+@dataclass
+class PriceBand:
+    block_number: int
+    dex_price_fx: int
+    # No size is profitable while best_ask >= lower and best_bid <= upper
+    lower_fx: int
+    upper_fx: int
+
+    def is_crossed(self, best_bid_fx: int, best_ask_fx: int) :
+        return best_bid_fx > self.upper_fx or best_ask_fx < self.lower_fx
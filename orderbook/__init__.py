@@ -1,4 +1,7 @@
 
 from .execution_sim import CEXExecutionSimulator
+from .history import BookHistory
+from .merge import MergedSide
+from .snapshot import BookSnapshot
 
-__all__ = ["CEXExecutionSimulator"]
+__all__ = ["CEXExecutionSimulator", "BookHistory", "MergedSide", "BookSnapshot"]
@@ -1,44 +1,101 @@
-
 from decimal import Decimal
 
-from config import BINANCE_TAKER_FEE_BPS
+from config import (
+    BINANCE_TAKER_FEE_BPS,
+    POOL_BASE_DECIMALS,
+    POOL_QUOTE_DECIMALS,
+    CEX_HEDGE_LATENCY_MS,
+)
 from models.types import OrderbookLevel, CEXQuote
+from models.fixed_point import PoolUnits, apply_fee, bps_to_fixed
+from orderbook.history import BookHistory
 
 
 class CEXExecutionSimulator:
-    def __init__(self, taker_fee_bps: Decimal = BINANCE_TAKER_FEE_BPS):
-        self.fee_rate = taker_fee_bps / Decimal("10000")
+    def __init__(
+        self,
+        taker_fee_bps: Decimal = BINANCE_TAKER_FEE_BPS,
+        units: PoolUnits = None,
+        history: BookHistory = None,
+        hedge_latency_ms: float = CEX_HEDGE_LATENCY_MS,
+        venue_fees: dict = None,
+    ):
+        self.fee_fx = bps_to_fixed(taker_fee_bps)
+        # Levels from a consolidated book pay their own venue's fee; levels
+        # without a listed venue pay taker_fee_bps
+        self.venue_fee_fx = {
+            venue: bps_to_fixed(fee_bps) for venue, fee_bps in (venue_fees or {}).items()
+        }
+        self.units = units or PoolUnits(POOL_BASE_DECIMALS, POOL_QUOTE_DECIMALS)
+        self.history = history
+        self.hedge_latency_s = hedge_latency_ms / 1000
+
+    # (bids, asks, book_ts) the hedge actually hits - the book in force at
+    # decision time + latency. Only definitive once that moment has passed
+    def hedge_book(self, decision_ts: float, max_age_s: float = None):
+        if self.history is None:
+            return None
+        return self.history.as_of(decision_ts + self.hedge_latency_s, max_age_s)
 
-    # Walk through asks
-    def simulate_buy(
+    # Base sold -> net quote, against the book at decision time + latency
+    def fill_sell_at(self, decision_ts: float, target_base_raw: int):
+        book = self.hedge_book(decision_ts)
+        if book is None:
+            return None
+        return self.fill_sell(target_base_raw, book[0])
+
+    # Quote spent -> net base, against the book at decision time + latency
+    def fill_buy_at(self, decision_ts: float, max_quote_raw: int):
+        book = self.hedge_book(decision_ts)
+        if book is None:
+            return None
+        return self.fill_buy(max_quote_raw, book[1])
+
+    # Gross amount less fees - per fee rate when fills were split across venues,
+    # so a single-venue fill is rounded exactly as one apply_fee
+    def net_of_fees(self, gross: int, gross_by_fee: dict):
+        if not gross_by_fee:
+            return apply_fee(gross, self.fee_fx)
+        return sum(apply_fee(amount, fee_fx) for fee_fx, amount in gross_by_fee.items())
+
+    # Walk through asks - returns (quote_spent_raw, net_base_raw)
+    def fill_buy(
         self,
-        max_quote: Decimal,
+        max_quote_raw: int,
         asks: list,
-        token_in: str,
-        token_out: str,
     ):
-        if max_quote <= 0 or not asks:
+        if max_quote_raw <= 0 or not asks:
             return None
 
-        remaining_quote = max_quote
-        total_quote_spent = Decimal("0")
-        total_base_filled = Decimal("0")
+        units = self.units
+        venue_fee_fx = self.venue_fee_fx
+        remaining_quote = max_quote_raw
+        total_quote_spent = 0
+        total_base_filled = 0
+        # fee -> gross base filled at that fee, across venues
+        base_by_fee = {}
 
         for level in asks:
             if level.price <= 0 or level.quantity <= 0:
                 continue
 
-            level_cost = level.price * level.quantity
+            level_base = units.qty_to_base_raw(level.quantity)
+            # Quote paid rounds up
+            level_cost = units.quote_for_base(level_base, level.price, round_up=True)
             if level_cost <= remaining_quote:
-                fill_base = level.quantity
+                fill_base = level_base
                 fill_quote = level_cost
             else:
-                fill_base = remaining_quote / level.price
+                # Base received rounds down
+                fill_base = units.base_for_quote(remaining_quote, level.price)
                 fill_quote = remaining_quote
 
             total_base_filled += fill_base
             total_quote_spent += fill_quote
             remaining_quote -= fill_quote
+            if venue_fee_fx:
+                fee_fx = venue_fee_fx.get(level.venue, self.fee_fx)
+                base_by_fee[fee_fx] = base_by_fee.get(fee_fx, 0) + fill_base
 
             if remaining_quote <= 0:
                 break
@@ -48,66 +105,84 @@ class CEXExecutionSimulator:
             return None
 
         # Apply fee to base received
-        fee_base = total_base_filled * self.fee_rate
-        net_base = total_base_filled - fee_base
-
-        amount_in = total_quote_spent
-        amount_out = net_base
-        avg_price = amount_in / amount_out if amount_out > 0 else Decimal("0")
-
-        return CEXQuote(
-            token_in=token_in,
-            token_out=token_out,
-            amount_in=amount_in,
-            amount_out=amount_out,
-            average_price=avg_price,
-        )
+        return total_quote_spent, self.net_of_fees(total_base_filled, base_by_fee)
 
-    # Walk through bids
-    def simulate_sell(
+    # Walk through bids - returns (base_sold_raw, net_quote_raw)
+    def fill_sell(
         self,
-        target_base_qty: Decimal,
+        target_base_raw: int,
         bids: list,
-        token_in: str,
-        token_out: str,
     ):
-        if target_base_qty <= 0 or not bids:
+        if target_base_raw <= 0 or not bids:
             return None
 
-        remaining_base = target_base_qty
-        total_quote_received = Decimal("0")
-        total_base_sold = Decimal("0")
+        units = self.units
+        venue_fee_fx = self.venue_fee_fx
+        remaining_base = target_base_raw
+        total_quote_received = 0
+        total_base_sold = 0
+        # fee -> gross quote received at that fee, across venues
+        quote_by_fee = {}
 
         for level in bids:
             if level.price <= 0 or level.quantity <= 0:
                 continue
 
-            fill_base = min(remaining_base, level.quantity)
-            fill_quote = fill_base * level.price
+            fill_base = min(remaining_base, units.qty_to_base_raw(level.quantity))
+            # Quote received rounds down
+            fill_quote = units.quote_for_base(fill_base, level.price)
 
             total_base_sold += fill_base
             total_quote_received += fill_quote
             remaining_base -= fill_base
+            if venue_fee_fx:
+                fee_fx = venue_fee_fx.get(level.venue, self.fee_fx)
+                quote_by_fee[fee_fx] = quote_by_fee.get(fee_fx, 0) + fill_quote
 
             if remaining_base <= 0:
                 break
-        
+
         # Insufficient liquidity
         if remaining_base > 0:
             return None
 
         # Apply fee to quote received
-        fee_quote = total_quote_received * self.fee_rate
-        net_quote = total_quote_received - fee_quote
+        return total_base_sold, self.net_of_fees(total_quote_received, quote_by_fee)
 
-        amount_in = total_base_sold
-        amount_out = net_quote
-        avg_price = amount_out / amount_in if amount_in > 0 else Decimal("0")
+    def simulate_buy(
+        self,
+        max_quote_raw: int,
+        asks: list,
+        token_in: str,
+        token_out: str,
+    ):
+        fill = self.fill_buy(max_quote_raw, asks)
+        if fill is None:
+            return None
+        quote_spent, net_base = fill
+        return CEXQuote(
+            token_in=token_in,
+            token_out=token_out,
+            amount_in_raw=quote_spent,
+            amount_out_raw=net_base,
+            average_price_fx=self.units.price_fx(net_base, quote_spent),
+        )
 
+    def simulate_sell(
+        self,
+        target_base_raw: int,
+        bids: list,
+        token_in: str,
+        token_out: str,
+    ):
+        fill = self.fill_sell(target_base_raw, bids)
+        if fill is None:
+            return None
+        base_sold, net_quote = fill
         return CEXQuote(
             token_in=token_in,
             token_out=token_out,
-            amount_in=amount_in,
-            amount_out=amount_out,
-            average_price=avg_price,
+            amount_in_raw=base_sold,
+            amount_out_raw=net_quote,
+            average_price_fx=self.units.price_fx(base_sold, net_quote),
         )
@@ -0,0 +1,134 @@
+import threading
+from array import array
+
+from config import BOOK_HISTORY_SIZE, BOOK_HISTORY_DEPTH
+from models.types import OrderbookLevel
+from models.fixed_point import FIXED_DECIMALS
+
+# Binance quotes prices and quantities with at most 8 decimals, so levels are
+# stored at 1e8 scale in int64 arrays; anything finer is truncated
+HISTORY_DECIMALS = 8
+HISTORY_SCALE_DOWN = 10 ** (FIXED_DECIMALS - HISTORY_DECIMALS)
+
+
+# Bounded ring of timestamped books with O(log n) as-of lookup. Each slot is a
+# fixed stretch of four int64 arrays (bid/ask price and quantity, `depth` levels
+# each), a venue byte per level and a level count, so a snapshot costs 34 bytes
+# per level and no per-book Python objects; levels are only rebuilt for the book
+# that is looked up.
+# Appends may come from the feed thread while the main loop reads, so both sides
+# take a short lock
+class BookHistory:
+    def __init__(self, capacity: int = BOOK_HISTORY_SIZE, depth: int = BOOK_HISTORY_DEPTH) :
+        self.capacity = max(1, int(capacity))
+        self.depth = max(1, int(depth))
+        slots = self.capacity * self.depth
+        self.timestamps = array("d", bytes(8 * self.capacity))
+        self.bid_counts = array("H", bytes(2 * self.capacity))
+        self.ask_counts = array("H", bytes(2 * self.capacity))
+        self.bid_prices = array("q", bytes(8 * slots))
+        self.bid_quantities = array("q", bytes(8 * slots))
+        self.ask_prices = array("q", bytes(8 * slots))
+        self.ask_quantities = array("q", bytes(8 * slots))
+        # Index into venue_names per level; 0 is a level without a venue
+        self.bid_venues = array("B", bytes(slots))
+        self.ask_venues = array("B", bytes(slots))
+        self.venue_names = [None]
+        self.venue_ids = {None: 0}
+        # Total books appended; the oldest retained is count - len(self)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) :
+        return min(self.count, self.capacity)
+
+    def span(self) :
+        with self.lock:
+            if not self.count:
+                return None
+            oldest = self.count - len(self)
+            return self.timestamp_at(oldest), self.timestamp_at(self.count - 1)
+
+    def timestamp_at(self, index: int) :
+        return self.timestamps[index % self.capacity]
+
+    # Out-of-order books are dropped so the ring stays sorted by time
+    def append(self, ts: float, bids, asks) :
+        depth = self.depth
+        with self.lock:
+            if self.count and ts < self.timestamps[(self.count - 1) % self.capacity]:
+                return False
+            slot = self.count % self.capacity
+            base = slot * depth
+            self.timestamps[slot] = ts
+            self.bid_counts[slot] = self.write_levels(
+                bids, base, self.bid_prices, self.bid_quantities, self.bid_venues
+            )
+            self.ask_counts[slot] = self.write_levels(
+                asks, base, self.ask_prices, self.ask_quantities, self.ask_venues
+            )
+            self.count += 1
+        return True
+
+    def venue_id(self, venue: str) :
+        venue_id = self.venue_ids.get(venue)
+        if venue_id is None:
+            venue_id = len(self.venue_names)
+            self.venue_names.append(venue)
+            self.venue_ids[venue] = venue_id
+        return venue_id
+
+    def write_levels(self, levels, base: int, prices: array, quantities: array, venues: array) :
+        n = min(len(levels), self.depth)
+        for i in range(n):
+            level = levels[i]
+            prices[base + i] = level.price // HISTORY_SCALE_DOWN
+            quantities[base + i] = level.quantity // HISTORY_SCALE_DOWN
+            venues[base + i] = self.venue_id(level.venue)
+        return n
+
+    def read_levels(self, base: int, n: int, prices: array, quantities: array, venues: array) :
+        venue_names = self.venue_names
+        return [
+            OrderbookLevel(
+                price=prices[base + i] * HISTORY_SCALE_DOWN,
+                quantity=quantities[base + i] * HISTORY_SCALE_DOWN,
+                venue=venue_names[venues[base + i]],
+            )
+            for i in range(n)
+        ]
+
+    # Index of the latest book at or before ts, or None
+    def find(self, ts: float) :
+        lo = self.count - len(self)
+        hi = self.count
+        if lo == hi or self.timestamp_at(lo) > ts:
+            return None
+        # Invariant: timestamp_at(lo) <= ts, answer in [lo, hi)
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self.timestamp_at(mid) <= ts:
+                lo = mid
+            else:
+                hi = mid
+        return lo
+
+    # (bids, asks, book_ts) in force at ts, or None if the ring doesn't reach back
+    # that far or the book is older than max_age_s
+    def as_of(self, ts: float, max_age_s: float = None) :
+        with self.lock:
+            index = self.find(ts)
+            if index is None:
+                return None
+            slot = index % self.capacity
+            book_ts = self.timestamps[slot]
+            if max_age_s is not None and ts - book_ts > max_age_s:
+                return None
+            base = slot * self.depth
+            bids = self.read_levels(
+                base, self.bid_counts[slot], self.bid_prices, self.bid_quantities, self.bid_venues
+            )
+            asks = self.read_levels(
+                base, self.ask_counts[slot], self.ask_prices, self.ask_quantities, self.ask_venues
+            )
+        return bids, asks, book_ts
@@ -0,0 +1,69 @@
+from heapq import merge
+from itertools import islice
+
+from models.fixed_point import FIXED_SCALE
+
+
+# Fee-adjusted price a taker actually gets: a bid pays out less than its price,
+# an ask costs more. keep_fx is 1 - taker fee in fixed point
+def net_bid_price(price: int, keep_fx: int) :
+    return price * keep_fx // FIXED_SCALE
+
+
+def net_ask_price(price: int, keep_fx: int) :
+    return price * FIXED_SCALE // keep_fx
+
+
+# One side of a book consolidated across venues: the best `depth` levels of all
+# venue books, ordered by fee-adjusted price (ties go to the lower venue rank).
+# Levels are the venues' own objects, so each still names its venue.
+#
+# Kept incrementally - an update from one venue drops only that venue's levels
+# and merges its new top levels into what's left; the other venues are only
+# read past what is already merged when the update frees up room. Every venue's
+# share of the merged side is a prefix of its own book, so that read starts
+# exactly where the merged side stopped. Cost per update is O(depth log venues)
+class MergedSide:
+    def __init__(self, depth: int, descending: bool) :
+        self.depth = depth
+        self.descending = descending
+        # rank -> (sort keys, levels), both capped at depth
+        self.books = {}
+        # rank -> how many of that venue's levels are merged
+        self.taken = {}
+        # (sort key, rank, index, level), best first
+        self.entries = []
+        self.levels = ()
+
+    def sort_key(self, price: int, keep_fx: int) :
+        # Ascending order puts the best level first on both sides
+        if self.descending:
+            return -net_bid_price(price, keep_fx)
+        return net_ask_price(price, keep_fx)
+
+    def venue_entries(self, rank: int, start: int) :
+        keys, levels = self.books[rank]
+        for index in range(start, len(keys)):
+            yield keys[index], rank, index, levels[index]
+
+    # Replaces one venue's levels (best first) and returns the merged levels
+    def update(self, rank: int, levels: tuple, keep_fx: int) :
+        levels = levels[:self.depth]
+        keys = [self.sort_key(level.price, keep_fx) for level in levels]
+        self.books[rank] = (keys, levels)
+        kept = [entry for entry in self.entries if entry[1] != rank]
+        # Tails of the other venues, in case this update leaves room for them
+        tails = [
+            self.venue_entries(other, self.taken.get(other, 0))
+            for other in self.books
+            if other != rank
+        ]
+        self.entries = list(
+            islice(merge(kept, self.venue_entries(rank, 0), *tails), self.depth)
+        )
+        taken = dict.fromkeys(self.books, 0)
+        for entry in self.entries:
+            taken[entry[1]] += 1
+        self.taken = taken
+        self.levels = tuple(entry[3] for entry in self.entries)
+        return self.levels
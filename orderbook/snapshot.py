@@ -0,0 +1,96 @@
+from config import DEPTH_WEIGHTED_LEVELS
+
+
+# Running totals over one side's levels - entry i covers levels[:i + 1]. Levels
+# with a non-positive price or quantity add nothing, as in the mid calculation
+def cumulative_depth(levels: tuple) :
+    quantities = []
+    notionals = []
+    quantity = 0
+    notional = 0
+    for level in levels:
+        if level.price > 0 and level.quantity > 0:
+            quantity += level.quantity
+            notional += level.price * level.quantity
+        quantities.append(quantity)
+        notionals.append(notional)
+    return tuple(quantities), tuple(notionals)
+
+
+# One parsed book, never modified after it is built. Streams swap in a new
+# snapshot per message and consumers keep the reference - no level copies, and
+# the book, its timestamps and everything derived from it always agree.
+# Derived values are computed here once: best prices, spread, cumulative depth
+# per side and the depth-weighted mid at the configured level count (any other
+# count is two prefix-sum lookups). Versions increase per stream
+class BookSnapshot:
+    __slots__ = (
+        "version",
+        "bids",
+        "asks",
+        "local_ts",
+        "exchange_ts",
+        "best_bid",
+        "best_ask",
+        "spread",
+        "bid_depth",
+        "ask_depth",
+        "bid_notional",
+        "ask_notional",
+        "weighted_levels",
+        "weighted_mid",
+    )
+
+    def __init__(
+        self,
+        version: int,
+        bids: tuple,
+        asks: tuple,
+        local_ts: float,
+        exchange_ts: float = None,
+        weighted_levels: int = DEPTH_WEIGHTED_LEVELS,
+    ) :
+        bid_depth, bid_notional = cumulative_depth(bids)
+        ask_depth, ask_notional = cumulative_depth(asks)
+        best_bid = bids[0].price if bids else None
+        best_ask = asks[0].price if asks else None
+        init = object.__setattr__
+        init(self, "version", version)
+        init(self, "bids", bids)
+        init(self, "asks", asks)
+        init(self, "local_ts", local_ts)
+        init(self, "exchange_ts", exchange_ts)
+        init(self, "best_bid", best_bid)
+        init(self, "best_ask", best_ask)
+        init(self, "spread", best_ask - best_bid if bids and asks else None)
+        init(self, "bid_depth", bid_depth)
+        init(self, "ask_depth", ask_depth)
+        init(self, "bid_notional", bid_notional)
+        init(self, "ask_notional", ask_notional)
+        init(self, "weighted_levels", weighted_levels)
+        init(self, "weighted_mid", self.compute_weighted_mid(weighted_levels))
+
+    def __setattr__(self, name, value) :
+        raise AttributeError("BookSnapshot is immutable")
+
+    def __bool__(self) :
+        return bool(self.bids) and bool(self.asks)
+
+    def compute_weighted_mid(self, levels: int) :
+        if levels <= 0 or not self.bids or not self.asks:
+            return None
+        bid_index = min(levels, len(self.bids)) - 1
+        ask_index = min(levels, len(self.asks)) - 1
+        total_qty = self.bid_depth[bid_index] + self.ask_depth[ask_index]
+        if total_qty <= 0:
+            return None
+        return (self.bid_notional[bid_index] + self.ask_notional[ask_index]) // total_qty
+
+    # Fixed-point quote per base over the top levels of both sides
+    def depth_weighted_mid(self, levels: int = DEPTH_WEIGHTED_LEVELS) :
+        if levels == self.weighted_levels:
+            return self.weighted_mid
+        return self.compute_weighted_mid(levels)
+
+
+EMPTY_BOOK = BookSnapshot(0, (), (), 0.0)
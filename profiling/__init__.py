@@ -0,0 +1,7 @@
+from .sampler import StackSampler
+from .block_profile import SlowBlockProfiler
+from .loop_lag import LoopLagMonitor
+from .allocations import AllocationTracker
+from .gc_control import GcController
+
+__all__ = ["StackSampler", "SlowBlockProfiler", "LoopLagMonitor", "AllocationTracker", "GcController"]
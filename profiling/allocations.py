@@ -0,0 +1,107 @@
+import os
+import sys
+import tracemalloc
+
+from config import PROFILE_ALLOC_EVERY_BLOCKS, PROFILE_ALLOC_TOP, PROFILE_ALLOC_FRAMES
+
+# Allocations made by tracemalloc itself and the import machinery
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+# file:line per frame, relative to the repo or the sys.path entry it came from
+def site(statistic: tracemalloc.StatisticDiff) :
+    roots = sorted((os.path.join(os.path.abspath(p), "") for p in sys.path if p), key=len, reverse=True)
+    frames = []
+    for frame in statistic.traceback:
+        path = frame.filename
+        root = next((root for root in roots if path.startswith(root)), None)
+        if root is not None:
+            path = path[len(root):]
+        frames.append(f"{path}:{frame.lineno}")
+    # Oldest frame first - the allocating line is last
+    return " > ".join(frames)
+
+
+# tracemalloc snapshots around one block's eval every N blocks. A snapshot only
+# sees live memory, so the in-block diff shows what the eval allocated and still
+# held when it finished (batch, cached quotes, log rows), and the diff between
+# sampled blocks shows what was retained per block across the interval. The
+# peak since the previous block's start covers the transient churn that is
+# already freed by the time a snapshot is taken
+class AllocationTracker:
+    def __init__(
+        self,
+        every_blocks: int = PROFILE_ALLOC_EVERY_BLOCKS,
+        top: int = PROFILE_ALLOC_TOP,
+        frames: int = PROFILE_ALLOC_FRAMES,
+    ) :
+        self.every_blocks = every_blocks
+        self.top = top
+        self.frames = max(1, frames)
+        self.blocks = 0
+        self.before = None
+        self.previous = None
+        self.previous_block = None
+
+    @property
+    def enabled(self) :
+        return self.every_blocks > 0
+
+    def start_tracing(self) :
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop_tracing(self) :
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def snapshot(self) :
+        return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+    def start(self) :
+        if not self.enabled:
+            return
+        self.blocks += 1
+        if self.blocks % self.every_blocks == 0:
+            self.before = self.snapshot()
+        tracemalloc.reset_peak()
+
+    # Prints the report lines when this block was sampled
+    def finish(self, block_number: int) :
+        if self.before is None:
+            return
+        current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        after = self.snapshot()
+        key = "lineno" if self.frames == 1 else "traceback"
+
+        in_block = [d for d in after.compare_to(self.before, key) if d.size_diff > 0]
+        print(
+            f"[alloc] block {block_number} eval: +{sum(d.size_diff for d in in_block) / 1024:.1f} KiB live "
+            f"at end, peak {(peak_bytes - current_bytes) / 1024:.1f} KiB above it, "
+            f"traced {current_bytes / 1048576:.1f} MiB"
+        )
+        for d in in_block[:self.top]:
+            print(f"[alloc]   {d.size_diff / 1024:+9.1f} KiB {d.count_diff:+7d}  {site(d)}")
+
+        if self.previous is not None:
+            blocks = max(1, block_number - self.previous_block)
+            retained = after.compare_to(self.previous, key)
+            print(
+                f"[alloc] retained over {blocks} blocks: "
+                f"{sum(d.size_diff for d in retained) / 1024 / blocks:+.1f} KiB/block"
+            )
+            for d in retained[:self.top]:
+                if d.size_diff == 0:
+                    break
+                print(
+                    f"[alloc]   {d.size_diff / 1024 / blocks:+9.2f} KiB/block "
+                    f"{d.count_diff / blocks:+8.1f}/block  {site(d)}"
+                )
+        self.before = None
+        self.previous = after
+        self.previous_block = block_number
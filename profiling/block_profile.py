@@ -0,0 +1,85 @@
+import cProfile
+import os
+import pstats
+import threading
+import time
+
+from config import ACTIVE_POOL, PROFILE_DIR, PROFILE_SLOW_BLOCK_MS
+from profiling.sampler import prune_files
+
+
+# Deterministic profile of each block's evaluation, kept only when the block
+# was slow. cProfile follows one thread: the main thread's capture is the loop -
+# mostly waiting, plus whatever else ran meanwhile - while the DEX quotes run
+# on worker threads. Work handed off through run() is profiled on its own
+# thread and merged into the block's dump
+class SlowBlockProfiler:
+    def __init__(
+        self,
+        threshold_ms: float = PROFILE_SLOW_BLOCK_MS,
+        output_dir: str = PROFILE_DIR,
+    ) :
+        self.threshold_ms = threshold_ms
+        self.output_dir = output_dir
+        self.profile = None
+        # Worker-thread profiles of the capture in progress
+        self.worker_profiles = None
+        self.worker_lock = threading.Lock()
+        self.started = None
+        self.captured = 0
+        self.written = []
+
+    @property
+    def enabled(self) :
+        return self.threshold_ms > 0
+
+    def start(self) :
+        if not self.enabled:
+            return
+        self.profile = cProfile.Profile()
+        self.worker_profiles = []
+        self.started = time.perf_counter()
+        self.profile.enable()
+
+    # Calls fn(*args) - under its own profile, kept with the current block's
+    # capture, while one is running. For work sent to a worker thread
+    def run(self, fn, *args) :
+        captures = self.worker_profiles
+        if captures is None:
+            return fn(*args)
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return fn(*args)
+        finally:
+            profile.disable()
+            # A call that outlives its block lands in that block's finished list
+            with self.worker_lock:
+                captures.append(profile)
+
+    # Returns the .prof path when the block crossed the threshold
+    def finish(self, block_number: int) :
+        profile = self.profile
+        if profile is None:
+            return None
+        profile.disable()
+        self.profile = None
+        with self.worker_lock:
+            worker_profiles, self.worker_profiles = self.worker_profiles, None
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        if elapsed_ms < self.threshold_ms:
+            return None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(
+            self.output_dir,
+            f"block_{ACTIVE_POOL}_{block_number}_{elapsed_ms:.0f}ms.prof",
+        )
+        stats = pstats.Stats(profile)
+        for worker_profile in worker_profiles:
+            stats.add(worker_profile)
+        stats.dump_stats(path)
+        self.captured += 1
+        self.written.append(path)
+        prune_files(self.written)
+        return path
@@ -0,0 +1,115 @@
+import asyncio
+import gc
+import time
+
+from config import GC_FREEZE, GC_DEFER, GC_MAX_DEFER_S, GC_PAUSE_LOG_MS
+
+
+# Garbage collection policy for the block loop. Everything alive at the end of
+# startup (web3, ABIs, routes, restored state) is frozen, so full collections no
+# longer walk it. With defer on, the automatic collector is disabled and
+# collect_idle() runs whatever generations its thresholds call for in the gap
+# after a block, instead of wherever an allocation happens to trip them - in the
+# middle of an eval. A fallback task collects if no block comes for max_defer_s.
+# Every pause is timed through gc.callbacks
+class GcController:
+    def __init__(
+        self,
+        freeze: bool = GC_FREEZE,
+        defer: bool = GC_DEFER,
+        max_defer_s: float = GC_MAX_DEFER_S,
+        pause_log_ms: float = GC_PAUSE_LOG_MS,
+    ) :
+        self.freeze_enabled = freeze
+        self.defer = defer
+        self.max_defer_s = max_defer_s
+        self.pause_log_ms = pause_log_ms
+        self.started_at = None
+        self.idle = False
+        self.last_idle_at = time.perf_counter()
+        # (generation, ms, collected, idle) since the last take()
+        self.pauses = []
+        self.stats = {"collections": 0, "idle": 0, "automatic": 0, "max_ms": 0.0, "total_ms": 0.0}
+        self.task = None
+
+    def on_gc(self, phase: str, info: dict) :
+        if phase == "start":
+            self.started_at = time.perf_counter()
+            return
+        if self.started_at is None:
+            return
+        pause_ms = (time.perf_counter() - self.started_at) * 1000
+        self.started_at = None
+        self.pauses.append((info["generation"], pause_ms, info["collected"], self.idle))
+        self.stats["collections"] += 1
+        self.stats["idle" if self.idle else "automatic"] += 1
+        self.stats["total_ms"] += pause_ms
+        if pause_ms > self.stats["max_ms"]:
+            self.stats["max_ms"] = pause_ms
+
+    # Called once startup is done, before the loop
+    def start(self) :
+        if self.freeze_enabled:
+            gc.collect()
+            gc.freeze()
+            print(f"[gc] froze {gc.get_freeze_count()} startup objects")
+        # Pauses from here on - the collection before the freeze is startup time
+        gc.callbacks.append(self.on_gc)
+        if self.defer:
+            gc.disable()
+            self.task = asyncio.create_task(self.fallback(), name="gc_fallback")
+
+    async def stop(self) :
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.defer:
+            gc.enable()
+        if self.on_gc in gc.callbacks:
+            gc.callbacks.remove(self.on_gc)
+
+    # The oldest generation whose count is over its threshold, as the automatic
+    # collector would pick it (gen 2 also waits for its threshold of gen 1 runs)
+    def due_generation(self) :
+        counts = gc.get_count()
+        thresholds = gc.get_threshold()
+        due = None
+        for generation in range(3):
+            if thresholds[generation] and counts[generation] >= thresholds[generation]:
+                due = generation
+        return due
+
+    def collect_idle(self) :
+        self.last_idle_at = time.perf_counter()
+        if not self.defer:
+            return
+        generation = self.due_generation()
+        if generation is None:
+            return
+        self.idle = True
+        try:
+            gc.collect(generation)
+        finally:
+            self.idle = False
+
+    async def fallback(self) :
+        while True:
+            await asyncio.sleep(self.max_defer_s)
+            if time.perf_counter() - self.last_idle_at >= self.max_defer_s:
+                self.collect_idle()
+
+    # (collections, max pause ms) since the previous call; long pauses are logged
+    def take(self) :
+        pauses = self.pauses
+        self.pauses = []
+        for generation, pause_ms, collected, idle in pauses:
+            if pause_ms >= self.pause_log_ms:
+                print(
+                    f"[gc] gen{generation} pause={pause_ms:.1f}ms collected={collected} "
+                    f"{'idle' if idle else 'automatic'}"
+                )
+        return len(pauses), max((pause_ms for _, pause_ms, _, _ in pauses), default=0.0)
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+from config import LOOP_LAG_INTERVAL_MS
+
+
+# Event-loop responsiveness: a task that sleeps a fixed interval and records how
+# late it wakes. Anything hogging the loop (parsing, a sync eval) shows up as lag
+class LoopLagMonitor:
+    def __init__(self, interval_ms: float = LOOP_LAG_INTERVAL_MS) :
+        self.interval_s = interval_ms / 1000
+        self.max_lag_ms = 0.0
+        self.total_lag_ms = 0.0
+        self.samples = 0
+        self.task = None
+
+    def start(self) :
+        if self.task is None:
+            self.task = asyncio.create_task(self.run(), name="loop_lag")
+
+    async def stop(self) :
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def run(self) :
+        while True:
+            expected = time.perf_counter() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            lag_ms = max(0.0, (time.perf_counter() - expected) * 1000)
+            self.samples += 1
+            self.total_lag_ms += lag_ms
+            if lag_ms > self.max_lag_ms:
+                self.max_lag_ms = lag_ms
+
+    # (max_ms, mean_ms) since the previous call
+    def take(self) :
+        mean_ms = self.total_lag_ms / self.samples if self.samples else 0.0
+        result = (self.max_lag_ms, mean_ms)
+        self.max_lag_ms = 0.0
+        self.total_lag_ms = 0.0
+        self.samples = 0
+        return result
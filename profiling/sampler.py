@@ -0,0 +1,133 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from config import (
+    ACTIVE_POOL,
+    PROFILE_DIR,
+    PROFILE_SAMPLE_INTERVAL_MS,
+    PROFILE_DUMP_INTERVAL_S,
+    PROFILE_MAX_FILES,
+)
+
+
+# Drops the oldest files once a capture kind exceeds its retention
+def prune_files(paths: list, max_files: int = PROFILE_MAX_FILES) :
+    while len(paths) > max_files:
+        try:
+            os.remove(paths.pop(0))
+        except OSError:
+            pass
+
+
+# Wall-clock stack sampler for one thread. A daemon thread reads the target's
+# current frame every interval and counts collapsed stacks, rooted at the asyncio
+# task that was running - no tracing hooks, so the bot runs at full speed between
+# samples. Counts are flushed as .folded files (flamegraph.pl / speedscope input)
+class StackSampler:
+    def __init__(
+        self,
+        interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS,
+        dump_interval_s: float = PROFILE_DUMP_INTERVAL_S,
+        output_dir: str = PROFILE_DIR,
+        thread_id: int = None,
+        loop: asyncio.AbstractEventLoop = None,
+    ) :
+        self.interval_s = max(0.001, interval_ms / 1000)
+        self.dump_interval_s = dump_interval_s
+        self.output_dir = output_dir
+        self.thread_id = thread_id if thread_id is not None else threading.main_thread().ident
+        self.loop = loop
+        self.counts = defaultdict(int)
+        self.samples = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.written = []
+        # code object -> frame label, so a sample is mostly dict lookups
+        self.labels = {}
+
+    @property
+    def running(self) :
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self) :
+        if self.running:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self) :
+        if not self.running:
+            return None
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        return self.dump()
+
+    # Signal handler entry point - returns True if sampling is now on
+    def toggle(self) :
+        if self.running:
+            self.stop()
+            return False
+        self.start()
+        return True
+
+    def run(self) :
+        last_dump = time.monotonic()
+        while not self.stop_event.wait(self.interval_s):
+            self.sample()
+            if self.dump_interval_s and time.monotonic() - last_dump >= self.dump_interval_s:
+                self.dump()
+                last_dump = time.monotonic()
+
+    def label(self, code) :
+        label = self.labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self.labels[code] = label
+        return label
+
+    def sample(self) :
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        stack = []
+        while frame is not None:
+            stack.append(self.label(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+
+        if self.loop is not None:
+            task = asyncio.current_task(self.loop)
+            stack.insert(0, f"task:{task.get_name()}" if task is not None else "task:-")
+
+        key = ";".join(stack)
+        with self.lock:
+            self.counts[key] += 1
+            self.samples += 1
+
+    # Writes and resets the counts collected since the last dump
+    def dump(self) :
+        with self.lock:
+            counts = self.counts
+            samples = self.samples
+            self.counts = defaultdict(int)
+            self.samples = 0
+        if not samples:
+            return None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.output_dir, f"stacks_{ACTIVE_POOL}_{stamp}_{os.getpid()}.folded")
+        with open(path, "w", encoding="utf-8") as folded:
+            for stack, count in sorted(counts.items(), key=lambda item: -item[1]):
+                folded.write(f"{stack} {count}\n")
+        self.written.append(path)
+        prune_files(self.written)
+        print(f"[profile] {samples} samples -> {path}")
+        return path
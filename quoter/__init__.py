@@ -1,4 +1,4 @@
-
 from .quoter_v2 import QuoterV2Client
+from .pool_state import PoolStateClient
 
-__all__ = ["QuoterV2Client"]
+__all__ = ["QuoterV2Client", "PoolStateClient"]
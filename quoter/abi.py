@@ -0,0 +1,12 @@
+import json
+import os
+from functools import lru_cache
+
+ABI_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "abis")
+
+
+# Each ABI file is read once per process and shared by every client
+@lru_cache(maxsize=None)
+def load_abi(filename: str) :
+    with open(os.path.join(ABI_DIR, filename), "r", encoding="utf-8") as abi_file:
+        return json.load(abi_file)
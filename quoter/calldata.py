@@ -0,0 +1,82 @@
+from functools import lru_cache
+
+# 4-byte selectors of the two QuoterV2 calls the bot makes
+SELECTOR_QUOTE_EXACT_INPUT_SINGLE = "9e7defe6"  # quoteExactInputSingle((address,address,uint256,int24,uint160))
+SELECTOR_QUOTE_EXACT_INPUT = "cdca1753"  # quoteExactInput(bytes,uint256)
+
+WORD_HEX = 64
+
+
+# One 32-byte ABI word as hex - negative values in two's complement (int24)
+def word(value: int) :
+    return format(value % (1 << 256), "064x")
+
+
+def read_word(data: str, index: int) :
+    return int(data[index * WORD_HEX:(index + 1) * WORD_HEX], 16)
+
+
+# quoteExactInputSingle params are all static, so the calldata is the selector
+# and five words with amountIn in the middle. Everything around it is fixed per
+# pool and direction - built once, then each quote is two string joins
+@lru_cache(maxsize=64)
+def exact_input_single_template(
+    token_in: str,
+    token_out: str,
+    tick_spacing: int,
+    sqrt_price_limit_x96: int = 0,
+) :
+    prefix = (
+        "0x"
+        + SELECTOR_QUOTE_EXACT_INPUT_SINGLE
+        + token_in[2:].lower().rjust(WORD_HEX, "0")
+        + token_out[2:].lower().rjust(WORD_HEX, "0")
+    )
+    suffix = word(tick_spacing) + word(sqrt_price_limit_x96)
+    return prefix, suffix
+
+
+def encode_exact_input_single(template: tuple, amount_in: int) :
+    prefix, suffix = template
+    return prefix + format(amount_in, "064x") + suffix
+
+
+# (bytes path, uint256 amountIn): the path sits in the tail after two head
+# words, length-prefixed and zero-padded to whole words
+@lru_cache(maxsize=64)
+def exact_input_template(path: bytes) :
+    padded = path.hex().ljust(-(-len(path) // 32) * WORD_HEX, "0")
+    prefix = "0x" + SELECTOR_QUOTE_EXACT_INPUT + word(0x40)
+    suffix = word(len(path)) + padded
+    return prefix, suffix
+
+
+def encode_exact_input(template: tuple, amount_in: int) :
+    prefix, suffix = template
+    return prefix + format(amount_in, "064x") + suffix
+
+
+# (amountOut, sqrtPriceX96After, initializedTicksCrossed, gasEstimate) - four
+# static words, read straight out of the hex result
+def decode_exact_input_single(result: str) :
+    data = result[2:]
+    if len(data) < 4 * WORD_HEX:
+        raise ValueError(f"short quoter result: {result}")
+    return read_word(data, 0), read_word(data, 1), read_word(data, 2), read_word(data, 3)
+
+
+# (amountOut, uint160[] sqrtPriceX96AfterList, uint32[] ticksCrossedList,
+# gasEstimate) -> (amountOut, last sqrtPriceX96After, total ticks crossed,
+# gasEstimate), the same summary a single-hop quote gives
+def decode_exact_input(result: str) :
+    data = result[2:]
+    if len(data) < 4 * WORD_HEX:
+        raise ValueError(f"short quoter result: {result}")
+    sqrt_prices_at = read_word(data, 1) // 32
+    ticks_at = read_word(data, 2) // 32
+    hops = read_word(data, sqrt_prices_at)
+    if hops == 0 or len(data) < (ticks_at + 1 + hops) * WORD_HEX:
+        raise ValueError(f"malformed quoter result: {result}")
+    sqrt_price_x96_after = read_word(data, sqrt_prices_at + hops)
+    ticks_crossed = sum(read_word(data, ticks_at + 1 + hop) for hop in range(hops))
+    return read_word(data, 0), sqrt_price_x96_after, ticks_crossed, read_word(data, 3)
@@ -0,0 +1,14 @@
+from functools import lru_cache
+
+
+# V3 path bytes: token (20) | tickSpacing (3) | token (20) | ... - the same
+# encoding is used by QuoterV2 quoteExactInput and the Universal Router
+@lru_cache(maxsize=64)
+def encode_v3_path(tokens: tuple, tick_spacings: tuple) :
+    if len(tokens) != len(tick_spacings) + 1:
+        raise ValueError(f"path needs {len(tick_spacings) + 1} tokens, got {len(tokens)}")
+    path = bytes.fromhex(tokens[0][2:])
+    for tick_spacing, token in zip(tick_spacings, tokens[1:]):
+        path += int(tick_spacing).to_bytes(3, "big", signed=True)
+        path += bytes.fromhex(token[2:])
+    return path
@@ -0,0 +1,86 @@
+from config import (
+    LINEA_RPC,
+    POOL_ADDRESS,
+    POOL_BASE_ADDRESS,
+    POOL_QUOTE_ADDRESS,
+    POOL_BASE_DECIMALS,
+    POOL_QUOTE_DECIMALS,
+)
+from models.fixed_point import FIXED_SCALE
+from quoter.abi import load_abi
+
+Q192 = 2 ** 192
+
+
+def load_pool_abi() :
+    return load_abi("v3_abi.json")
+
+
+class PoolStateClient:
+    def __init__(
+        self,
+        rpc_url: str = LINEA_RPC,
+        pool_address: str = POOL_ADDRESS,
+        base_address: str = POOL_BASE_ADDRESS,
+        quote_address: str = POOL_QUOTE_ADDRESS,
+        base_decimals: int = POOL_BASE_DECIMALS,
+        quote_decimals: int = POOL_QUOTE_DECIMALS,
+        web3 = None,
+        fee_pips: int = None,
+    ) :
+        from web3 import Web3
+
+        self.web3 = web3 or Web3(Web3.HTTPProvider(rpc_url))
+        self.pool_address = Web3.to_checksum_address(pool_address)
+        self.base_decimals = int(base_decimals)
+        self.quote_decimals = int(quote_decimals)
+        # V3 pools order tokens by address - token0 is the lower one
+        self.base_is_token0 = int(base_address, 16) < int(quote_address, 16)
+        # Seeded from verified pool metadata when available
+        self.fee_pips = fee_pips
+        # (block_number, sqrt_price_x96, tick) of the latest block-pinned read
+        self.last_slot0 = None
+
+        self.contract = self.web3.eth.contract(
+            address=self.pool_address,
+            abi=load_pool_abi(),
+        )
+
+    def tick_spacing(self) :
+        return self.contract.functions.tickSpacing().call()
+
+    # Pool fee in hundredths of a bip, read once
+    def fee(self) :
+        if self.fee_pips is None:
+            self.fee_pips = self.contract.functions.fee().call()
+        return self.fee_pips
+
+    def read_slot0(self, block_number = None) :
+        if block_number is not None:
+            result = self.contract.functions.slot0().call(block_identifier=block_number)
+        else:
+            result = self.contract.functions.slot0().call()
+        sqrt_price_x96, tick = result[0], result[1]
+        if block_number is not None:
+            self.last_slot0 = (block_number, sqrt_price_x96, tick)
+        return sqrt_price_x96, tick
+
+    # Marginal pool price as quote per 1 base, fixed-point
+    def marginal_price(self, sqrt_price_x96: int) :
+        if sqrt_price_x96 <= 0:
+            return None
+        # token1 raw per token0 raw = sqrt_price_x96 ** 2 / 2 ** 192
+        price_x192 = sqrt_price_x96 * sqrt_price_x96
+        base_unit = 10 ** self.base_decimals
+        quote_unit = 10 ** self.quote_decimals
+        if self.base_is_token0:
+            return price_x192 * base_unit * FIXED_SCALE // (Q192 * quote_unit)
+        return Q192 * base_unit * FIXED_SCALE // (price_x192 * quote_unit)
+
+    def read_marginal_price(self, block_number = None) :
+        # Reuse a slot0 already read (or restored) for this block
+        last = self.last_slot0
+        if block_number is not None and last is not None and last[0] == block_number:
+            return self.marginal_price(last[1])
+        sqrt_price_x96, _ = self.read_slot0(block_number)
+        return self.marginal_price(sqrt_price_x96)
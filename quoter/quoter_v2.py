@@ -1,8 +1,3 @@
-import json
-import os
-from decimal import Decimal
-from web3 import Web3
-
 from config import (
     LINEA_RPC,
     QUOTER_V2_ADDRESS,
@@ -13,16 +8,25 @@ from config import (
     POOL_TICK_SPACING,
 )
 from models.types import QuoteResult
+from quoter.abi import load_abi
+from quoter.calldata import (
+    decode_exact_input,
+    decode_exact_input_single,
+    encode_exact_input,
+    encode_exact_input_single,
+    exact_input_single_template,
+    exact_input_template,
+)
+from quoter.path import encode_v3_path
+from md.rpc_budget import RpcBudget
+
+# Answers that never change for a provider - cached by web3 after the first call
+# instead of preceding every eth_call
+HANDSHAKE_METHODS = {"eth_chainId", "net_version", "web3_clientVersion"}
 
 
 def load_quoter_abi() :
-    abi_path = os.path.join(
-        os.path.dirname(os.path.dirname(__file__)),
-        "abis",
-        "quoterv2_abi.json",
-    )
-    with open(abi_path, "r", encoding="utf-8") as abi_file:
-        return json.load(abi_file)
+    return load_abi("quoterv2_abi.json")
 
 
 class QuoterV2Client:
@@ -35,8 +39,21 @@ class QuoterV2Client:
         base_decimals: int = POOL_BASE_DECIMALS,
         quote_decimals: int = POOL_QUOTE_DECIMALS,
         tick_spacing: int = POOL_TICK_SPACING,
+        budget: RpcBudget = None,
     ) :
-        self.web3 = Web3(Web3.HTTPProvider(rpc_url))
+        # web3 is slow to import - pulled in on first client, not at module load
+        from web3 import Web3
+
+        provider = Web3.HTTPProvider(
+            rpc_url,
+            cache_allowed_requests=True,
+            cacheable_requests=HANDSHAKE_METHODS,
+        )
+        # Pool-state reads share this web3, so they are metered too
+        if budget is not None:
+            budget.instrument(provider)
+        self.provider = provider
+        self.web3 = Web3(provider)
         self.quoter_address = Web3.to_checksum_address(quoter_address)
         self.base_address = Web3.to_checksum_address(base_address)
         self.quote_address = Web3.to_checksum_address(quote_address)
@@ -44,12 +61,6 @@ class QuoterV2Client:
         self.quote_decimals = int(quote_decimals)
         self.tick_spacing = tick_spacing
 
-        abi = load_quoter_abi()
-        self.contract = self.web3.eth.contract(
-            address=self.quoter_address,
-            abi=abi,
-        )
-
     @property
     def is_connected(self) :
         try:
@@ -57,6 +68,26 @@ class QuoterV2Client:
         except Exception:
             return False
 
+    # Quotes skip the web3 contract layer - no checksumming, ABI lookup,
+    # middleware or result formatting per call, just a pre-encoded eth_call
+    # straight to the provider (still metered). A block hash goes to the node
+    # in the EIP-1898 object form, so the quote can't land on another fork
+    def eth_call(self, data: str, block_number = None) :
+        if block_number is None:
+            block = "latest"
+        elif isinstance(block_number, int):
+            block = hex(block_number)
+        else:
+            block = {"blockHash": block_number}
+        response = self.provider.make_request(
+            "eth_call",
+            [{"to": self.quoter_address, "data": data}, block],
+        )
+        error = response.get("error")
+        if error is not None:
+            raise RuntimeError(f"RPC error: {error}")
+        return response["result"]
+
     def quote_exact_input_single(
         self,
         token_in: str,
@@ -66,25 +97,28 @@ class QuoterV2Client:
         sqrt_price_limit_x96: int = 0,
         block_number = None,
     ) :
-        token_in = Web3.to_checksum_address(token_in)
-        token_out = Web3.to_checksum_address(token_out)
+        template = exact_input_single_template(token_in, token_out, tick_spacing, sqrt_price_limit_x96)
+        result = self.eth_call(encode_exact_input_single(template, amount_in), block_number)
 
-        params = (
-            token_in,
-            token_out,
-            amount_in,
-            tick_spacing,
-            sqrt_price_limit_x96,
+        amount_out, sqrt_price_x96_after, ticks_crossed, gas_estimate = decode_exact_input_single(result)
+
+        return QuoteResult(
+            amount_out=amount_out,
+            sqrt_price_x96_after=sqrt_price_x96_after,
+            ticks_crossed=ticks_crossed,
+            gas_estimate=gas_estimate,
         )
 
-        if block_number is not None:
-            result = self.contract.functions.quoteExactInputSingle(params).call(
-                block_identifier=block_number
-            )
-        else:
-            result = self.contract.functions.quoteExactInputSingle(params).call()
+    # Multi-hop quote over an encoded V3 path
+    def quote_exact_input(
+        self,
+        path: bytes,
+        amount_in: int,
+        block_number = None,
+    ) :
+        result = self.eth_call(encode_exact_input(exact_input_template(path), amount_in), block_number)
 
-        amount_out, sqrt_price_x96_after, ticks_crossed, gas_estimate = result
+        amount_out, sqrt_price_x96_after, ticks_crossed, gas_estimate = decode_exact_input(result)
 
         return QuoteResult(
             amount_out=amount_out,
@@ -93,14 +127,34 @@ class QuoterV2Client:
             gas_estimate=gas_estimate,
         )
 
+    # Route as token addresses + per-hop tick spacings; single hops keep the cheaper call
+    def quote_path(
+        self,
+        tokens: tuple,
+        tick_spacings: tuple,
+        amount_in: int,
+        block_number = None,
+    ) :
+        if len(tick_spacings) == 1:
+            return self.quote_exact_input_single(
+                token_in=tokens[0],
+                token_out=tokens[1],
+                amount_in=amount_in,
+                tick_spacing=tick_spacings[0],
+                block_number=block_number,
+            )
+        return self.quote_exact_input(
+            encode_v3_path(tokens, tick_spacings),
+            amount_in,
+            block_number=block_number,
+        )
+
     def quote_quote_to_base(
         self,
-        quote_amount: Decimal,
+        quote_raw: int,
         block_number = None,
     ):
-        quote_raw = int(quote_amount * (10 ** self.quote_decimals))
-
-        result = self.quote_exact_input_single(
+        return self.quote_exact_input_single(
             token_in=self.quote_address,
             token_out=self.base_address,
             amount_in=quote_raw,
@@ -108,25 +162,15 @@ class QuoterV2Client:
             block_number=block_number,
         )
 
-        base_amount = Decimal(result.amount_out) / (10 ** self.base_decimals)
-
-        return result, base_amount
-
     def quote_base_to_quote(
         self,
-        base_amount: Decimal,
+        base_raw: int,
         block_number = None,
     ) :
-        base_raw = int(base_amount * (10 ** self.base_decimals))
-
-        result = self.quote_exact_input_single(
+        return self.quote_exact_input_single(
             token_in=self.base_address,
             token_out=self.quote_address,
             amount_in=base_raw,
             tick_spacing=self.tick_spacing,
             block_number=block_number,
         )
-
-        quote_amount = Decimal(result.amount_out) / (10 ** self.quote_decimals)
-
-        return result, quote_amount
@@ -0,0 +1,4 @@
+from .timing import StartupTimer
+from .pool_metadata import resolve_pool_metadata, verify_pool_metadata
+
+__all__ = ["StartupTimer", "resolve_pool_metadata", "verify_pool_metadata"]
@@ -0,0 +1,152 @@
+import json
+import os
+
+from config import (
+    POOL_ADDRESS,
+    POOL_BASE_ADDRESS,
+    POOL_QUOTE_ADDRESS,
+    POOL_BASE_DECIMALS,
+    POOL_QUOTE_DECIMALS,
+    POOL_TICK_SPACING,
+    QUOTER_V2_ADDRESS,
+    POOL_METADATA_CACHE_PATH,
+)
+from md.linea_rpc import LineaRpcClient
+
+# 4-byte selectors - avoids building contract objects (and importing web3) just to verify
+SELECTOR_TICK_SPACING = "0xd0c93a7c"  # tickSpacing()
+SELECTOR_FEE = "0xddca3f43"  # fee()
+SELECTOR_TOKEN0 = "0x0dfe1681"  # token0()
+SELECTOR_DECIMALS = "0x313ce567"  # decimals()
+
+
+def decode_uint(result: str) :
+    return int(result, 16)
+
+
+def decode_int24(result: str) :
+    value = int(result, 16) & 0xFFFFFF
+    return value - (1 << 24) if value & 0x800000 else value
+
+
+def decode_address(result: str) :
+    return "0x" + result[-40:].lower()
+
+
+# Every on-chain startup check as a single JSON-RPC batch
+async def fetch_pool_metadata(
+    linea: LineaRpcClient,
+    pool_address: str = POOL_ADDRESS,
+    base_address: str = POOL_BASE_ADDRESS,
+    quote_address: str = POOL_QUOTE_ADDRESS,
+    quoter_address: str = QUOTER_V2_ADDRESS,
+) :
+    def call(to: str, data: str) :
+        return ("eth_call", [{"to": to, "data": data}, "latest"])
+
+    responses = await linea.batch_request([
+        ("eth_chainId", []),
+        call(pool_address, SELECTOR_TICK_SPACING),
+        call(pool_address, SELECTOR_FEE),
+        call(pool_address, SELECTOR_TOKEN0),
+        call(base_address, SELECTOR_DECIMALS),
+        call(quote_address, SELECTOR_DECIMALS),
+        ("eth_getCode", [quoter_address, "latest"]),
+    ])
+    for response in responses:
+        if "error" in response:
+            raise RuntimeError(f"RPC error: {response['error']}")
+    results = [response["result"] for response in responses]
+
+    return {
+        "pool_address": pool_address.lower(),
+        "chain_id": decode_uint(results[0]),
+        "tick_spacing": decode_int24(results[1]),
+        "fee_pips": decode_uint(results[2]),
+        "token0": decode_address(results[3]),
+        "base_decimals": decode_uint(results[4]),
+        "quote_decimals": decode_uint(results[5]),
+        "quoter_address": quoter_address.lower(),
+        "quoter_has_code": results[6] not in (None, "0x", "0x0"),
+    }
+
+
+# Mismatches between metadata and config - empty list means verified
+def verify_pool_metadata(
+    metadata: dict,
+    pool_address: str = POOL_ADDRESS,
+    base_address: str = POOL_BASE_ADDRESS,
+    quote_address: str = POOL_QUOTE_ADDRESS,
+    base_decimals: int = POOL_BASE_DECIMALS,
+    quote_decimals: int = POOL_QUOTE_DECIMALS,
+    tick_spacing: int = POOL_TICK_SPACING,
+    quoter_address: str = QUOTER_V2_ADDRESS,
+) :
+    errors = []
+    if metadata.get("pool_address") != pool_address.lower():
+        errors.append(f"pool address {metadata.get('pool_address')} != {pool_address.lower()}")
+    if metadata.get("tick_spacing") != tick_spacing:
+        errors.append(f"tickSpacing {metadata.get('tick_spacing')} != {tick_spacing}")
+    if metadata.get("base_decimals") != base_decimals:
+        errors.append(f"base decimals {metadata.get('base_decimals')} != {base_decimals}")
+    if metadata.get("quote_decimals") != quote_decimals:
+        errors.append(f"quote decimals {metadata.get('quote_decimals')} != {quote_decimals}")
+    if metadata.get("token0") not in {base_address.lower(), quote_address.lower()}:
+        errors.append(f"pool token0 {metadata.get('token0')} is neither base nor quote")
+    if metadata.get("quoter_address") != quoter_address.lower():
+        errors.append(f"quoter address {metadata.get('quoter_address')} != {quoter_address.lower()}")
+    elif not metadata.get("quoter_has_code"):
+        errors.append(f"no contract code at quoter {quoter_address}")
+    return errors
+
+
+# Verified metadata keyed by lowercase pool address
+def load_cached_pool_metadata(
+    pool_address: str = POOL_ADDRESS,
+    path: str = POOL_METADATA_CACHE_PATH,
+) :
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError) as e:
+        print(f"[startup] ignoring unreadable pool metadata cache: {e}")
+        return None
+    return cache.get(pool_address.lower())
+
+
+def save_pool_metadata(
+    metadata: dict,
+    path: str = POOL_METADATA_CACHE_PATH,
+) :
+    if not path:
+        return
+    cache = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            cache = {}
+    cache[metadata["pool_address"]] = metadata
+
+    # Write-then-rename so a crash never leaves a half-written cache
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as cache_file:
+        json.dump(cache, cache_file, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# Cached metadata if it still matches config, otherwise one batch to the chain.
+# Returns (metadata, errors, from_cache)
+async def resolve_pool_metadata(linea: LineaRpcClient) :
+    cached = load_cached_pool_metadata()
+    if cached is not None and not verify_pool_metadata(cached):
+        return cached, [], True
+
+    metadata = await fetch_pool_metadata(linea)
+    errors = verify_pool_metadata(metadata)
+    if not errors:
+        save_pool_metadata(metadata)
+    return metadata, errors, False
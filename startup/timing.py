@@ -0,0 +1,63 @@
+import time
+
+
+# Wall-clock breakdown of startup. Phases overlap when run concurrently,
+# so each is reported against the process start as well as its own duration
+class StartupTimer:
+    def __init__(self, start: float = None) :
+        self.start = start if start is not None else time.perf_counter()
+        self.phases = []
+        self.open_phases = {}
+
+    def begin(self, name: str) :
+        self.open_phases[name] = time.perf_counter()
+
+    def end(self, name: str) :
+        started = self.open_phases.pop(name, None)
+        if started is None:
+            return
+        self.phases.append((name, started, time.perf_counter()))
+
+    # Context manager for synchronous phases
+    def phase(self, name: str) :
+        return _Phase(self, name)
+
+    # Awaits and times a coroutine - lets concurrent phases be timed separately
+    async def run(self, name: str, awaitable) :
+        self.begin(name)
+        try:
+            return await awaitable
+        finally:
+            self.end(name)
+
+    def mark(self, name: str) :
+        now = time.perf_counter()
+        self.phases.append((name, now, now))
+
+    def elapsed_ms(self) :
+        return (time.perf_counter() - self.start) * 1000
+
+    def report(self) :
+        print(f"[startup] ready in {self.elapsed_ms():.0f}ms")
+        for name, started, ended in sorted(self.phases, key=lambda phase: phase[1]):
+            offset_ms = (started - self.start) * 1000
+            duration_ms = (ended - started) * 1000
+            print(
+                f"[startup]   {name:<24} "
+                f"at={offset_ms:>6.0f}ms "
+                f"took={duration_ms:>6.0f}ms"
+            )
+
+
+class _Phase:
+    def __init__(self, timer: StartupTimer, name: str) :
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self) :
+        self.timer.begin(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) :
+        self.timer.end(self.name)
+        return False
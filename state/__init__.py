@@ -0,0 +1,18 @@
+from .block_ring import BlockEntry, BlockRing
+from .checkpoint import (
+    capture_warm_state,
+    checkpoint_loop,
+    load_checkpoint,
+    restore_warm_state,
+    write_checkpoint,
+)
+
+__all__ = [
+    "BlockEntry",
+    "BlockRing",
+    "capture_warm_state",
+    "checkpoint_loop",
+    "load_checkpoint",
+    "restore_warm_state",
+    "write_checkpoint",
+]
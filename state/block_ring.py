@@ -0,0 +1,122 @@
+from collections import OrderedDict
+
+from config import BLOCK_RING_SIZE
+
+
+# Everything the bot derived from one block. Books are the level tuples of
+# the stream's snapshot, shared rather than copied
+class BlockEntry:
+    __slots__ = (
+        "number",
+        "hash",
+        "parent_hash",
+        "timestamp",
+        "received_at",
+        "gas_price_wei",
+        "book_ts",
+        "bids",
+        "asks",
+        "quotes",
+        "band",
+        "opportunities",
+        "rows_logged",
+        "orphaned",
+    )
+
+    def __init__(
+        self,
+        number: int,
+        block_hash: str,
+        parent_hash: str,
+        timestamp: int,
+        received_at: float = None,
+    ) :
+        self.number = number
+        self.hash = block_hash
+        self.parent_hash = parent_hash
+        self.timestamp = timestamp
+        self.received_at = received_at
+        self.gas_price_wei = None
+        self.book_ts = 0.0
+        self.bids = None
+        self.asks = None
+        self.quotes = None
+        self.band = None
+        self.opportunities = 0
+        self.rows_logged = 0
+        self.orphaned = False
+
+
+# Bounded history of recent blocks keyed by hash, plus the canonical
+# number -> hash view. Headers arrive through a size-1 queue so gaps are
+# normal; a reorg is only declared when the new header provably conflicts
+# with a block we hold
+class BlockRing:
+    def __init__(self, capacity: int = BLOCK_RING_SIZE) :
+        self.capacity = max(2, int(capacity))
+        self.entries = OrderedDict()
+        self.canonical = {}
+        self.head = None
+        self.reorgs = 0
+
+    def __len__(self) :
+        return len(self.entries)
+
+    def get(self, block_hash: str) :
+        return self.entries.get(block_hash)
+
+    def at(self, number: int) :
+        block_hash = self.canonical.get(number)
+        return self.entries.get(block_hash) if block_hash else None
+
+    # Returns (entry, orphaned_entries); entry is None for a header already seen
+    def add_header(
+        self,
+        number: int,
+        block_hash: str,
+        parent_hash: str,
+        timestamp: int,
+        received_at: float = None,
+    ) :
+        if block_hash is not None and block_hash in self.entries:
+            return None, []
+
+        orphaned = []
+        head = self.head
+        if head is not None and parent_hash != head.hash:
+            parent = self.entries.get(parent_hash)
+            if parent is not None and not parent.orphaned:
+                # Known ancestor - everything we hold above it is on the losing fork
+                fork_point = parent.number
+            elif number <= head.number + 1:
+                # Replaces blocks we hold, but its parent is unknown (or is
+                # itself orphaned) - conflicting heights from number - 1 up
+                fork_point = number - 2
+                held_parent = self.at(number - 1)
+                if held_parent is None or held_parent.hash == parent_hash:
+                    fork_point = number - 1
+            else:
+                # Skipped headers - can't tell a gap from a reorg without fetching
+                fork_point = None
+
+            if fork_point is not None:
+                for height in sorted(self.canonical):
+                    if height > fork_point:
+                        entry = self.entries.get(self.canonical.pop(height))
+                        if entry is not None:
+                            entry.orphaned = True
+                            orphaned.append(entry)
+                if orphaned:
+                    self.reorgs += 1
+
+        entry = BlockEntry(number, block_hash, parent_hash, timestamp, received_at)
+        self.entries[block_hash] = entry
+        self.canonical[number] = block_hash
+        self.head = entry
+
+        while len(self.entries) > self.capacity:
+            _, evicted = self.entries.popitem(last=False)
+            if self.canonical.get(evicted.number) == evicted.hash:
+                del self.canonical[evicted.number]
+
+        return entry, orphaned
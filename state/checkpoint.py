@@ -0,0 +1,233 @@
+import asyncio
+import json
+import os
+import time
+from dataclasses import asdict
+
+from config import (
+    ACTIVE_POOL,
+    POOL_ADDRESS,
+    WARM_STATE_PATH,
+    WARM_STATE_INTERVAL_S,
+    WARM_STATE_MAX_AGE_S,
+    WARM_STATE_BOOK_MAX_AGE_S,
+    WARM_STATE_QUOTE_MAX_AGE_BLOCKS,
+    GAS_PRICE_MAX_AGE_BLOCKS,
+)
+from models.types import OrderbookLevel, PriceBand
+
+# Bump when the layout changes - older checkpoints are ignored, not migrated
+CHECKPOINT_VERSION = 4
+
+
+# [price, quantity, venue] - the venue is what a consolidated book's fills are
+# charged their fee by, so it survives a restart
+def levels_to_json(levels: list) :
+    return [[level.price, level.quantity, level.venue] for level in levels]
+
+
+def levels_from_json(levels: list) :
+    return [
+        OrderbookLevel(price=int(price), quantity=int(qty), venue=venue)
+        for price, qty, venue in levels
+    ]
+
+
+# Everything a restart would otherwise re-fetch, as plain JSON-able values.
+# Built on the event loop so the components are consistent with each other
+def capture_warm_state(
+    evaluator,
+    pool_state,
+    streams: dict,
+    block_context: dict,
+    last_gas: dict,
+) :
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "saved_at": time.time(),
+        "active_pool": ACTIVE_POOL,
+        "pool_address": POOL_ADDRESS.lower(),
+        "pool": {
+            "fee_pips": pool_state.fee_pips,
+            "slot0": list(pool_state.last_slot0) if pool_state.last_slot0 else None,
+        },
+        "books": {},
+        "gas": None,
+        "quotes": None,
+    }
+
+    for label, stream in streams.items():
+        bids, asks = stream.get_orderbook()
+        if bids and asks:
+            state["books"][label] = {
+                "ts": stream.last_update_time(),
+                "bids": levels_to_json(bids),
+                "asks": levels_to_json(asks),
+            }
+
+    if last_gas.get("block_number") is not None:
+        state["gas"] = dict(last_gas)
+
+    cached = evaluator.cached_block
+    if cached is not None and cached["block_number"] == block_context["block_number"]:
+        band = block_context["band"]
+        state["quotes"] = {
+            "block_number": cached["block_number"],
+            "block_hash": cached.get("block_hash"),
+            "block_timestamp": block_context["block_timestamp"],
+            "gas_price_wei": cached["gas_price_wei"],
+            "gas_cost_wei": cached["gas_cost_wei"],
+            "gas_cost_quote_raw": cached["gas_cost_quote_raw"],
+            "gas_cost_wei_by_hops": cached["gas_cost_wei_by_hops"],
+            "gas_cost_quote_by_hops": cached["gas_cost_quote_by_hops"],
+            "dex_legs": [list(leg) for leg in cached["dex_legs"]],
+            # Route ids are only meaningful against the same route table
+            "routes": [route.path.hex() for route in evaluator.route_index.routes],
+            "trade_sizes_base_raw": evaluator.trade_sizes_base_raw,
+            "trade_sizes_quote_raw": evaluator.trade_sizes_quote_raw,
+            "band": asdict(band) if band is not None else None,
+        }
+
+    return state
+
+
+# Write-then-rename so a crash mid-write leaves the previous checkpoint intact
+def write_checkpoint(state: dict, path: str = WARM_STATE_PATH) :
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as checkpoint_file:
+        json.dump(state, checkpoint_file, separators=(",", ":"))
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str = WARM_STATE_PATH) :
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as checkpoint_file:
+            return json.load(checkpoint_file)
+    except (OSError, ValueError) as e:
+        print(f"[state] ignoring unreadable checkpoint: {e}")
+        return None
+
+
+# Restores each component that is still fresh and returns {component: outcome}.
+# Books are checked by wall-clock age; gas, slot0 and quotes by block distance
+# from head_block, and are skipped if the head is unknown
+def restore_warm_state(
+    state: dict,
+    head_block: int,
+    evaluator,
+    pool_state,
+    streams: dict,
+    block_context: dict,
+    last_gas: dict,
+    now: float = None,
+) :
+    now = time.time() if now is None else now
+    if state is None:
+        return {"checkpoint": "none"}
+    if state.get("version") != CHECKPOINT_VERSION:
+        return {"checkpoint": f"version {state.get('version')} != {CHECKPOINT_VERSION}"}
+    if state.get("pool_address") != POOL_ADDRESS.lower():
+        return {"checkpoint": f"pool {state.get('pool_address')} != {POOL_ADDRESS.lower()}"}
+    age_s = now - state.get("saved_at", 0)
+    if age_s > WARM_STATE_MAX_AGE_S:
+        return {"checkpoint": f"stale ({age_s:.0f}s old)"}
+
+    outcome = {}
+
+    def blocks_behind(block_number) :
+        if head_block is None or block_number is None:
+            return None
+        return head_block - block_number
+
+    # Books - only seconds-old books are worth anything
+    for label, stream in streams.items():
+        book = state["books"].get(label)
+        if book is None:
+            outcome[f"book:{label}"] = "missing"
+            continue
+        book_age_s = now - book["ts"]
+        if book_age_s > WARM_STATE_BOOK_MAX_AGE_S:
+            outcome[f"book:{label}"] = f"stale ({book_age_s:.1f}s)"
+            continue
+        stream.restore_book(levels_from_json(book["bids"]), levels_from_json(book["asks"]), book["ts"])
+        outcome[f"book:{label}"] = f"restored ({book_age_s:.1f}s)"
+
+    # Pool fee never changes; slot0 is only kept for the block it was read at
+    pool = state.get("pool") or {}
+    if pool_state.fee_pips is None and pool.get("fee_pips") is not None:
+        pool_state.fee_pips = pool["fee_pips"]
+    slot0 = pool.get("slot0")
+    if slot0 is not None:
+        behind = blocks_behind(slot0[0])
+        if behind is not None and 0 <= behind <= WARM_STATE_QUOTE_MAX_AGE_BLOCKS:
+            pool_state.last_slot0 = tuple(slot0)
+            outcome["slot0"] = f"restored ({behind} blocks)"
+        else:
+            outcome["slot0"] = "stale"
+
+    gas = state.get("gas")
+    if gas is not None:
+        behind = blocks_behind(gas["block_number"])
+        if behind is not None and 0 <= behind <= GAS_PRICE_MAX_AGE_BLOCKS:
+            last_gas.update(gas)
+            outcome["gas"] = f"restored ({behind} blocks)"
+        else:
+            outcome["gas"] = "stale"
+
+    # DEX quotes - reused until the first header's full evaluation replaces them
+    quotes = state.get("quotes")
+    if quotes is not None:
+        behind = blocks_behind(quotes["block_number"])
+        if (
+            quotes["trade_sizes_base_raw"] != evaluator.trade_sizes_base_raw
+            or quotes["trade_sizes_quote_raw"] != evaluator.trade_sizes_quote_raw
+        ):
+            outcome["quotes"] = "trade sizes changed"
+        elif quotes["routes"] != [route.path.hex() for route in evaluator.route_index.routes]:
+            outcome["quotes"] = "routes changed"
+        elif behind is None or not 0 <= behind <= WARM_STATE_QUOTE_MAX_AGE_BLOCKS:
+            outcome["quotes"] = "stale"
+        else:
+            evaluator.cached_block = {
+                "block_number": quotes["block_number"],
+                "block_hash": quotes.get("block_hash"),
+                "gas_price_wei": quotes["gas_price_wei"],
+                "gas_cost_wei": quotes["gas_cost_wei"],
+                "gas_cost_quote_raw": quotes["gas_cost_quote_raw"],
+                "gas_cost_wei_by_hops": quotes["gas_cost_wei_by_hops"],
+                "gas_cost_quote_by_hops": quotes["gas_cost_quote_by_hops"],
+                "dex_legs": [
+                    (*leg[:5], tuple(tuple(part) for part in leg[5]) if leg[5] else None)
+                    for leg in quotes["dex_legs"]
+                ],
+            }
+            band = quotes.get("band")
+            block_context["block_number"] = quotes["block_number"]
+            block_context["block_hash"] = quotes.get("block_hash")
+            block_context["block_timestamp"] = quotes["block_timestamp"]
+            block_context["book_ts"] = 0.0
+            block_context["gas_price_wei"] = quotes["gas_price_wei"]
+            block_context["band"] = PriceBand(**band) if band is not None else None
+            outcome["quotes"] = f"restored ({behind} blocks, {len(quotes['dex_legs'])} legs)"
+
+    return outcome
+
+
+# Periodic checkpoint; the JSON write runs off the event loop
+async def checkpoint_loop(
+    capture,
+    path: str = WARM_STATE_PATH,
+    interval_s: float = WARM_STATE_INTERVAL_S,
+) :
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            await asyncio.to_thread(write_checkpoint, capture(), path)
+        except Exception as e:
+            print(f"[state] checkpoint write failed: {e}")
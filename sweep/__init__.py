@@ -0,0 +1,13 @@
+from .capture import capture_bytes, read_captures
+
+__all__ = ["ParameterSweep", "SweepData", "capture_bytes", "read_captures"]
+
+
+# The engine needs numpy - loaded on first use so the bot, which only writes
+# captures, doesn't pay for it at startup
+def __getattr__(name: str) :
+    if name in ("ParameterSweep", "SweepData"):
+        from . import engine
+
+        return getattr(engine, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
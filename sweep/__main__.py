@@ -0,0 +1,3 @@
+from sweep.engine import main
+
+raise SystemExit(main())
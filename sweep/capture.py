@@ -0,0 +1,58 @@
+import json
+
+from state.checkpoint import levels_to_json
+
+
+# Swap hops a cached DEX leg pays gas for - a split pays for every leg
+def leg_hops(route_id: int, split: tuple, routes: tuple) :
+    if routes is None:
+        return 1
+    if split is not None:
+        return sum(routes[leg_route_id].hops for leg_route_id, _, _ in split)
+    return routes[route_id].hops
+
+
+# One evaluated block as a JSONL line - everything a parameter sweep re-prices:
+#   {"block", "ts", "gas_price_wei",
+#    "pair": {"bids", "asks"}, "gas": {...}, "hedge": {...} | null,
+#    "legs": [[direction, amount_in_raw, amount_out_raw, hops], ...]}
+# Books are [price_fx, quantity_fx] pairs as in the warm-state checkpoint. The
+# pair book prices the block; "hedge" is the book the CEX leg filled against
+# when that differs (backfill with hedge latency), null when it is the pair book.
+# Legs are the block's cached DEX quotes, including sizes the CEX couldn't fill
+def capture_bytes(
+    block_number: int,
+    block_timestamp: float,
+    gas_price_wei: int,
+    pair_book: tuple,
+    gas_book: tuple,
+    cached_block: dict,
+    routes: tuple = None,
+    hedge_book: tuple = None,
+) :
+    # Stdlib json - fixed-point prices overflow orjson's 64-bit integers
+    return json.dumps({
+        "block": block_number,
+        "ts": block_timestamp,
+        "gas_price_wei": gas_price_wei,
+        "pair": {"bids": levels_to_json(pair_book[0]), "asks": levels_to_json(pair_book[1])},
+        "gas": {"bids": levels_to_json(gas_book[0]), "asks": levels_to_json(gas_book[1])},
+        "hedge": (
+            {"bids": levels_to_json(hedge_book[0]), "asks": levels_to_json(hedge_book[1])}
+            if hedge_book is not None
+            else None
+        ),
+        "legs": [
+            [direction, amount_in_raw, amount_out_raw, leg_hops(route_id, split, routes)]
+            for direction, amount_in_raw, amount_out_raw, _, route_id, split in cached_block["dex_legs"]
+        ],
+    }, separators=(",", ":")).encode()
+
+
+def read_captures(paths: list) :
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as capture_file:
+            for line in capture_file:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
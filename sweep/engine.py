@@ -0,0 +1,462 @@
+import itertools
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from config import (
+    POOL_BASE_SYMBOL,
+    POOL_QUOTE_SYMBOL,
+    POOL_BASE_DECIMALS,
+    POOL_QUOTE_DECIMALS,
+    NATIVE_SYMBOL,
+    GAS_QUOTE_SYMBOL,
+    ROUTE_EXTRA_HOP_GAS_LIMIT,
+)
+from arbitrage.results import DEX_BUY_CEX_SELL, DEX_SELL_CEX_BUY
+from models.fixed_point import BPS_SCALE, FIXED_SCALE
+from sweep.capture import read_captures
+
+DIRECTIONS = (DEX_BUY_CEX_SELL, DEX_SELL_CEX_BUY)
+# Grid points x blocks priced at once - sizes the working buffers
+CHUNK_ELEMENTS = 2_000_000
+
+
+def require_numpy() :
+    if np is None:
+        raise RuntimeError("the sweep needs numpy: pip install numpy")
+
+
+# [price, quantity, venue] fixed-point levels -> float rows padded to depth. Levels the
+# bot would skip (non-positive price or quantity) get zero quantity
+def book_arrays(books: list, depth: int) :
+    prices = np.zeros((len(books), depth))
+    quantities = np.zeros((len(books), depth))
+    for row, levels in enumerate(books):
+        for col, (price, quantity, *_) in enumerate(levels[:depth]):
+            if price > 0 and quantity > 0:
+                prices[row, col] = price / FIXED_SCALE
+                quantities[row, col] = quantity / FIXED_SCALE
+    return prices, quantities
+
+
+# Depth-weighted mid over the top `levels` of both sides, per block
+def weighted_mids(bid_px, bid_qty, ask_px, ask_qty, levels: int) :
+    qty = bid_qty[:, :levels].sum(1) + ask_qty[:, :levels].sum(1)
+    value = (bid_px[:, :levels] * bid_qty[:, :levels]).sum(1) + (ask_px[:, :levels] * ask_qty[:, :levels]).sum(1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(qty > 0, value / qty, np.nan)
+
+
+# Same rules as ArbitrageEvaluator.gas_price_in_quote and compute_quote_price_usd
+def native_in_quote(base_mid, native_mid) :
+    if POOL_QUOTE_SYMBOL in {NATIVE_SYMBOL, "WETH"}:
+        return np.ones_like(base_mid)
+    if POOL_BASE_SYMBOL in {NATIVE_SYMBOL, "WETH"}:
+        return base_mid
+    if POOL_QUOTE_SYMBOL == GAS_QUOTE_SYMBOL:
+        return native_mid
+    return np.full_like(base_mid, np.nan)
+
+
+def quote_usd(base_mid, native_mid) :
+    if POOL_QUOTE_SYMBOL == GAS_QUOTE_SYMBOL:
+        return np.ones_like(base_mid)
+    if POOL_QUOTE_SYMBOL in {NATIVE_SYMBOL, "WETH"}:
+        return native_mid
+    if POOL_BASE_SYMBOL in {NATIVE_SYMBOL, "WETH"}:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(base_mid > 0, native_mid / base_mid, np.nan)
+    return np.full_like(base_mid, np.nan)
+
+
+# Walks a book for many amounts per block at once. cum_in/cum_out are running
+# totals of what a level takes and gives (with a leading zero column), so the
+# level an amount ends on is the count of totals below it. Amounts beyond the
+# book's depth are infeasible (nan), as the bot skips them
+def walk(cum_in, cum_out, rate, amounts) :
+    blocks, depth = rate.shape
+    flat = amounts.reshape(blocks, -1)
+    level = (cum_in[:, None, 1:] < flat[:, :, None]).sum(2)
+    filled = level < depth
+    level = np.minimum(level, depth - 1)
+    prev_in = np.take_along_axis(cum_in, level, 1)
+    prev_out = np.take_along_axis(cum_out, level, 1)
+    level_rate = np.take_along_axis(rate, level, 1)
+    out = prev_out + (flat - prev_in) * level_rate
+    out = np.where(filled & (flat > 0), out, np.nan)
+    return out.reshape(amounts.shape)
+
+
+# Captured blocks as arrays: books padded to a common depth, and per direction
+# the DEX output for every size on a shared size grid (nan where a size wasn't
+# quoted). Amounts are floats in token units - results agree with the bot's
+# integer math to float precision
+class SweepData:
+    def __init__(self) :
+        self.blocks = None
+        self.gas_price_wei = None
+        self.pair = None
+        self.gas = None
+        self.fill = None
+        self.sizes = {}
+        self.dex_out = {}
+        self.hops = {}
+
+    def __len__(self) :
+        return 0 if self.blocks is None else len(self.blocks)
+
+    @classmethod
+    def load(cls, paths: list) :
+        require_numpy()
+        by_block = {}
+        for record in read_captures(paths):
+            by_block[record["block"]] = record
+        records = [by_block[block] for block in sorted(by_block)]
+
+        def depth_of(key) :
+            return max(
+                (len(record[key][side]) for record in records if record.get(key) for side in ("bids", "asks")),
+                default=1,
+            )
+
+        data = cls()
+        data.blocks = np.array([record["block"] for record in records], dtype=np.int64)
+        data.gas_price_wei = np.array([float(record["gas_price_wei"]) for record in records])
+        pair_depth = max(depth_of("pair"), depth_of("hedge"))
+        gas_depth = depth_of("gas")
+        data.pair = book_arrays([r["pair"]["bids"] for r in records], pair_depth) + book_arrays(
+            [r["pair"]["asks"] for r in records], pair_depth
+        )
+        data.gas = book_arrays([r["gas"]["bids"] for r in records], gas_depth) + book_arrays(
+            [r["gas"]["asks"] for r in records], gas_depth
+        )
+        fill_books = [r["hedge"] or r["pair"] for r in records]
+        data.fill = book_arrays([b["bids"] for b in fill_books], pair_depth) + book_arrays(
+            [b["asks"] for b in fill_books], pair_depth
+        )
+
+        units_in = {DEX_BUY_CEX_SELL: 10 ** POOL_QUOTE_DECIMALS, DEX_SELL_CEX_BUY: 10 ** POOL_BASE_DECIMALS}
+        units_out = {DEX_BUY_CEX_SELL: 10 ** POOL_BASE_DECIMALS, DEX_SELL_CEX_BUY: 10 ** POOL_QUOTE_DECIMALS}
+        for direction in DIRECTIONS:
+            sizes = sorted({leg[1] for r in records for leg in r["legs"] if leg[0] == direction})
+            column = {size: j for j, size in enumerate(sizes)}
+            dex_out = np.full((len(records), len(sizes)), np.nan)
+            hops = np.ones((len(records), len(sizes)))
+            for row, record in enumerate(records):
+                for leg_direction, amount_in, amount_out, leg_hops in record["legs"]:
+                    if leg_direction == direction and amount_out > 0:
+                        dex_out[row, column[amount_in]] = amount_out / units_out[direction]
+                        hops[row, column[amount_in]] = leg_hops
+            data.sizes[direction] = np.array(sizes, dtype=float) / units_in[direction]
+            data.dex_out[direction] = dex_out
+            data.hops[direction] = hops
+        return data
+
+    def save(self, path: str) :
+        arrays = {"blocks": self.blocks, "gas_price_wei": self.gas_price_wei}
+        for name in ("pair", "gas", "fill"):
+            for i, array in enumerate(getattr(self, name)):
+                arrays[f"{name}_{i}"] = array
+        for direction in DIRECTIONS:
+            arrays[f"sizes_{direction}"] = self.sizes[direction]
+            arrays[f"dex_out_{direction}"] = self.dex_out[direction]
+            arrays[f"hops_{direction}"] = self.hops[direction]
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load_npz(cls, path: str) :
+        require_numpy()
+        arrays = np.load(path)
+        data = cls()
+        data.blocks = arrays["blocks"]
+        data.gas_price_wei = arrays["gas_price_wei"]
+        for name in ("pair", "gas", "fill"):
+            setattr(data, name, tuple(arrays[f"{name}_{i}"] for i in range(4)))
+        for direction in DIRECTIONS:
+            data.sizes[direction] = arrays[f"sizes_{direction}"]
+            data.dex_out[direction] = arrays[f"dex_out_{direction}"]
+            data.hops[direction] = arrays[f"hops_{direction}"]
+        return data
+
+
+# Re-prices every captured block over the Cartesian grid of taker fee, gas
+# limit, depth-weighted levels and size multiplier. The CEX walk depends only on
+# size, fee scales proceeds and levels only move the mids, so each is computed
+# once on its own axis and combined by broadcasting. Gas is linear in the limit
+# and its USD rate is the same for both directions, so a trade is reduced to the
+# single-hop gas limit it breaks even at: it wins under every smaller limit, by
+# (breakeven - limit) x USD per gas unit. The limit axis is then bucketed rather
+# than broadcast, and costs next to nothing. Multiplied sizes interpolate
+# linearly between quoted sizes (a slight underestimate on a concave AMM curve);
+# past the largest quoted size they are skipped. A block is screened out first
+# if nothing breaks even above the lowest limit at the lowest fee
+class ParameterSweep:
+    def __init__(
+        self,
+        data: SweepData,
+        fees_bps: list,
+        gas_limits: list,
+        levels: list,
+        size_mults: list,
+        extra_hop_gas_limit: int = ROUTE_EXTRA_HOP_GAS_LIMIT,
+    ) :
+        require_numpy()
+        self.data = data
+        self.fees_bps = [float(f) for f in fees_bps]
+        # Ascending - the buckets below are searched on it
+        self.gas_limits = sorted(int(g) for g in gas_limits)
+        self.levels = [int(level) for level in levels]
+        self.size_mults = [float(m) for m in size_mults]
+        self.extra_hop_gas_limit = extra_hop_gas_limit
+        self.fee_keep = 1 - np.array(self.fees_bps) / BPS_SCALE
+        self.stats = {}
+
+        # Per-block prices for each level count: [blocks, levels]
+        base_mid = np.stack([weighted_mids(*data.pair, n) for n in self.levels], 1)
+        native_mid = np.stack([weighted_mids(*data.gas, n) for n in self.levels], 1)
+        self.quote_usd = quote_usd(base_mid, native_mid)
+        self.base_usd = base_mid * self.quote_usd
+        # USD per gas unit at the block's price: [levels, blocks]. Floored so a
+        # zero gas price still ranks trades by value
+        gas_usd_per_wei = native_in_quote(base_mid, native_mid) * self.quote_usd / 1e18
+        self.gas_unit_usd = np.maximum((data.gas_price_wei[:, None] * gas_usd_per_wei).T, 1e-30)
+
+        # Running totals for the CEX walks, leading zero column
+        bid_px, bid_qty, ask_px, ask_qty = data.fill
+        zeros = np.zeros((len(data), 1))
+        # Selling base into bids: base in, quote out
+        self.bid_cum_base = np.hstack([zeros, np.cumsum(bid_qty, 1)])
+        self.bid_cum_quote = np.hstack([zeros, np.cumsum(bid_px * bid_qty, 1)])
+        self.bid_px = bid_px
+        # Buying base from asks: quote in, base out
+        self.ask_cum_quote = np.hstack([zeros, np.cumsum(ask_px * ask_qty, 1)])
+        self.ask_cum_base = np.hstack([zeros, np.cumsum(ask_qty, 1)])
+        with np.errstate(divide="ignore"):
+            self.ask_base_per_quote = np.where(ask_px > 0, 1 / ask_px, 0.0)
+
+    # DEX output at each multiplied size: [blocks, sizes, mults], plus amount in
+    # [sizes, mults] and hops [blocks, sizes, mults]
+    def scaled_legs(self, direction: int, rows) :
+        sizes = self.data.sizes[direction]
+        dex_out = self.data.dex_out[direction][rows]
+        hops = self.data.hops[direction][rows]
+        grid = np.concatenate([[0.0], sizes])
+        out_grid = np.hstack([np.zeros((len(dex_out), 1)), dex_out])
+        hops_grid = np.hstack([np.ones((len(dex_out), 1)), hops])
+        amount_in = sizes[:, None] * np.array(self.size_mults)[None, :]
+        hi = np.searchsorted(grid, amount_in, side="left")
+        beyond = hi >= len(grid)
+        hi = np.minimum(np.maximum(hi, 1), len(grid) - 1)
+        lo = hi - 1
+        weight = (amount_in - grid[lo]) / (grid[hi] - grid[lo])
+        out = out_grid[:, lo] + weight[None] * (out_grid[:, hi] - out_grid[:, lo])
+        out[:, beyond] = np.nan
+        return out, amount_in, hops_grid[:, hi]
+
+    # Single-hop gas limit at which each trade nets zero, blocks last:
+    # [sizes, mults, fees, levels, blocks]. -inf where a size can't be filled
+    def breakeven(self, direction: int, rows, fee_keep) :
+        dex_out, amount_in, hops = self.scaled_legs(direction, rows)
+        if direction == DEX_BUY_CEX_SELL:
+            # Base bought on the DEX is sold into bids; profit in quote
+            proceeds = walk(self.bid_cum_base[rows], self.bid_cum_quote[rows], self.bid_px[rows], dex_out)
+            to_usd = self.quote_usd[rows]
+        else:
+            # Quote from the DEX buys base from asks; profit in base
+            proceeds = walk(
+                self.ask_cum_quote[rows], self.ask_cum_base[rows], self.ask_base_per_quote[rows], dex_out
+            )
+            to_usd = self.base_usd[rows]
+        proceeds = np.nan_to_num(proceeds.transpose(1, 2, 0), nan=-np.inf)
+        profit = proceeds[:, :, None, :] * fee_keep[:, None] - amount_in[:, :, None, None]
+        units = profit[:, :, :, None, :] * (to_usd.T / self.gas_unit_usd[:, rows])
+        # Extra hops are paid before the single-hop limit
+        units -= ((hops.transpose(1, 2, 0) - 1) * self.extra_hop_gas_limit)[:, :, None, None, :]
+        return units
+
+    # Blocks where something breaks even above the lowest limit at the lowest fee
+    def screen(self) :
+        rows = np.arange(len(self.data))
+        fee_keep = np.array([self.fee_keep.max()])
+        keep = np.zeros(len(rows), dtype=bool)
+        for start in range(0, len(rows), 4096):
+            chunk = rows[start:start + 4096]
+            for direction in DIRECTIONS:
+                if not len(self.data.sizes[direction]):
+                    continue
+                units = self.breakeven(direction, chunk, fee_keep)
+                keep[start:start + len(chunk)] |= (units > self.gas_limits[0]).reshape(-1, len(chunk)).any(0)
+        return rows[keep]
+
+    # Per (mult, fee, limit, levels) totals of weights over entries whose
+    # breakeven is above the limit. Entries are bucketed by how many limits lie
+    # below their breakeven; a limit's total is then a suffix sum of buckets
+    def above_limits(self, units, weights: list) :
+        limits = np.array(self.gas_limits, dtype=float)
+        bucket = np.searchsorted(limits, units, side="left")
+        mults, fees, levels = units.shape[-4:-1]
+        cells = np.arange(mults * fees * levels).reshape(mults, fees, levels, 1)
+        keys = (cells * (len(limits) + 1) + bucket).ravel()
+        size = mults * fees * levels * (len(limits) + 1)
+        totals = []
+        for weight in weights:
+            counts = np.bincount(keys, weights=None if weight is None else weight.ravel(), minlength=size)
+            counts = counts.reshape(mults, fees, levels, len(limits) + 1)
+            # Entries in bucket > k clear limit k
+            above = np.cumsum(counts[..., ::-1], -1)[..., ::-1][..., 1:]
+            totals.append(above.transpose(0, 1, 3, 2))
+        return totals
+
+    def run(self) :
+        started = time.perf_counter()
+        rows = self.screen()
+        screened_at = time.perf_counter()
+        limits = np.array(self.gas_limits, dtype=float)
+        grid_shape = (len(self.size_mults), len(self.fees_bps), len(self.gas_limits), len(self.levels))
+        pnl = np.zeros(grid_shape)
+        trades = np.zeros(grid_shape, dtype=np.int64)
+        profitable_rows = np.zeros(grid_shape, dtype=np.int64)
+
+        sizes = max(len(s) for s in self.data.sizes.values())
+        chunk_blocks = max(1, CHUNK_ELEMENTS // (sizes * len(self.size_mults) * len(self.fees_bps) * len(self.levels)))
+        for start in range(0, len(rows), chunk_blocks):
+            chunk = rows[start:start + chunk_blocks]
+            # The block's best trade has the highest breakeven, whatever the limit
+            best = np.full(grid_shape[:2] + (len(self.levels), len(chunk)), -np.inf)
+            for direction in DIRECTIONS:
+                if not len(self.data.sizes[direction]):
+                    continue
+                units = self.breakeven(direction, chunk, self.fee_keep)
+                np.maximum(best, units.max(0), out=best)
+                profitable_rows += self.above_limits(units, [None])[0].astype(np.int64)
+            # Net at limit k is (best - k) x USD per unit, summed over winning blocks
+            unit_usd = np.broadcast_to(self.gas_unit_usd[:, chunk], best.shape)
+            won, best_usd, unit_usd_sum = self.above_limits(
+                best, [None, np.where(best > -np.inf, best * unit_usd, 0.0), unit_usd]
+            )
+            trades += won.astype(np.int64)
+            pnl += best_usd - limits[None, None, :, None] * unit_usd_sum
+
+        self.stats = {
+            "blocks": len(self.data),
+            "blocks_screened_in": len(rows),
+            "combinations": int(np.prod(grid_shape)),
+            "screen_s": round(screened_at - started, 3),
+            "sweep_s": round(time.perf_counter() - screened_at, 3),
+        }
+        results = []
+        for (m, f, g, n) in itertools.product(*(range(size) for size in grid_shape)):
+            results.append({
+                "fee_bps": self.fees_bps[f],
+                "gas_limit": self.gas_limits[g],
+                "levels": self.levels[n],
+                "size_mult": self.size_mults[m],
+                "pnl_usd": float(pnl[m, f, g, n]),
+                "trades": int(trades[m, f, g, n]),
+                "profitable_rows": int(profitable_rows[m, f, g, n]),
+            })
+        results.sort(key=lambda result: result["pnl_usd"], reverse=True)
+        return results
+
+
+# "0.5,0.75,1" or an inclusive range "0.25:2:0.25"
+def parse_axis(text: str, cast=float) :
+    values = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if ":" in part:
+            start, stop, step = (float(x) for x in part.split(":"))
+            count = int(round((stop - start) / step)) + 1
+            values.extend(cast(round(start + i * step, 10)) for i in range(count))
+        else:
+            values.append(cast(float(part)))
+    return sorted(set(values))
+
+
+# Top rows, plus the current config's row wherever it ranks
+def format_table(results: list, baseline: dict, top: int) :
+    header = f"{'rank':>4} {'fee_bps':>8} {'gas_limit':>9} {'levels':>6} {'size_x':>6} {'pnl_usd':>12} {'trades':>7} {'rows':>7} {'usd/trade':>9}"
+    lines = [header, "-" * len(header)]
+    for rank, result in enumerate(results, 1):
+        is_baseline = all(result[key] == value for key, value in baseline.items())
+        if rank > top and not is_baseline:
+            continue
+        if rank > top + 1 and is_baseline:
+            lines.append(f"{'...':>4}")
+        per_trade = result["pnl_usd"] / result["trades"] if result["trades"] else 0.0
+        lines.append(
+            f"{rank:>4} {result['fee_bps']:>8g} {result['gas_limit']:>9} {result['levels']:>6} "
+            f"{result['size_mult']:>6g} {result['pnl_usd']:>12.2f} {result['trades']:>7} "
+            f"{result['profitable_rows']:>7} {per_trade:>9.3f}{'*' if is_baseline else ''}"
+        )
+    return "\n".join(lines)
+
+
+def main() :
+    import argparse
+    import csv
+
+    from config import BINANCE_TAKER_FEE_BPS, DEFAULT_GAS_LIMIT, DEPTH_WEIGHTED_LEVELS
+
+    parser = argparse.ArgumentParser(
+        description="Re-price captured blocks over a grid of fee, gas limit, mid levels and size multipliers"
+    )
+    parser.add_argument("captures", nargs="+", help="capture JSONL files (SWEEP_CAPTURE_PATH / backfill --capture) or one .npz")
+    parser.add_argument("--fees", default=str(BINANCE_TAKER_FEE_BPS), help="taker fee bps, e.g. 0.5,0.75,1 or 0:2:0.25")
+    parser.add_argument("--gas-limits", default=str(DEFAULT_GAS_LIMIT), help="single-hop gas limits")
+    parser.add_argument("--levels", default=str(DEPTH_WEIGHTED_LEVELS), help="depth-weighted mid levels")
+    parser.add_argument("--size-mults", default="1", help="multipliers on the captured trade sizes")
+    parser.add_argument("--top", type=int, default=20, help="rows to print")
+    parser.add_argument("--csv", default=None, help="write every combination, ranked, as CSV")
+    parser.add_argument("--save-npz", default=None, help="save the loaded arrays for faster reloads")
+    args = parser.parse_args()
+
+    try:
+        require_numpy()
+    except RuntimeError as e:
+        print(f"[sweep] {e}")
+        return 1
+
+    loaded_at = time.perf_counter()
+    if len(args.captures) == 1 and args.captures[0].endswith(".npz"):
+        data = SweepData.load_npz(args.captures[0])
+    else:
+        data = SweepData.load(args.captures)
+    print(f"[sweep] {len(data)} blocks loaded in {time.perf_counter() - loaded_at:.1f}s")
+    if args.save_npz:
+        data.save(args.save_npz)
+    if not len(data):
+        return 1
+
+    sweep = ParameterSweep(
+        data,
+        parse_axis(args.fees),
+        parse_axis(args.gas_limits, int),
+        parse_axis(args.levels, int),
+        parse_axis(args.size_mults),
+    )
+    results = sweep.run()
+    print(f"[sweep] {sweep.stats}")
+    baseline = {
+        "fee_bps": float(BINANCE_TAKER_FEE_BPS),
+        "gas_limit": DEFAULT_GAS_LIMIT,
+        "levels": DEPTH_WEIGHTED_LEVELS,
+        "size_mult": 1.0,
+    }
+    print(format_table(results, baseline, args.top))
+    print("* = current config")
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(results[0].keys()))
+            writer.writeheader()
+            writer.writerows(results)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())